@@ -169,6 +169,7 @@ class QuestionGenerationResponse(BaseModel):
     agent_performance: Optional[Dict[str, Any]] = None
     messages: Optional[List[str]] = None
     workflow_success: Optional[bool] = None
+    llm_usage: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
 
 class QuickQuestionRequest(BaseModel):
@@ -194,6 +195,14 @@ class AsyncQuestionGenerationRequest(BaseModel):
     llm_provider: Optional[str] = Field("openai", description="LLM provider to use")
     user_email: Optional[str] = Field(None, description="Email for completion notification")
     
+class BatchQuestionGenerationRequest(BaseModel):
+    """Model for a batch campaign: one job description against many resumes"""
+    jd_document_id: str = Field(..., description="Job description shared by every candidate")
+    resume_document_ids: List[str] = Field(..., min_length=1, description="Resumes of the candidates")
+    position_title: str = Field(..., description="Position title for the interviews")
+    llm_provider: Optional[str] = Field("openai", description="LLM provider to use")
+    user_email: Optional[str] = Field(None, description="Email for batch completion notification")
+
 class AsyncQuickQuestionRequest(BaseModel):
     """Model for async quick question generation with email notification"""
     resume_text: Optional[str] = None
@@ -229,6 +238,15 @@ class TaskInitiationResponse(BaseModel):
     estimated_duration_minutes: int = 15
     websocket_endpoint: Optional[str] = None
 
+class BatchCandidateTask(BaseModel):
+    """Task generating the questions of one batch candidate"""
+    resume_document_id: str
+    task_id: str
+
+class BatchTaskInitiationResponse(TaskInitiationResponse):
+    """Response model for batch campaign initiation"""
+    candidates: List[BatchCandidateTask] = []
+
 class ProgressUpdate(BaseModel):
     """Model for real-time progress updates"""
     task_id: str
@@ -236,4 +254,31 @@ class ProgressUpdate(BaseModel):
     current_step: str
     step_number: int
     total_steps: int
-    estimated_remaining_minutes: Optional[int] = None
\ No newline at end of file
+    estimated_remaining_minutes: Optional[int] = None
+
+# LLM Usage Models
+class LLMUsageTotals(BaseModel):
+    """Aggregated LLM calls, tokens and estimated cost"""
+    calls: int = 0
+    cache_hits: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    total_tokens: int = 0
+    latency_seconds: float = 0.0
+    estimated_cost_usd: Optional[float] = None
+
+class LLMUsageItem(LLMUsageTotals):
+    """LLM usage of one user on one provider/model"""
+    user_id: Optional[str] = None
+    provider: str
+    model: str
+
+class LLMUsageResponse(BaseModel):
+    """Response model for LLM usage reporting"""
+    items: List[LLMUsageItem]
+    by_user: Dict[str, LLMUsageTotals]
+    by_provider: Dict[str, LLMUsageTotals]
+    total: LLMUsageTotals
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
@@ -11,7 +11,9 @@ from app.api.v1.datamodels import (
     RubricListResponse, ExportLinkResponse, ErrorResponse,
     QuestionGenerationCreate, QuestionGenerationResponse, QuickQuestionRequest,
     AsyncQuestionGenerationRequest, AsyncQuickQuestionRequest,
-    TaskStatusResponse, TaskInitiationResponse, TaskStatusEnum
+    BatchQuestionGenerationRequest, BatchTaskInitiationResponse, BatchCandidateTask,
+    TaskStatusResponse, TaskInitiationResponse, TaskStatusEnum,
+    LLMUsageItem, LLMUsageResponse, LLMUsageTotals
 )
 
 from app.constants import Constants
@@ -20,6 +22,7 @@ from app.db_ops.database import get_db
 from app.db_ops import crud
 from app.db_ops.models import TaskStatus
 from app.db_ops.db_config import load_app_config
+from app.services.qgen.utils.settings import get_qgen_settings
 from app.services.file_upload_ops import _process_file_upload, _process_text_upload
 # from app.services.llm_rubric_ops import RubricGenerator
 from app.services.mock_response_service import mock_response_service
@@ -35,6 +38,16 @@ router.include_router(auth_router, prefix="/auth", tags=["Authentication"])
 # Initialize logger
 logger = get_logger(__name__)
 
+
+def _check_llm_provider(llm_provider: Optional[str]) -> None:
+    """Reject a provider that is unknown or disabled in this environment (e.g. fake outside load tests)."""
+    from app.llm_client_ops import ModelProvider, is_provider_enabled
+    if llm_provider not in {provider.value for provider in ModelProvider} or not is_provider_enabled(llm_provider):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown or disabled LLM provider: {llm_provider}"
+        )
+
 # Upload Routes
 @router.post("/upload/file/jd", response_model=DocumentResponse, tags=["Upload"])
 async def upload_jd_file(
@@ -223,6 +236,8 @@ async def generate_interview_questions(
     interview evaluation with technical questions, expected responses,
     and interviewer guidance.
     """
+    _check_llm_provider(question_request.llm_provider)
+    
     try:
         # Check if mock responses are enabled in development
         app_config = load_app_config()
@@ -341,25 +356,35 @@ async def generate_interview_questions(
             "gemini": LLMProvider.GEMINI,
             "groq": LLMProvider.GROQ,
             "azure_openai": LLMProvider.AZURE_OPENAI,
-            "portkey": LLMProvider.PORTKEY
+            "portkey": LLMProvider.PORTKEY,
+            "fake": LLMProvider.FAKE
         }
         
-        llm_provider = provider_mapping.get(question_request.llm_provider, LLMProvider.OPENAI)
+        llm_provider = provider_mapping[question_request.llm_provider]
         
         # Create multi-agent system
-        interview_system = create_technical_interview_system(
-            llm_provider=llm_provider,
-            llm_model="gpt-4.1" if llm_provider == LLMProvider.OPENAI else "gemini-2.0-flash-001"
-        )
+        interview_system = create_technical_interview_system(llm_provider=llm_provider)
         
         # Generate interview questions
         result = interview_system.generate_technical_interview(
             resume_text=resume_text,
             job_description=jd_text,
             position_title=question_request.position_title,
-            thread_id=f"api_{question_request.jd_document_id or question_request.resume_document_id}"
+            thread_id=f"api_{uuid.uuid4()}"
         )
         
+        # Record token usage for cost reporting
+        usage_records = (result.get("llm_usage") or {}).get("records")
+        if usage_records:
+            try:
+                crud.create_llm_usage_records(
+                    db, usage_records, source="api_question_generation",
+                    user_id=current_user.user_id if current_user else None
+                )
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Failed to store LLM usage: {e}")
+        
         # Store result in database if successful
         if result["success"]:
             try:
@@ -412,6 +437,8 @@ async def generate_quick_questions(
     This endpoint allows direct text input for quick question generation
     without requiring file uploads.
     """
+    _check_llm_provider(quick_request.llm_provider)
+    
     try:
         # Check if mock responses are enabled in development
         app_config = load_app_config()
@@ -481,25 +508,35 @@ async def generate_quick_questions(
             "gemini": LLMProvider.GEMINI,
             "groq": LLMProvider.GROQ,
             "azure_openai": LLMProvider.AZURE_OPENAI,
-            "portkey": LLMProvider.PORTKEY
+            "portkey": LLMProvider.PORTKEY,
+            "fake": LLMProvider.FAKE
         }
         
-        llm_provider = provider_mapping.get(quick_request.llm_provider, LLMProvider.GEMINI)
+        llm_provider = provider_mapping[quick_request.llm_provider]
         
         # Create multi-agent system
-        interview_system = create_technical_interview_system(
-            llm_provider=llm_provider,
-            llm_model="gpt-4o-mini" if llm_provider == LLMProvider.OPENAI else "gemini-2.0-flash-001"
-        )
+        interview_system = create_technical_interview_system(llm_provider=llm_provider)
         
         # Generate interview questions
         result = interview_system.generate_technical_interview(
             resume_text=quick_request.resume_text or "",
             job_description=quick_request.job_description or "",
             position_title=quick_request.position_title,
-            thread_id=f"quick_{hash(str(quick_request.resume_text) + str(quick_request.job_description)) % 10000}"
+            thread_id=f"quick_{uuid.uuid4()}"
         )
         
+        # Record token usage for cost reporting
+        usage_records = (result.get("llm_usage") or {}).get("records")
+        if usage_records:
+            try:
+                crud.create_llm_usage_records(
+                    db, usage_records, source="api_quick_question_generation",
+                    user_id=current_user.user_id if current_user else None
+                )
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Failed to store LLM usage: {e}")
+        
         # Store result in database if successful
         if result["success"]:
             try:
@@ -687,6 +724,8 @@ async def start_async_question_generation(
     This endpoint starts a background task for comprehensive interview question generation.
     Returns a task ID that can be used to track progress via WebSocket connection.
     """
+    _check_llm_provider(question_request.llm_provider)
+    
     try:
         # Import Celery task
         from app.tasks.question_generation_tasks import generate_interview_questions_async
@@ -796,6 +835,137 @@ async def start_async_question_generation(
             detail=f"Failed to start question generation: {str(e)}"
         )
 
+@router.post("/questions/generate/batch/async", response_model=BatchTaskInitiationResponse, tags=["Questions"])
+async def start_batch_question_generation(
+    batch_request: BatchQuestionGenerationRequest,
+    current_user = Depends(require_auth),
+    db: Session = Depends(get_db)
+):
+    """
+    Start a hiring campaign: interview questions for many resumes against one job description
+    
+    The job description is analyzed once and the candidates are processed in parallel
+    lanes. Connect to the returned WebSocket endpoint for aggregate progress plus
+    `candidate_progress` events; each candidate also has its own task ID.
+    """
+    _check_llm_provider(batch_request.llm_provider)
+    
+    try:
+        # Import Celery task
+        from app.tasks.question_generation_tasks import generate_batch_interview_questions_async
+        
+        resume_document_ids = list(dict.fromkeys(batch_request.resume_document_ids))
+        max_candidates = int((get_qgen_settings().get("batch") or {}).get("max_candidates", 100))
+        if len(resume_document_ids) > max_candidates:
+            raise HTTPException(
+                status_code=400,
+                detail=f"A batch can contain at most {max_candidates} resumes"
+            )
+        
+        jd_document = crud.get_document_by_type(
+            db=db,
+            document_id=batch_request.jd_document_id,
+            document_type=DocumentType.JD.value
+        )
+        if not jd_document:
+            raise HTTPException(
+                status_code=404,
+                detail=f"JD document with ID {batch_request.jd_document_id} not found"
+            )
+        
+        for resume_document_id in resume_document_ids:
+            if not crud.get_document_by_type(db=db, document_id=resume_document_id, document_type=DocumentType.RESUME.value):
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Resume document with ID {resume_document_id} not found"
+                )
+        
+        # Determine user email for notifications
+        user_email = None
+        user_id = None
+        if current_user:
+            user_id = current_user.user_id
+            if current_user.email_notifications_enabled == "true":
+                user_email = current_user.email
+        elif batch_request.user_email:
+            user_email = batch_request.user_email
+        
+        # Create the batch and candidate task records BEFORE starting the Celery workflow
+        batch_id = str(uuid.uuid4())
+        candidates = [
+            {"resume_document_id": resume_document_id, "task_id": str(uuid.uuid4())}
+            for resume_document_id in resume_document_ids
+        ]
+        
+        db.add(TaskStatus(
+            task_id=batch_id,
+            task_type="batch_question_generation",
+            status="pending",
+            progress=0,
+            current_step="Initializing...",
+            total_steps=2,
+            user_id=user_id,
+            user_email=user_email,
+            position_title=batch_request.position_title,
+            request_data={
+                "jd_document_id": batch_request.jd_document_id,
+                "candidates": candidates,
+                "llm_provider": batch_request.llm_provider
+            },
+            started_at=datetime.utcnow()
+        ))
+        for candidate in candidates:
+            db.add(TaskStatus(
+                task_id=candidate["task_id"],
+                task_type="question_generation",
+                status="pending",
+                progress=0,
+                current_step="Waiting in batch queue...",
+                total_steps=5,
+                user_id=user_id,
+                position_title=batch_request.position_title,
+                request_data={
+                    "jd_document_id": batch_request.jd_document_id,
+                    "resume_document_id": candidate["resume_document_id"],
+                    "llm_provider": batch_request.llm_provider,
+                    "batch_id": batch_id
+                }
+            ))
+        db.commit()
+        
+        logger.info(f"Created batch {batch_id} with {len(candidates)} candidate tasks")
+        
+        task = generate_batch_interview_questions_async.apply_async(
+            args=[
+                batch_request.jd_document_id,
+                candidates,
+                batch_request.position_title,
+                batch_request.llm_provider,
+                user_id
+            ],
+            task_id=batch_id
+        )
+        
+        logger.info(f"Started batch question generation {task.id} for position: {batch_request.position_title}")
+        
+        return BatchTaskInitiationResponse(
+            task_id=task.id,
+            status=TaskStatusEnum.PENDING,
+            message=f"Interview question generation started for {len(candidates)} candidates for {batch_request.position_title}",
+            estimated_duration_minutes=15,
+            websocket_endpoint=f"/ws/progress/{task.id}",
+            candidates=[BatchCandidateTask(**candidate) for candidate in candidates]
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error starting batch question generation: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to start batch question generation: {str(e)}"
+        )
+
 @router.post("/questions/generate/quick/async", response_model=TaskInitiationResponse, tags=["Questions"])
 async def start_async_quick_question_generation(
     quick_request: AsyncQuickQuestionRequest,
@@ -808,6 +978,8 @@ async def start_async_quick_question_generation(
     This endpoint starts a background task for quick interview question generation
     from raw text input without requiring file uploads.
     """
+    _check_llm_provider(quick_request.llm_provider)
+    
     try:
         # Import Celery task
         from app.tasks.question_generation_tasks import generate_quick_questions_async
@@ -971,6 +1143,67 @@ async def list_tasks(
         "limit": limit
     }
 
+@router.get("/usage", response_model=LLMUsageResponse, tags=["Usage"])
+async def get_llm_usage(
+    start_date: Optional[datetime] = Query(None, description="Include usage recorded at or after this time"),
+    end_date: Optional[datetime] = Query(None, description="Include usage recorded before this time"),
+    user_id: Optional[str] = Query(None, description="Filter by user"),
+    provider: Optional[str] = Query(None, description="Filter by LLM provider"),
+    task_id: Optional[str] = Query(None, description="Filter by task"),
+    current_user = Depends(require_auth),
+    db: Session = Depends(get_db)
+):
+    """
+    LLM token usage and estimated cost
+    
+    Returns question generation token usage per user, provider and model,
+    with totals by user and by provider. Users listed in
+    `qgen.usage.admin_emails` may read any user's usage; everyone else
+    only their own.
+    """
+    admin_emails = {email.lower() for email in (get_qgen_settings().get("usage") or {}).get("admin_emails") or []}
+    if current_user.email.lower() not in admin_emails:
+        if user_id and user_id != current_user.user_id:
+            raise HTTPException(status_code=403, detail="Not allowed to read other users' usage")
+        user_id = current_user.user_id
+    
+    rows = crud.get_llm_usage_summary(
+        db=db,
+        start_date=start_date,
+        end_date=end_date,
+        user_id=user_id,
+        provider=provider,
+        task_id=task_id
+    )
+    items = [LLMUsageItem(**{key: value for key, value in row.items() if value is not None}) for row in rows]
+    
+    def totals(group):
+        costs = [item.estimated_cost_usd for item in group if item.estimated_cost_usd is not None]
+        return LLMUsageTotals(
+            calls=sum(item.calls for item in group),
+            cache_hits=sum(item.cache_hits for item in group),
+            prompt_tokens=sum(item.prompt_tokens for item in group),
+            completion_tokens=sum(item.completion_tokens for item in group),
+            cached_tokens=sum(item.cached_tokens for item in group),
+            total_tokens=sum(item.total_tokens for item in group),
+            latency_seconds=round(sum(item.latency_seconds for item in group), 3),
+            estimated_cost_usd=round(sum(costs), 6) if costs else None
+        )
+    
+    by_user, by_provider = {}, {}
+    for item in items:
+        by_user.setdefault(item.user_id or "anonymous", []).append(item)
+        by_provider.setdefault(item.provider, []).append(item)
+    
+    return LLMUsageResponse(
+        items=items,
+        by_user={key: totals(group) for key, group in by_user.items()},
+        by_provider={key: totals(group) for key, group in by_provider.items()},
+        total=totals(items),
+        start_date=start_date,
+        end_date=end_date
+    )
+
 @router.get("/rubric/list", response_model=RubricListResponse, tags=["Rubric"])
 async def list_rubrics(
     page: int = Query(1, ge=1, description="Page number"),
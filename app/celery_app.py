@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.signals import worker_process_init
 import os
 from app.db_ops.db_config import load_app_config
 
@@ -38,4 +39,20 @@ celery_app.conf.update(
 )
 
 # Auto-discover tasks
-celery_app.autodiscover_tasks()
\ No newline at end of file
+celery_app.autodiscover_tasks()
+
+@worker_process_init.connect
+def init_llm_client_registry(**kwargs):
+    """Build shared LLM clients once per worker process (not inherited across fork)."""
+    from app.services.qgen.llm.client_registry import get_llm_client_registry
+    from app.services.qgen.models.schemas import LLMProvider
+
+    registry = get_llm_client_registry()
+    registry.reset()
+
+    provider_name = os.getenv('LLM_PROVIDER')
+    if provider_name:
+        try:
+            registry.warm_up([LLMProvider(provider_name.lower())])
+        except ValueError:
+            pass
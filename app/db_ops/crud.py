@@ -1,3 +1,4 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
@@ -819,6 +820,101 @@ def delete_expired_sessions(db: Session) -> int:
     
     return count
 
+# LLM usage operations
+
+def create_llm_usage_records(
+    db: Session,
+    records: List[Dict[str, Any]],
+    source: str,
+    task_id: Optional[str] = None,
+    user_id: Optional[str] = None
+) -> List[models.LLMUsageRecord]:
+    """
+    Store the per agent/provider/model usage totals of a run.
+    
+    Args:
+        db: Database session
+        records: Usage records (`llm_usage["records"]` of a run result)
+        source: Origin of the run (question_generation, quick_question_generation, ...)
+        task_id: Celery task ID (optional)
+        user_id: User who started the run (optional)
+        
+    Returns:
+        Created usage records
+    """
+    columns = (
+        "agent_name", "provider", "model", "calls", "cache_hits", "prompt_tokens",
+        "completion_tokens", "cached_tokens", "total_tokens", "latency_seconds", "estimated_cost_usd"
+    )
+    db_records = [
+        models.LLMUsageRecord(
+            task_id=task_id,
+            user_id=user_id,
+            source=source,
+            **{column: record.get(column) for column in columns if record.get(column) is not None}
+        )
+        for record in records
+    ]
+    
+    db.add_all(db_records)
+    db.commit()
+    
+    logger.info(f"Stored {len(db_records)} LLM usage records for task {task_id}")
+    return db_records
+
+def get_llm_usage_summary(
+    db: Session,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    user_id: Optional[str] = None,
+    provider: Optional[str] = None,
+    task_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Aggregate LLM usage by user, provider and model.
+    
+    Args:
+        db: Database session
+        start_date: Only include usage recorded at or after this time (optional)
+        end_date: Only include usage recorded before this time (optional)
+        user_id: Filter by user (optional)
+        provider: Filter by provider (optional)
+        task_id: Filter by task (optional)
+        
+    Returns:
+        One dict of totals per (user_id, provider, model)
+    """
+    record = models.LLMUsageRecord
+    query = db.query(
+        record.user_id,
+        record.provider,
+        record.model,
+        func.sum(record.calls).label("calls"),
+        func.sum(record.cache_hits).label("cache_hits"),
+        func.sum(record.prompt_tokens).label("prompt_tokens"),
+        func.sum(record.completion_tokens).label("completion_tokens"),
+        func.sum(record.cached_tokens).label("cached_tokens"),
+        func.sum(record.total_tokens).label("total_tokens"),
+        func.sum(record.latency_seconds).label("latency_seconds"),
+        func.sum(record.estimated_cost_usd).label("estimated_cost_usd")
+    )
+    
+    if start_date:
+        query = query.filter(record.created_at >= start_date)
+    if end_date:
+        query = query.filter(record.created_at < end_date)
+    if user_id:
+        query = query.filter(record.user_id == user_id)
+    if provider:
+        query = query.filter(record.provider == provider)
+    if task_id:
+        query = query.filter(record.task_id == task_id)
+    
+    rows = query.group_by(record.user_id, record.provider, record.model).order_by(
+        func.sum(record.total_tokens).desc()
+    ).all()
+    return [row._asdict() for row in rows]
+
 if __name__ == "__main__":
     from app.db_ops.database import SessionLocal
     import pprint
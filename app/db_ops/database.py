@@ -153,7 +153,11 @@ def init_db():
     """
     try:
         # Import models to ensure they're registered with Base
-        from app.db_ops.models import Document, Rubric, RubricHistory, SharedLink, TaskStatus, User, UserSession
+        from app.db_ops.models import (
+            Document, Rubric, RubricHistory, SharedLink, TaskStatus, User, UserSession,
+            WorkflowCheckpoint, WorkflowCheckpointWrite, LLMUsageRecord, JDSkillProfile,
+            QuestionBankEntry
+        )
         
         # Create all tables
         Base.metadata.create_all(bind=engine)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text, JSON, Integer, UniqueConstraint
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, JSON, Integer, Float, LargeBinary, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 import uuid
 from datetime import datetime
@@ -210,4 +210,164 @@ class UserSession(Base):
     user = relationship("User")
     
     def __repr__(self):
-        return f"<UserSession(id='{self.session_id}', user_id='{self.user_id}', expires_at='{self.expires_at}')>"
\ No newline at end of file
+        return f"<UserSession(id='{self.session_id}', user_id='{self.user_id}', expires_at='{self.expires_at}')>"
+
+class WorkflowCheckpoint(Base):
+    """
+    WorkflowCheckpoint model for durable LangGraph checkpoints.
+    
+    One row per checkpoint of a question generation workflow thread, so a
+    failed run can be resumed from the last completed agent.
+    """
+    __tablename__ = "workflow_checkpoints"
+    
+    thread_id = Column(String(255), primary_key=True)
+    checkpoint_ns = Column(String(255), primary_key=True, default="")
+    checkpoint_id = Column(String(64), primary_key=True)
+    parent_checkpoint_id = Column(String(64), nullable=True)
+    
+    # Serialized checkpoint and metadata (serializer type + payload)
+    checkpoint_type = Column(String(32), nullable=False)
+    checkpoint = Column(LargeBinary, nullable=False)
+    metadata_type = Column(String(32), nullable=False)
+    checkpoint_metadata = Column(LargeBinary, nullable=False)
+    
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Indexes and constraints
+    __table_args__ = (
+        Index('ix_workflow_checkpoints_created_at', 'created_at'),
+    )
+    
+    def __repr__(self):
+        return f"<WorkflowCheckpoint(thread_id='{self.thread_id}', checkpoint_id='{self.checkpoint_id}')>"
+
+class WorkflowCheckpointWrite(Base):
+    """
+    WorkflowCheckpointWrite model for pending writes attached to a checkpoint.
+    """
+    __tablename__ = "workflow_checkpoint_writes"
+    
+    thread_id = Column(String(255), primary_key=True)
+    checkpoint_ns = Column(String(255), primary_key=True, default="")
+    checkpoint_id = Column(String(64), primary_key=True)
+    task_id = Column(String(64), primary_key=True)
+    idx = Column(Integer, primary_key=True)
+    channel = Column(String(255), nullable=False)
+    value_type = Column(String(32), nullable=False)
+    value = Column(LargeBinary, nullable=False)
+    task_path = Column(String(255), nullable=False, default="")
+    
+    def __repr__(self):
+        return f"<WorkflowCheckpointWrite(thread_id='{self.thread_id}', checkpoint_id='{self.checkpoint_id}', channel='{self.channel}')>"
+
+class LLMUsageRecord(Base):
+    """
+    LLMUsageRecord model for token and cost accounting.
+    
+    One row per agent, provider and model of a question generation run,
+    with the run's call, token, latency and estimated cost totals.
+    """
+    __tablename__ = "llm_usage_records"
+    
+    usage_id = Column(String(36), primary_key=True, default=generate_uuid)
+    task_id = Column(String(36), nullable=True)  # Celery task ID (None for sync API runs)
+    user_id = Column(String(36), ForeignKey("users.user_id"), nullable=True)
+    source = Column(String(50), nullable=False)  # 'question_generation', 'quick_question_generation', ...
+    
+    agent_name = Column(String(100), nullable=False)
+    provider = Column(String(50), nullable=False)
+    model = Column(String(255), nullable=False)
+    
+    # Totals for the run
+    calls = Column(Integer, default=0, nullable=False)
+    cache_hits = Column(Integer, default=0, nullable=False)
+    prompt_tokens = Column(Integer, default=0, nullable=False)
+    completion_tokens = Column(Integer, default=0, nullable=False)
+    cached_tokens = Column(Integer, default=0, nullable=False)
+    total_tokens = Column(Integer, default=0, nullable=False)
+    latency_seconds = Column(Float, default=0.0, nullable=False)
+    estimated_cost_usd = Column(Float, nullable=True)  # None when the model has no configured price
+    
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Indexes and constraints
+    __table_args__ = (
+        Index('ix_llm_usage_records_task_id', 'task_id'),
+        Index('ix_llm_usage_records_user_id_created_at', 'user_id', 'created_at'),
+        Index('ix_llm_usage_records_created_at', 'created_at'),
+    )
+    
+    def __repr__(self):
+        return f"<LLMUsageRecord(task_id='{self.task_id}', agent='{self.agent_name}', model='{self.provider}:{self.model}', tokens={self.total_tokens})>"
+
+class JDSkillProfile(Base):
+    """
+    JDSkillProfile model caching the skills extracted from a job description.
+    
+    Keyed by a hash of the normalised job description text and position
+    title, the extraction model and the profile version, so one JD run
+    against many resumes is only extracted once.
+    """
+    __tablename__ = "jd_skill_profiles"
+    
+    profile_key = Column(String(64), primary_key=True)  # sha256 of content hash, position title, provider, model, version
+    content_hash = Column(String(64), nullable=False)  # sha256 of the normalised JD text
+    provider = Column(String(50), nullable=False)
+    model = Column(String(255), nullable=False)
+    
+    # ExtractedSkill and SkillCategory lists as JSON
+    skills = Column(JSON, nullable=False)
+    categories = Column(JSON, nullable=False)
+    
+    hit_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_used_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Indexes and constraints
+    __table_args__ = (
+        Index('ix_jd_skill_profiles_content_hash', 'content_hash'),
+        Index('ix_jd_skill_profiles_last_used_at', 'last_used_at'),
+    )
+    
+    def __repr__(self):
+        return f"<JDSkillProfile(key='{self.profile_key}', model='{self.model}', hits={self.hit_count})>"
+
+class QuestionBankEntry(Base):
+    """
+    QuestionBankEntry model storing an approved question with its evaluation
+    and expected response for reuse across interviews.
+    
+    Indexed by normalised skill name, question type and difficulty level.
+    """
+    __tablename__ = "question_bank"
+    
+    entry_id = Column(String(36), primary_key=True, default=generate_uuid)
+    skill_key = Column(String(255), nullable=False)  # normalised targeted skill name
+    skill_name = Column(String(255), nullable=False)
+    question_type = Column(String(50), nullable=False)
+    difficulty_level = Column(Integer, nullable=False)
+    question_hash = Column(String(64), nullable=False, unique=True)  # sha256 of the normalised question text
+    
+    # TechnicalQuestion, QuestionEvaluation and ExpectedResponse as JSON
+    question = Column(JSON, nullable=False)
+    evaluation = Column(JSON, nullable=False)
+    expected_response = Column(JSON, nullable=False)
+    
+    overall_quality = Column(Integer, nullable=False)
+    average_score = Column(Float, nullable=False)  # mean of the evaluation's five scores
+    provider = Column(String(50), nullable=True)
+    model = Column(String(255), nullable=True)
+    
+    use_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_used_at = Column(DateTime, nullable=True)
+    
+    # Indexes and constraints
+    __table_args__ = (
+        Index('ix_question_bank_lookup', 'skill_key', 'question_type', 'difficulty_level'),
+        Index('ix_question_bank_skill_quality', 'skill_key', 'overall_quality'),
+    )
+    
+    def __repr__(self):
+        return f"<QuestionBankEntry(skill='{self.skill_key}', type='{self.question_type}', difficulty={self.difficulty_level}, quality={self.overall_quality})>"
@@ -0,0 +1,383 @@
+"""
+Deterministic fake chat model for offline load testing.
+
+`FakeChatModel` is a LangChain chat model that never leaves the process. Its
+structured outputs (`with_structured_output`) are schema-valid instances of
+the requested Pydantic model, built from the prompt and seeded by a hash of
+it, so the same input always yields the same skills, questions, evaluations
+and expected responses. Latency is drawn from a configurable distribution,
+and provider errors, 429s and malformed outputs can be injected at given
+rates, so the whole Celery + Redis + WebSocket stack can be benchmarked
+without API keys or provider rate limits.
+
+Configured under `llm_providers.fake.constructor_params`.
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import random
+import re
+import time
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, Iterator, List, Literal, Optional, Tuple, Union, get_args, get_origin
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.exceptions import OutputParserException
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+STREAM_CHUNK_CHARS = 24
+
+SKILL_CATEGORIES = ["Backend Development", "Data Engineering", "Cloud Infrastructure", "Machine Learning"]
+EXPERIENCE_LEVELS = ["Intermediate", "Advanced", "Expert"]
+FILLER_WORDS = [
+    "latency", "throughput", "consistency", "caching", "indexing", "concurrency", "scaling",
+    "partitioning", "replication", "profiling", "observability", "backpressure", "idempotency"
+]
+
+# Technologies recognised in documents; other capitalised words are a fallback
+KNOWN_TECHNOLOGIES = [
+    "Python", "Java", "Go", "Rust", "C++", "C#", "JavaScript", "TypeScript", "Scala", "Kotlin", "SQL",
+    "FastAPI", "Django", "Flask", "Spring Boot", "Node.js", "React", "GraphQL", "gRPC", "REST",
+    "PostgreSQL", "MySQL", "MongoDB", "Redis", "Cassandra", "Elasticsearch", "Kafka", "RabbitMQ", "Celery",
+    "Spark", "Airflow", "Snowflake", "dbt", "AWS", "GCP", "Azure", "Docker", "Kubernetes", "Terraform",
+    "Linux", "PyTorch", "TensorFlow", "scikit-learn", "Pandas", "NumPy", "LangChain", "Microservices"
+]
+
+# Words that look like skills in free text but are not
+_STOP_WORDS = {
+    "the", "and", "for", "with", "you", "your", "our", "are", "this", "that", "from", "will",
+    "job", "description", "resume", "candidate", "experience", "requirements", "responsibilities",
+    "skills", "skill", "years", "team", "work", "json", "output", "format", "extract", "technical",
+    "return", "include", "only", "each", "category", "categories", "level", "evidence", "context",
+    "position", "role", "company", "summary", "education", "projects", "project", "senior", "junior"
+}
+
+
+class FakeLLMError(Exception):
+    """Injected provider failure; `status_code` 429 is treated as a rate limit."""
+
+    def __init__(self, message: str, status_code: int = 500):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", text).strip("_").upper()[:24] or "ITEM"
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline chat model with seeded, schema-valid structured outputs.
+
+    Args:
+        model: model name reported in usage accounting
+        seed: mixed into the per-input hash; change it for a different but still reproducible run
+        latency: `distribution` (fixed | uniform | normal | lognormal), `mean_seconds`,
+            `stddev_seconds`, `min_seconds`, `max_seconds`
+        error_rate: fraction of calls failing with a provider error
+        rate_limit_error_rate: fraction of calls failing with a 429
+        malformed_output_rate: fraction of structured calls returning truncated JSON
+    """
+
+    model: str = "fake-1"
+    temperature: float = 0.0
+    max_tokens: Optional[int] = None
+    seed: int = 0
+    latency: Dict[str, Any] = {}
+    error_rate: float = 0.0
+    rate_limit_error_rate: float = 0.0
+    malformed_output_rate: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model, "seed": self.seed}
+
+    # ---- determinism, latency and failures -----------------------------------
+
+    def _rng(self, messages: List[BaseMessage], purpose: str) -> random.Random:
+        """Random generator seeded by the seed, the purpose and the full prompt."""
+        prompt = "\n".join(f"{m.type}:{m.content}" for m in messages)
+        digest = hashlib.sha256(f"{self.seed}|{purpose}|{prompt}".encode()).hexdigest()
+        return random.Random(int(digest[:16], 16))
+
+    def _latency_seconds(self, rng: random.Random) -> float:
+        settings = self.latency or {}
+        mean = float(settings.get("mean_seconds", 0.0))
+        stddev = float(settings.get("stddev_seconds", 0.0))
+        distribution = settings.get("distribution", "fixed")
+        if distribution == "uniform":
+            value = rng.uniform(max(mean - stddev, 0.0), mean + stddev)
+        elif distribution == "normal":
+            value = rng.gauss(mean, stddev)
+        elif distribution == "lognormal" and mean > 0:
+            # Parameters of the underlying normal that give the configured mean and stddev
+            sigma2 = math.log(1 + (stddev / mean) ** 2)
+            value = rng.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2))
+        else:
+            value = mean
+        return min(max(value, float(settings.get("min_seconds", 0.0))), float(settings.get("max_seconds", 300.0)))
+
+    def _maybe_fail(self) -> None:
+        """Inject failures; drawn per call (not per input) so that retries can succeed."""
+        draw = random.random()
+        if draw < self.rate_limit_error_rate:
+            raise FakeLLMError("Fake provider rate limit exceeded (429)", status_code=429)
+        if draw < self.rate_limit_error_rate + self.error_rate:
+            raise FakeLLMError("Fake provider internal error (500)", status_code=500)
+
+    def _usage(self, messages: List[BaseMessage], content: str) -> Dict[str, int]:
+        input_tokens = sum(len(str(m.content)) for m in messages) // CHARS_PER_TOKEN + 1
+        output_tokens = len(content) // CHARS_PER_TOKEN + 1
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens}
+
+    # ---- chat model interface ------------------------------------------------
+
+    def _respond(self, messages: List[BaseMessage], schema: Optional[type] = None) -> Tuple[AIMessage, Any]:
+        """Build the response message and, for a schema, the parsed output."""
+        target = schema or self._infer_schema(messages)
+        rng = self._rng(messages, target.__name__ if target else "text")
+        if target is None:
+            parsed = None
+            content = f"Fake response: {' '.join(rng.sample(FILLER_WORDS, 5))}."
+        else:
+            parsed = FakeOutputBuilder(rng).build(target, messages)
+            content = parsed.model_dump_json()
+        message = AIMessage(content=content, usage_metadata=self._usage(messages, content),
+                            response_metadata={"model_name": self.model})
+        return message, parsed
+
+    @staticmethod
+    def _infer_schema(messages: List[BaseMessage]) -> Optional[type]:
+        """Output schema asked for by a plain (streamed) prompt, from its JSON format example."""
+        from app.services.qgen.models.schemas import QuestionGenerationOutput
+        text = str(messages[-1].content) if messages else ""
+        return QuestionGenerationOutput if '"questions"' in text else None
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self._latency_seconds(self._rng(messages, "latency")))
+        self._maybe_fail()
+        message, _ = self._respond(messages)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self._latency_seconds(self._rng(messages, "latency")))
+        self._maybe_fail()
+        message, _ = self._respond(messages)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream_chunks(self, messages: List[BaseMessage]) -> Tuple[List[str], float, Dict[str, int]]:
+        """Content chunks, delay between chunks and usage for a streamed response."""
+        message, _ = self._respond(messages)
+        content = message.content
+        chunks = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)] or [""]
+        # The whole stream takes the sampled latency, spread evenly over the chunks
+        delay = self._latency_seconds(self._rng(messages, "latency")) / len(chunks)
+        return chunks, delay, message.usage_metadata
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        self._maybe_fail()
+        chunks, delay, usage = self._stream_chunks(messages)
+        for chunk in chunks:
+            time.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        self._maybe_fail()
+        chunks, delay, usage = self._stream_chunks(messages)
+        for chunk in chunks:
+            await asyncio.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+
+    # ---- structured output ---------------------------------------------------
+
+    def with_structured_output(self, schema: Union[Dict, type], *, include_raw: bool = False, **kwargs: Any):
+        """Return a runnable producing seeded instances of `schema` (a Pydantic model)."""
+        if not (isinstance(schema, type) and issubclass(schema, BaseModel)):
+            raise ValueError("FakeChatModel only supports Pydantic output schemas")
+
+        def respond(messages: List[BaseMessage]) -> Any:
+            self._maybe_fail()
+            message, parsed = self._respond(messages, schema)
+            if random.random() < self.malformed_output_rate:
+                # Truncate the answer mid-way, like a response cut off at max tokens
+                message = AIMessage(content=message.content[:max(1, len(message.content) * 2 // 3)],
+                                    usage_metadata=message.usage_metadata)
+                error = OutputParserException(f"Fake malformed {schema.__name__} output")
+                if not include_raw:
+                    raise error
+                return {"raw": message, "parsed": None, "parsing_error": error}
+            if include_raw:
+                return {"raw": message, "parsed": parsed, "parsing_error": None}
+            return parsed
+
+        def invoke(input: Any) -> Any:
+            messages = self._convert_input(input).to_messages()
+            time.sleep(self._latency_seconds(self._rng(messages, "latency")))
+            return respond(messages)
+
+        async def ainvoke(input: Any) -> Any:
+            messages = self._convert_input(input).to_messages()
+            await asyncio.sleep(self._latency_seconds(self._rng(messages, "latency")))
+            return respond(messages)
+
+        return RunnableLambda(invoke, afunc=ainvoke, name=f"FakeStructuredOutput[{schema.__name__}]")
+
+
+class FakeOutputBuilder:
+    """Builds schema-valid outputs whose ids and skills match the prompt."""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+
+    def build(self, schema: type, messages: List[BaseMessage]) -> BaseModel:
+        text = str(messages[-1].content) if messages else ""
+        builder = getattr(self, f"_build_{_snake(schema.__name__)}", None)
+        if builder is not None:
+            return builder(schema, text)
+        return self.model(schema)
+
+    # ---- pipeline schemas ----------------------------------------------------
+
+    def _build_skill_extraction_output(self, schema: type, text: str) -> BaseModel:
+        names = self._skill_candidates(text)
+        categories = self.rng.sample(SKILL_CATEGORIES, k=min(len(SKILL_CATEGORIES), max(1, (len(names) + 2) // 3)))
+        skills = [
+            {
+                "skill_name": name,
+                "category": categories[i % len(categories)],
+                "evidence_from_text": f"Mentions {name} in recent work",
+                "experience_level": self.rng.choice(EXPERIENCE_LEVELS),
+                "confidence_score": self.rng.randint(3, 5),
+                "context": f"Production systems built with {name}",
+                "specific_technologies": [name]
+            }
+            for i, name in enumerate(names)
+        ]
+        category_items = [
+            {"name": name, "description": f"{name} skills", "priority": priority}
+            for priority, name in enumerate(categories, 1)
+        ]
+        return schema.model_validate({"skills": skills, "categories": category_items})
+
+    def _build_question_generation_output(self, schema: type, text: str) -> BaseModel:
+        names = [n for n in re.findall(r'"name": ?"([^"]+)"', text)] or ["General Engineering"]
+        category = re.search(r"for the (.+?) category", text)
+        prefix = _slug(category.group(1)) if category else "Q"
+        from app.services.qgen.models.schemas import QuestionType
+        questions = []
+        for name in names:
+            for i in range(self.rng.randint(2, 3)):
+                topic = self.rng.choice(FILLER_WORDS)
+                questions.append({
+                    "question_id": f"{prefix}_{_slug(name)}_{i + 1}_{self.rng.randrange(16 ** 4):04x}",
+                    "question_text": f"How would you reason about {topic} when using {name} at scale? "
+                                     f"Walk through the trade-offs and how you would measure them.",
+                    "question_type": self.rng.choice(list(QuestionType)).value,
+                    "difficulty_level": self.rng.randint(2, 5),
+                    "estimated_time_minutes": self.rng.choice([5, 10, 15]),
+                    "targeted_skill": name,
+                    "rationale": f"Probes depth of {name} experience around {topic}",
+                    "tags": [name.lower(), topic]
+                })
+        return schema.model_validate({"questions": questions})
+
+    def _build_question_evaluation_output(self, schema: type, text: str) -> BaseModel:
+        ids = [i for i in re.findall(r'"question_id": ?"([^"]+)"', text) if i not in ("...", "unique_id")]
+        ids = ids or re.findall(r"ID: (\S+)", text)
+        evaluations = []
+        for question_id in ids:
+            scores = {field: self.rng.randint(2, 5) for field in (
+                "technical_depth_score", "relevance_score", "difficulty_appropriateness", "non_generic_score"
+            )}
+            overall = round(sum(scores.values()) / len(scores))
+            evaluations.append({
+                "question_id": question_id, **scores, "overall_quality": overall,
+                "feedback": "Specific and well targeted" if overall >= 3 else "Too generic for the candidate",
+                "approved": overall >= 3
+            })
+        return schema.model_validate({"evaluations": evaluations})
+
+    def _build_expected_response_output(self, schema: type, text: str) -> BaseModel:
+        ids = re.findall(r"ID: (\S+)", text) or ["Q_1"]
+        item_model = _list_item_model(schema, "responses")
+        return schema.model_validate({
+            "responses": [self.model(item_model, {"question_id": question_id}) for question_id in ids]
+        })
+
+    def _skill_candidates(self, text: str) -> List[str]:
+        """Known technologies (else technology-looking words) of the documents, in a seeded order."""
+        known = [t for t in KNOWN_TECHNOLOGIES if re.search(rf"(?<![\w+#.]){re.escape(t)}(?![\w+#])", text, re.I)]
+        if known:
+            return self.rng.sample(known, k=min(len(known), self.rng.randint(4, 8)))
+        words = re.findall(r"\b[A-Z][A-Za-z0-9+#.]{1,20}\b", text)
+        candidates = list(dict.fromkeys(w.rstrip(".") for w in words if w.lower().rstrip(".") not in _STOP_WORDS))
+        if not candidates:
+            return [f"Skill {i}" for i in range(1, 5)]
+        return self.rng.sample(candidates, k=min(len(candidates), self.rng.randint(4, 8)))
+
+    # ---- generic models ------------------------------------------------------
+
+    def model(self, schema: type, fixed: Optional[Dict[str, Any]] = None) -> BaseModel:
+        """A valid instance of any Pydantic model, with `fixed` field values."""
+        values = dict(fixed or {})
+        for name, field in schema.model_fields.items():
+            if name not in values:
+                values[name] = self.value(field.annotation, name)
+        return schema.model_validate(values)
+
+    def value(self, annotation: Any, name: str = "") -> Any:
+        origin, args = get_origin(annotation), get_args(annotation)
+        if origin is Union:
+            return self.value(next(a for a in args if a is not type(None)), name)
+        if origin is Literal:
+            return self.rng.choice(args)
+        if origin in (list, List):
+            return [self.value(args[0] if args else str, name) for _ in range(self.rng.randint(2, 4))]
+        if origin in (dict, Dict):
+            return {}
+        if isinstance(annotation, type) and issubclass(annotation, Enum):
+            return self.rng.choice(list(annotation)).value
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            return self.model(annotation).model_dump()
+        if annotation is bool:
+            return self.rng.random() < 0.8
+        if annotation is int:
+            return self.rng.randint(1, 10)
+        if annotation is float:
+            return round(self.rng.random(), 3)
+        if annotation in (datetime, date):
+            # Fixed epoch rather than now(), so outputs stay reproducible
+            value = datetime(2024, 1, 1) + timedelta(minutes=self.rng.randrange(365 * 24 * 60))
+            return value if annotation is datetime else value.date()
+        label = name.replace("_", " ") or "value"
+        return f"{label}: {' '.join(self.rng.sample(FILLER_WORDS, 3))}"
+
+
+def _snake(name: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+def _list_item_model(schema: type, field_name: str) -> type:
+    return get_args(schema.model_fields[field_name].annotation)[0]
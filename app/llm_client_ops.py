@@ -106,6 +106,21 @@ class ModelProvider(str, Enum):
     GEMINI = "gemini"
     GROQ = "groq"
     PORTKEY = "portkey"
+    FAKE = "fake"
+
+def is_provider_enabled(provider_name: str) -> bool:
+    """
+    Whether a provider may be used in the running environment.
+
+    The fake provider must be enabled with `llm_providers.fake.enabled` in the
+    active app config (app.prod.yaml under APP_ENV=PROD), not in the dev YAML
+    the provider settings are read from.
+    """
+    if provider_name.lower() != ModelProvider.FAKE.value:
+        return True
+    from app.db_ops.db_config import load_app_config
+    fake_config = (load_app_config().get("llm_providers") or {}).get("fake") or {}
+    return bool(fake_config.get("enabled", False))
 
 class LLM_Client_Ops:
     """
@@ -119,9 +134,14 @@ class LLM_Client_Ops:
         ModelProvider.AZURE_OPENAI,
         ModelProvider.GEMINI,
         ModelProvider.GROQ,
+        ModelProvider.FAKE,
         # Portkey depends on underlying provider
     }
 
+    # Constructor parameters that select the model / cap the output, where they differ
+    MODEL_PARAMS = {ModelProvider.AZURE_OPENAI: "azure_deployment"}
+    MAX_TOKENS_PARAMS = {ModelProvider.GEMINI: "max_output_tokens"}
+
     @classmethod
     def _get_llm_yaml_config(cls) -> Dict[str, Any]:
         """Loads and caches the LLM configuration from the YAML file."""
@@ -129,15 +149,40 @@ class LLM_Client_Ops:
             cls._loaded_llm_yaml_config = load_and_validate_llm_config_from_yaml()
         return cls._loaded_llm_yaml_config
 
+    @classmethod
+    def get_default_model(cls, provider_name: str) -> Optional[str]:
+        """Return the model configured for a provider in the YAML `constructor_params`."""
+        provider_config = cls._get_llm_yaml_config().get(provider_name.lower()) or {}
+        model_param = cls.MODEL_PARAMS.get(ModelProvider(provider_name.lower()), "model")
+        return (provider_config.get("constructor_params") or {}).get(model_param)
 
-    def __init__(self, provider_name: str): 
+    @classmethod
+    def build_constructor_overrides(cls, provider_name: str, model: Optional[str] = None,
+                                    temperature: Optional[float] = None,
+                                    max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """Map model, temperature and max tokens to the provider's constructor parameter names."""
+        provider = ModelProvider(provider_name.lower())
+        overrides: Dict[str, Any] = {}
+        if model:
+            overrides[cls.MODEL_PARAMS.get(provider, "model")] = model
+        if temperature is not None:
+            overrides["temperature"] = temperature
+        if max_tokens is not None:
+            overrides[cls.MAX_TOKENS_PARAMS.get(provider, "max_tokens")] = max_tokens
+        return overrides
+
+
+    def __init__(self, provider_name: str, constructor_overrides: Optional[Dict[str, Any]] = None): 
         """
         Initialize the LLM operations manager with a specific provider.
 
         Args:
             provider_name: The name of the LLM provider (e.g., "openai", "gemini").
+            constructor_overrides: Optional constructor params (model, temperature, ...)
+                that take precedence over the YAML `constructor_params`.
         """
         self.provider_name = provider_name.lower()
+        self.constructor_overrides = constructor_overrides or {}
         
         all_llm_yaml_configs = LLM_Client_Ops._get_llm_yaml_config()
 
@@ -193,12 +238,20 @@ class LLM_Client_Ops:
             if not os.environ.get("PORTKEY_API_KEY"):
                 raise ValueError("Portkey API key env var PORTKEY_API_KEY is required.")
 
+        elif provider == ModelProvider.FAKE:
+            # Made-up outputs must never reach real interviews; load-test configs opt in explicitly
+            if not is_provider_enabled(self.provider_name):
+                raise ValueError("The fake provider is disabled; set llm_providers.fake.enabled: true for load tests.")
+
 
     def _initialize_client(self):
 
         provider = ModelProvider(self.provider_name)
 
-        constructor_params = self.provider_yaml_config.get("constructor_params", {})
+        constructor_params = {
+            **self.provider_yaml_config.get("constructor_params", {}),
+            **self.constructor_overrides
+        }
         invoke_params = self.provider_yaml_config.get("invoke_params", {})
 
         if not invoke_params:
@@ -242,6 +295,11 @@ class LLM_Client_Ops:
                     default_headers=createHeaders(api_key=portkey_api_key, config=portkey_routing_config),
                     **constructor_params # Pass model, temperature etc. via Portkey
                 )
+
+            elif provider == ModelProvider.FAKE:
+                # Offline deterministic model for load tests; needs no API key
+                from app.fake_llm_client import FakeChatModel
+                self.llm_client = FakeChatModel(**constructor_params)
             else:
                 raise ValueError(f"Unsupported provider: {self.provider_name}")
         except Exception as e:
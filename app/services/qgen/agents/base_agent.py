@@ -5,52 +5,185 @@ Integrated with Rubri Backend LLM Client
 
 import time
 import asyncio
+import contextvars
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from typing import Dict, Any, Optional, TYPE_CHECKING
 from app.services.qgen.models.schemas import LLMConfig, LLMProvider, AgentResult, MultiAgentInterviewState
 from app.logger import get_logger
-from app.llm_client_ops import LLM_Client_Ops
+from app.services.qgen.llm.agent_llm import AgentLLM, is_transient_error
+from app.services.qgen.llm.hedging import HedgedCaller
+from app.services.qgen.llm.client_registry import get_llm_client_registry, model_for_provider, to_rubri_provider
+from app.services.qgen.llm.provider_health import get_provider_health_monitor
+from app.services.qgen.llm.recording import get_llm_corpus
+from app.services.qgen.llm.response_cache import get_response_cache
+from app.services.qgen.llm.router import RoutedLLM, get_provider_router
+from app.services.qgen.llm.usage import get_current_usage_tracker
+from app.services.qgen.utils.settings import get_agent_settings
 
 if TYPE_CHECKING:
     from app.services.qgen.streaming.stream_manager import StreamManager
 
+# Stream manager for the current run; lets pooled agents stream per run
+_current_stream_manager: contextvars.ContextVar[Optional['StreamManager']] = contextvars.ContextVar(
+    "qgen_stream_manager", default=None
+)
+
+
+@contextmanager
+def use_stream_manager(stream_manager: Optional['StreamManager']):
+    """Make `stream_manager` the stream manager of agents without their own for this context."""
+    token = _current_stream_manager.set(stream_manager)
+    try:
+        yield
+    finally:
+        _current_stream_manager.reset(token)
+
+
 class LLMFactory:
     """Factory for creating LLM instances using Rubri's LLM client."""
     
     logger = get_logger(__name__)
     
     @staticmethod
-    def create_llm(config: LLMConfig):
-        """Create an LLM instance using Rubri's LLM_Client_Ops."""
+    def create_llm(config: LLMConfig, structured_output_model: type = None, use_cache: bool = True,
+                   hedging: Optional[Dict[str, Any]] = None, routing: Optional[Dict[str, Any]] = None,
+                   agent_name: Optional[str] = None):
+        """
+        Get a shared LLM instance from the process-wide client registry.
+
+        Structured outputs are served from the response cache when it is
+        enabled and `use_cache` is True. With `hedging` settings, slow calls
+        are also sent to the configured secondary provider/model. With
+        `routing` settings, each call goes to the best available backend
+        among the configured provider and the allowed ones. Token usage is
+        attributed to `agent_name`. Provider availability is checked on every
+        call (see AgentLLM), so pooled instances follow circuit changes.
+        """
         LLMFactory.logger.info(f"Creating LLM instance with provider: {config.provider.value}, model: {config.model}")
         
         try:
-            # Map qgen provider names to rubri provider names
-            provider_mapping = {
-                LLMProvider.OPENAI: "openai",
-                LLMProvider.GEMINI: "gemini", 
-                LLMProvider.GROQ: "groq",
-                LLMProvider.AZURE_OPENAI: "azure_openai",
-                LLMProvider.PORTKEY: "portkey"
-            }
-            
-            rubri_provider = provider_mapping.get(config.provider)
-            if not rubri_provider:
-                raise ValueError(f"Unsupported LLM provider: {config.provider}")
-            
-            # Create LLM client using Rubri's client
-            llm_client_ops = LLM_Client_Ops(provider_name=rubri_provider)
-            
-            if not llm_client_ops.health_check():
-                raise Exception("LLM health check failed")
-            
+            routed = bool(routing and routing.get("enabled", False))
+            llm = LLMFactory._build_agent_llm(
+                config, structured_output_model, use_cache=use_cache and not routed, hedging=hedging,
+                agent_name=agent_name
+            )
             LLMFactory.logger.info(f"Successfully created LLM client: {config.model}")
-            return llm_client_ops.llm_client
+            if routed:
+                return LLMFactory._create_routed_llm(
+                    config, structured_output_model, llm, routing, use_cache, agent_name
+                )
+            return llm
             
         except Exception as e:
             LLMFactory.logger.error(f"Failed to create LLM instance: {str(e)}")
             raise
 
+    @staticmethod
+    def _build_agent_llm(config: LLMConfig, structured_output_model: type, use_cache: bool = True,
+                         hedging: Optional[Dict[str, Any]] = None, agent_name: Optional[str] = None) -> AgentLLM:
+        """Wrap the shared runnable for `config` in an AgentLLM."""
+        registry = get_llm_client_registry()
+        key_parts = registry.runnable_key(config, structured_output_model)
+        runnable = registry.get_llm(config, structured_output_model)
+        stream_runnable = registry.get_llm(config) if structured_output_model is not None else None
+        corpus = get_llm_corpus()
+        if corpus is not None:
+            # Record provider calls to, or replay them from, the on-disk corpus
+            runnable = corpus.wrap(runnable, key_parts, structured_output_model)
+            if stream_runnable is not None:
+                stream_runnable = corpus.wrap(stream_runnable, key_parts)
+        return AgentLLM(
+            to_rubri_provider(config.provider),
+            runnable,
+            get_provider_health_monitor(),
+            response_cache=get_response_cache() if use_cache else None,
+            output_schema=structured_output_model,
+            cache_key_parts=key_parts,
+            output_tokens=config.max_tokens,
+            hedger=LLMFactory._create_hedger(config, structured_output_model, hedging, agent_name),
+            model=config.model,
+            agent_name=agent_name,
+            stream_runnable=stream_runnable
+        )
+
+    @staticmethod
+    def _create_routed_llm(config: LLMConfig, structured_output_model: type, primary_llm: AgentLLM,
+                           routing: Dict[str, Any], use_cache: bool,
+                           agent_name: Optional[str] = None) -> RoutedLLM:
+        """Build a RoutedLLM over the configured backend and the agent's allowed providers."""
+        primary = f"{primary_llm.provider}:{config.model}"
+        candidates = {primary: primary_llm}
+        
+        for allowed in routing.get("allowed_providers") or []:
+            if isinstance(allowed, str):
+                allowed = {"provider": allowed}
+            try:
+                provider = LLMProvider(allowed["provider"])
+                candidate_config = LLMConfig(
+                    provider=provider,
+                    model=allowed.get("model") or model_for_provider(provider, config),
+                    temperature=config.temperature,
+                    max_tokens=config.max_tokens
+                )
+                candidate = LLMFactory._build_agent_llm(
+                    candidate_config, structured_output_model, use_cache=False, agent_name=agent_name
+                )
+            except Exception as e:
+                LLMFactory.logger.warning(f"Routing candidate {allowed} unavailable: {e}")
+                continue
+            candidates.setdefault(f"{candidate.provider}:{candidate_config.model}", candidate)
+        
+        LLMFactory.logger.info(f"Routing enabled across backends: {list(candidates)}")
+        # Routed outputs are cached independently of the backend that produced them
+        _, _, temperature, max_tokens, schema_key = get_llm_client_registry().runnable_key(
+            config, structured_output_model
+        )
+        return RoutedLLM(
+            candidates, primary, get_provider_router(),
+            response_cache=get_response_cache() if use_cache else None,
+            output_schema=structured_output_model,
+            cache_key_parts=("routed", temperature, max_tokens, schema_key),
+            max_attempts=routing.get("max_attempts", 2)
+        )
+
+    @staticmethod
+    def _create_hedger(config: LLMConfig, structured_output_model: type,
+                       hedging: Optional[Dict[str, Any]],
+                       agent_name: Optional[str] = None) -> Optional[HedgedCaller]:
+        """
+        Build the hedge for an agent from its `hedging` settings; None if disabled or misconfigured.
+
+        The secondary's circuit is checked per call, so a pooled agent resumes
+        hedging once the secondary provider recovers.
+        """
+        if not hedging or not hedging.get("enabled", False):
+            return None
+        
+        try:
+            provider = LLMProvider(hedging["provider"])
+            secondary_config = LLMConfig(
+                provider=provider,
+                model=hedging.get("model") or model_for_provider(provider, config),
+                temperature=config.temperature,
+                max_tokens=config.max_tokens
+            )
+            secondary = LLMFactory.create_llm(
+                secondary_config, structured_output_model, use_cache=False, agent_name=agent_name
+            )
+        except Exception as e:
+            LLMFactory.logger.warning(f"Hedging disabled, secondary provider could not be built: {e}")
+            return None
+        
+        LLMFactory.logger.info(f"Hedging enabled with secondary {secondary_config.provider.value}/{secondary_config.model}")
+        return HedgedCaller(
+            secondary,
+            percentile=hedging.get("percentile", 95),
+            min_samples=hedging.get("min_samples", 20),
+            default_delay_seconds=hedging.get("default_delay_seconds", 20),
+            max_hedge_ratio=hedging.get("max_hedge_ratio", 0.1)
+        )
+
 class BaseAgent(ABC):
     """Base class for all agents in the multi-agent system."""
     
@@ -60,17 +193,35 @@ class BaseAgent(ABC):
         self.agent_name = agent_name
         self.llm_config = llm_config
         self.logger = get_logger(f"{__name__}.{agent_name}")
-        self.stream_manager = stream_manager
-        self._streaming_enabled = stream_manager is not None
+        self._stream_manager = stream_manager
         
         self.logger.info(f"Initializing {agent_name} agent")
-        self.llm = LLMFactory.create_llm(llm_config)
+        agent_settings = get_agent_settings(agent_name)
+        self.llm = LLMFactory.create_llm(
+            llm_config, structured_output_model,
+            use_cache=agent_settings.get("cache", True),
+            hedging=agent_settings.get("hedging"),
+            routing=agent_settings.get("routing"),
+            agent_name=agent_name
+        )
         if structured_output_model is not None:
-            self.llm = self.llm.with_structured_output(structured_output_model)
             self.logger.info(f"Agent {agent_name} configured with structured output: {structured_output_model.__name__}")
         
         self.logger.info(f"Successfully initialized {agent_name} agent (streaming: {self._streaming_enabled})")
     
+    @property
+    def stream_manager(self) -> Optional['StreamManager']:
+        """The agent's own stream manager, else the one set for the current run."""
+        return self._stream_manager or _current_stream_manager.get()
+    
+    @stream_manager.setter
+    def stream_manager(self, stream_manager: Optional['StreamManager']) -> None:
+        self._stream_manager = stream_manager
+    
+    @property
+    def _streaming_enabled(self) -> bool:
+        return self.stream_manager is not None
+    
     @abstractmethod
     def execute(self, state: MultiAgentInterviewState) -> MultiAgentInterviewState:
         """Execute the agent's logic. Must be implemented by subclasses."""
@@ -120,9 +271,9 @@ class BaseAgent(ABC):
                     self.logger.error(f"Failed to run streaming event in thread: {e}")
                     return None
             
-            # Run in thread pool to avoid blocking
+            # Run in thread pool to avoid blocking; carry over context variables
             with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(run_in_thread)
+                future = executor.submit(contextvars.copy_context().run, run_in_thread)
                 return future.result(timeout=1.0)  # 1 second timeout
                 
         except Exception as e:
@@ -158,10 +309,27 @@ class BaseAgent(ABC):
         if self._streaming_enabled:
             self._ensure_async_context(self._stream_error(error, details))
     
+    def stream_result_sync(self, state: MultiAgentInterviewState, since: int = 0) -> None:
+        """Emit the completion or error event for the agent's latest result recorded after `since`."""
+        results = state["agent_results"][since:]
+        result = next((r for r in reversed(results) if r.agent_name == self.agent_name), None)
+        if result is None:
+            return
+        if result.success:
+            self.stream_complete_sync(f"{self.agent_name} completed successfully")
+        else:
+            self.stream_error_sync(result.error_message or f"{self.agent_name} failed")
+    
     def _record_result(self, state: MultiAgentInterviewState, 
                       success: bool, output_data: Dict[str, Any] = None, 
-                      error_message: str = None, execution_time: float = 0.0):
-        """Record agent execution result in the state."""
+                      error_message: str = None, execution_time: float = 0.0,
+                      error: Optional[BaseException] = None):
+        """
+        Record agent execution result in the state.
+        
+        For a failure, `error` marks whether it was a transient provider error
+        (`metadata["transient_error"]`), i.e. whether a later retry may succeed.
+        """
         result = AgentResult(
             agent_name=self.agent_name,
             execution_time=execution_time,
@@ -174,6 +342,11 @@ class BaseAgent(ABC):
                 "timestamp": time.time()
             }
         )
+        if not success:
+            result.metadata["transient_error"] = error is not None and is_transient_error(error)
+        usage_tracker = get_current_usage_tracker()
+        if usage_tracker is not None:
+            result.metadata["usage"] = usage_tracker.summary(self.agent_name)
         state["agent_results"].append(result)
         state["current_agent"] = self.agent_name if success else None
     
@@ -268,7 +441,8 @@ class BaseAgent(ABC):
                 state,
                 success=False,
                 error_message=error_message,
-                execution_time=execution_time
+                execution_time=execution_time,
+                error=e
             )
             
             return state
@@ -8,6 +8,9 @@ from app.services.qgen.models.schemas import (
     ProcessingStage, MultiAgentInterviewState, LLMConfig,
     QuestionType, create_initial_state, LLMProvider, ExpectedResponseOutput, ScoringRubric
 )
+from app.services.qgen.utils.concurrency import get_max_concurrency, run_bounded
+from app.services.qgen.stores.question_bank import get_question_bank
+from app.services.qgen.stores.skill_index import skill_key
 from app.logger import get_logger
 
 if TYPE_CHECKING:
@@ -52,21 +55,25 @@ class ExpectedResponseAgent(BaseAgent):
             # Stream thinking about strategy
             self.stream_thinking_sync(f"Generating comprehensive response guidelines for {len(approved_questions)} approved questions...")
             
-            # Generate expected responses for each approved question
-            expected_responses = []
+            # Index evaluations and skills once instead of scanning per question
+            evaluations_by_id = {e.question_id: e for e in question_evaluations}
+            skills_by_key = {skill_key(s.skill_name): s for s in extracted_skills}
             total_questions = len(approved_questions)
             
-            for i, question in enumerate(approved_questions, 1):
+            def generate(indexed_question):
+                i, question = indexed_question
                 self.stream_thinking_sync(f"Creating response guidelines {i}/{total_questions} for: {question.question_text[:80]}...")
-                
-                # Find the evaluation for this question
-                evaluation = next((e for e in question_evaluations if e.question_id == question.question_id), None)
-                
-                # Find relevant skill
-                relevant_skill = next((s for s in extracted_skills if s.skill_name == question.targeted_skill), None)
-                
-                expected_response = self._generate_expected_response(question, relevant_skill, evaluation, i, total_questions)
-                expected_responses.append(expected_response)
+                return self._generate_expected_response(
+                    question,
+                    skills_by_key.get(skill_key(question.targeted_skill)),
+                    evaluations_by_id.get(question.question_id),
+                    i, total_questions
+                )
+            
+            # Generate expected responses concurrently; each call falls back on its own
+            max_workers = get_max_concurrency(self.llm_config.provider.value)
+            self.logger.info(f"Generating {total_questions} expected responses with concurrency {max_workers}")
+            expected_responses = run_bounded(generate, enumerate(approved_questions, 1), max_workers)
             
             # Update state
             state["expected_responses"] = expected_responses
@@ -107,7 +114,8 @@ class ExpectedResponseAgent(BaseAgent):
                 state,
                 success=False,
                 error_message=error_msg,
-                execution_time=execution_time
+                execution_time=execution_time,
+                error=e
             )
         
         return state
@@ -116,8 +124,34 @@ class ExpectedResponseAgent(BaseAgent):
                                   skill: ExtractedSkill, 
                                   evaluation: QuestionEvaluation,
                                   response_index: int = 1,
-                                  total_responses: int = 1) -> ExpectedResponse:
-        """Generate comprehensive expected response for a single question."""
+                                  total_responses: Optional[int] = 1) -> ExpectedResponse:
+        """
+        Generate comprehensive expected response for a single question.
+        
+        `total_responses` is None when the total is not known yet (pipelined mode).
+        """
+        
+        # Question bank questions keep their stored expected response
+        bank = get_question_bank()
+        entry = bank.get(question.question_id) if bank else None
+        if entry is not None:
+            expected_response = entry.expected_response.model_copy(update={"question_id": question.question_id})
+            if self.stream_manager:
+                self._ensure_async_context(self.stream_manager.emit_response_generated(
+                    question.question_id,
+                    {
+                        "question_id": question.question_id,
+                        "key_concepts_count": len(expected_response.key_concepts_required),
+                        "good_indicators_count": len(expected_response.good_answer_indicators),
+                        "red_flags_count": len(expected_response.red_flags),
+                        "follow_up_questions_count": len(expected_response.follow_up_questions),
+                        "has_scoring_rubric": expected_response.scoring_rubric is not None,
+                        "response_index": response_index,
+                        "total_responses": total_responses,
+                        "from_question_bank": True
+                    }
+                ))
+            return expected_response
         
         system_prompt = """You are an expert technical interviewer creating detailed guidance for interviewers.
         Your job is to provide comprehensive expected responses that help interviewers:
@@ -243,6 +277,7 @@ class ExpectedResponseAgent(BaseAgent):
             
         except Exception as e:
             # Create fallback expected response
+            self.logger.error(f"Expected response generation failed for {question.question_id}: {str(e)}")
             fallback_response = self._create_fallback_expected_response(question, skill)
             
             # Stream fallback response generated event
@@ -1,4 +1,3 @@
-import json
 import time
 from typing import List, Dict, Optional, TYPE_CHECKING
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
@@ -8,11 +7,56 @@ from app.services.qgen.models.schemas import (
     ProcessingStage, MultiAgentInterviewState, LLMConfig,
     QuestionType, create_initial_state, LLMProvider, QuestionEvaluationOutput
 )
+from app.services.qgen.utils.settings import get_agent_settings
+from app.services.qgen.utils.prompt_budget import compact_json
+from app.services.qgen.stores.question_bank import get_question_bank
+from app.services.qgen.stores.skill_index import skill_key
 from app.logger import get_logger
 
 if TYPE_CHECKING:
     from app.services.qgen.streaming.stream_manager import StreamManager
 
+EVALUATION_SYSTEM_PROMPT = """You are an expert technical interview evaluator. Your job is to assess 
+        the quality of technical interview questions against strict criteria.
+        
+        EVALUATION CRITERIA:
+        
+        1. TECHNICAL DEPTH (1-5):
+           - 1: Surface level, tests only basic knowledge
+           - 2: Shallow technical understanding
+           - 3: Moderate technical depth
+           - 4: Deep technical concepts
+           - 5: Very deep, tests mathematical foundations and internals
+        
+        2. RELEVANCE (1-5):
+           - 1: Not relevant to candidate's experience
+           - 2: Loosely related
+           - 3: Somewhat relevant
+           - 4: Highly relevant to their background
+           - 5: Perfectly tailored to their specific experience
+        
+        3. DIFFICULTY APPROPRIATENESS (1-5):
+           - 1: Too easy/hard for candidate's level
+           - 2: Somewhat inappropriate difficulty
+           - 3: Acceptable difficulty level
+           - 4: Well-matched to experience level
+           - 5: Perfect difficulty calibration
+        
+        4. NON-GENERIC SCORE (1-5):
+           - 1: Very generic, could ask any candidate
+           - 2: Mostly generic with some specifics
+           - 3: Moderately specific
+           - 4: Highly specific to candidate
+           - 5: Completely tailored, couldn't ask others
+        
+        APPROVAL CRITERIA:
+        - Technical depth >= 3
+        - Relevance >= 3
+        - Difficulty appropriateness >= 3
+        - Non-generic score >= 3
+        - Overall quality >= 3"""
+
+
 class QuestionEvaluationAgent(BaseAgent):
     """
     Agent 3: Evaluates the quality and depth of generated technical questions.
@@ -50,20 +94,14 @@ class QuestionEvaluationAgent(BaseAgent):
             # Stream thinking about evaluation strategy
             self.stream_thinking_sync(f"Analyzing {len(generated_questions)} questions for technical depth and relevance...")
             
-            # Evaluate each question
-            evaluations = []
-            approved_questions = []
-            total_questions = len(generated_questions)
+            # Evaluate questions (batched per skill when enabled)
+            evaluations = self.evaluate_questions(generated_questions, extracted_skills)
             
-            for i, question in enumerate(generated_questions, 1):
-                self.stream_thinking_sync(f"Evaluating question {i}/{total_questions}: {question.question_text[:80]}...")
-                
-                evaluation = self._evaluate_question(question, extracted_skills, i, total_questions)
-                evaluations.append(evaluation)
-                
-                # Approve question if it meets quality criteria
-                if evaluation.approved:
-                    approved_questions.append(question)
+            # Approve questions that meet quality criteria
+            approved_questions = [
+                question for question, evaluation in zip(generated_questions, evaluations)
+                if evaluation.approved
+            ]
             
             # Update state
             state["question_evaluations"] = evaluations
@@ -110,11 +148,106 @@ class QuestionEvaluationAgent(BaseAgent):
                 state,
                 success=False,
                 error_message=error_msg,
-                execution_time=execution_time
+                execution_time=execution_time,
+                error=e
             )
         
         return state
     
+    def evaluate_questions(self, questions: List[TechnicalQuestion],
+                           extracted_skills: List[ExtractedSkill],
+                           index_offset: int = 0,
+                           total_questions: Optional[int] = None) -> List[QuestionEvaluation]:
+        """
+        Evaluate questions, returning evaluations in the same order.
+
+        With `qgen.agents.question_evaluation.batch_size` > 1, questions are
+        grouped by targeted skill and sent K per call; any question missing
+        from a batch response falls back to a single-question call.
+        """
+        total_questions = total_questions or len(questions)
+        
+        # Question bank questions keep their stored evaluation
+        banked = self._banked_evaluations(questions)
+        if banked:
+            fresh = [question for question in questions if question.question_id not in banked]
+            fresh_evaluations = iter(
+                self.evaluate_questions(fresh, extracted_skills, index_offset, total_questions) if fresh else []
+            )
+            evaluations = []
+            for i, question in enumerate(questions, index_offset + 1):
+                if question.question_id in banked:
+                    self._emit_evaluation_result(question, banked[question.question_id], i, total_questions)
+                    evaluations.append(banked[question.question_id])
+                else:
+                    evaluations.append(next(fresh_evaluations))
+            return evaluations
+        
+        batch_size = get_agent_settings(self.agent_name).get("batch_size", 1)
+        
+        if batch_size <= 1:
+            evaluations = []
+            for i, question in enumerate(questions, index_offset + 1):
+                self.stream_thinking_sync(f"Evaluating question {i}/{total_questions}: {question.question_text[:80]}...")
+                evaluations.append(self._evaluate_question(question, extracted_skills, i, total_questions))
+            return evaluations
+        
+        self.stream_thinking_sync(f"Evaluating {len(questions)} questions in batches of up to {batch_size} per skill...")
+        batch_evaluator = BatchQuestionEvaluator(self.llm, batch_size=batch_size, logger=self.logger)
+        batch_results = batch_evaluator.evaluate_all(questions, extracted_skills)
+        
+        evaluations = []
+        for i, question in enumerate(questions, index_offset + 1):
+            evaluation = batch_results.get(question.question_id)
+            if evaluation is None:
+                self.logger.info(f"Question {question.question_id} missing from batch response, evaluating individually")
+                evaluation = self._evaluate_question(question, extracted_skills, i, total_questions)
+            else:
+                self._emit_evaluation_result(question, evaluation, i, total_questions)
+            evaluations.append(evaluation)
+        
+        self.logger.info(f"Batch evaluation covered {len(batch_results)}/{len(questions)} questions")
+        return evaluations
+    
+    @staticmethod
+    def _banked_evaluations(questions: List[TechnicalQuestion]) -> Dict[str, QuestionEvaluation]:
+        """Stored evaluations of the question bank questions among `questions`, by question id."""
+        bank = get_question_bank()
+        if bank is None:
+            return {}
+        evaluations = {}
+        for question in questions:
+            entry = bank.get(question.question_id)
+            if entry is not None:
+                evaluations[question.question_id] = entry.evaluation.model_copy(update={"question_id": question.question_id})
+        return evaluations
+    
+    def _emit_evaluation_result(self, question: TechnicalQuestion, evaluation: QuestionEvaluation,
+                                question_index: int, total_questions: int,
+                                is_fallback: bool = False) -> None:
+        """Stream an evaluation result if streaming is enabled."""
+        if not self.stream_manager:
+            return
+        
+        evaluation_data = {
+            "question_id": question.question_id,
+            "technical_depth_score": evaluation.technical_depth_score,
+            "relevance_score": evaluation.relevance_score,
+            "difficulty_appropriateness": evaluation.difficulty_appropriateness,
+            "non_generic_score": evaluation.non_generic_score,
+            "overall_quality": evaluation.overall_quality,
+            "approved": evaluation.approved,
+            "feedback": evaluation.feedback,
+            "question_index": question_index,
+            "total_questions": total_questions
+        }
+        if is_fallback:
+            evaluation_data["is_fallback"] = True
+        
+        self._ensure_async_context(self.stream_manager.emit_evaluation_result(
+            question.question_id, evaluation_data
+        ))
+    
     def _evaluate_question(self, question: TechnicalQuestion, 
                           extracted_skills: List[ExtractedSkill],
                           question_index: int = 1,
@@ -122,11 +255,8 @@ class QuestionEvaluationAgent(BaseAgent):
         """Evaluate a single question for quality and appropriateness."""
         
         # Find the relevant skill for this question
-        relevant_skill = None
-        for skill in extracted_skills:
-            if skill.skill_name == question.targeted_skill:
-                relevant_skill = skill
-                break
+        target = skill_key(question.targeted_skill)
+        relevant_skill = next((skill for skill in extracted_skills if skill_key(skill.skill_name) == target), None)
         
         if not relevant_skill:
             # If we can't find the skill, create a basic evaluation
@@ -141,45 +271,7 @@ class QuestionEvaluationAgent(BaseAgent):
                 approved=False
             )
         
-        system_prompt = """You are an expert technical interview evaluator. Your job is to assess 
-        the quality of technical interview questions against strict criteria.
-        
-        EVALUATION CRITERIA:
-        
-        1. TECHNICAL DEPTH (1-5):
-           - 1: Surface level, tests only basic knowledge
-           - 2: Shallow technical understanding
-           - 3: Moderate technical depth
-           - 4: Deep technical concepts
-           - 5: Very deep, tests mathematical foundations and internals
-        
-        2. RELEVANCE (1-5):
-           - 1: Not relevant to candidate's experience
-           - 2: Loosely related
-           - 3: Somewhat relevant
-           - 4: Highly relevant to their background
-           - 5: Perfectly tailored to their specific experience
-        
-        3. DIFFICULTY APPROPRIATENESS (1-5):
-           - 1: Too easy/hard for candidate's level
-           - 2: Somewhat inappropriate difficulty
-           - 3: Acceptable difficulty level
-           - 4: Well-matched to experience level
-           - 5: Perfect difficulty calibration
-        
-        4. NON-GENERIC SCORE (1-5):
-           - 1: Very generic, could ask any candidate
-           - 2: Mostly generic with some specifics
-           - 3: Moderately specific
-           - 4: Highly specific to candidate
-           - 5: Completely tailored, couldn't ask others
-        
-        APPROVAL CRITERIA:
-        - Technical depth >= 3
-        - Relevance >= 3
-        - Difficulty appropriateness >= 3
-        - Non-generic score >= 3
-        - Overall quality >= 3"""
+        system_prompt = EVALUATION_SYSTEM_PROMPT
         
         human_prompt = f"""
         Evaluate this technical interview question:
@@ -233,22 +325,7 @@ class QuestionEvaluationAgent(BaseAgent):
             evaluation = response.evaluations[0]
             
             # Stream evaluation result
-            if self.stream_manager:
-                self._ensure_async_context(self.stream_manager.emit_evaluation_result(
-                    question.question_id,
-                    {
-                        "question_id": question.question_id,
-                        "technical_depth_score": evaluation.technical_depth_score,
-                        "relevance_score": evaluation.relevance_score,
-                        "difficulty_appropriateness": evaluation.difficulty_appropriateness,
-                        "non_generic_score": evaluation.non_generic_score,
-                        "overall_quality": evaluation.overall_quality,
-                        "approved": evaluation.approved,
-                        "feedback": evaluation.feedback,
-                        "question_index": question_index,
-                        "total_questions": total_questions
-                    }
-                ))
+            self._emit_evaluation_result(question, evaluation, question_index, total_questions)
             
             return evaluation
         except Exception as e:
@@ -256,23 +333,7 @@ class QuestionEvaluationAgent(BaseAgent):
             fallback_eval = self._create_fallback_evaluation(question, relevant_skill)
             
             # Stream fallback evaluation result
-            if self.stream_manager:
-                self._ensure_async_context(self.stream_manager.emit_evaluation_result(
-                    question.question_id,
-                    {
-                        "question_id": question.question_id,
-                        "technical_depth_score": fallback_eval.technical_depth_score,
-                        "relevance_score": fallback_eval.relevance_score,
-                        "difficulty_appropriateness": fallback_eval.difficulty_appropriateness,
-                        "non_generic_score": fallback_eval.non_generic_score,
-                        "overall_quality": fallback_eval.overall_quality,
-                        "approved": fallback_eval.approved,
-                        "feedback": fallback_eval.feedback,
-                        "question_index": question_index,
-                        "total_questions": total_questions,
-                        "is_fallback": True
-                    }
-                ))
+            self._emit_evaluation_result(question, fallback_eval, question_index, total_questions, is_fallback=True)
             
             return fallback_eval
     
@@ -326,50 +387,73 @@ class QuestionEvaluationAgent(BaseAgent):
 class BatchQuestionEvaluator:
     """Evaluates multiple questions in a single LLM call for efficiency."""
     
-    def __init__(self, llm):
+    def __init__(self, llm, batch_size: int = 5, logger=None):
         self.llm = llm
+        self.batch_size = max(1, batch_size)
+        self.logger = logger or get_logger(__name__)
+    
+    def evaluate_all(self, questions: List[TechnicalQuestion],
+                     skills: List[ExtractedSkill]) -> Dict[str, QuestionEvaluation]:
+        """
+        Evaluate questions grouped by targeted skill, `batch_size` per call.
+        
+        Returns evaluations keyed by question_id. Questions without a matching
+        skill, or missing from a batch response, are left out for the caller
+        to handle.
+        """
+        skills_by_key = {skill_key(skill.skill_name): skill for skill in skills}
+        
+        questions_by_skill: Dict[str, List[TechnicalQuestion]] = {}
+        for question in questions:
+            key = skill_key(question.targeted_skill)
+            if key in skills_by_key:
+                questions_by_skill.setdefault(key, []).append(question)
+        
+        results: Dict[str, QuestionEvaluation] = {}
+        for key, skill_questions in questions_by_skill.items():
+            skill = skills_by_key[key]
+            for start in range(0, len(skill_questions), self.batch_size):
+                batch = skill_questions[start:start + self.batch_size]
+                try:
+                    for evaluation in self.evaluate_batch(batch, skill):
+                        results[evaluation.question_id] = evaluation
+                except Exception as e:
+                    self.logger.error(f"Batch evaluation failed for skill {skill.skill_name} ({len(batch)} questions): {e}")
+        
+        return results
     
     def evaluate_batch(self, questions: List[TechnicalQuestion], 
-                      skills: List[ExtractedSkill]) -> List[QuestionEvaluation]:
-        """Evaluate multiple questions in a single LLM call."""
+                      skill: ExtractedSkill) -> List[QuestionEvaluation]:
+        """Evaluate multiple questions targeting the same skill in a single LLM call."""
         
         # Prepare batch evaluation prompt
-        questions_data = []
-        for q in questions:
-            # Find relevant skill
-            relevant_skill = next((s for s in skills if s.skill_name == q.targeted_skill), None)
-            
-            question_data = {
-                "id": q.question_id,
+        questions_data = [
+            {
+                "question_id": q.question_id,
                 "text": q.question_text,
-                "type": q.question_type,
+                "type": q.question_type.value,
                 "difficulty": q.difficulty_level,
-                "skill": q.targeted_skill,
                 "rationale": q.rationale,
-                "skill_context": {
-                    "experience_level": relevant_skill.experience_level if relevant_skill else "Unknown",
-                    "evidence": relevant_skill.evidence_from_text if relevant_skill else "",
-                    "confidence": relevant_skill.confidence_score if relevant_skill else 1
-                }
+                "tags": q.tags
             }
-            questions_data.append(question_data)
-        
-        system_prompt = """You are evaluating multiple technical interview questions for quality.
-        For each question, provide scores (1-5) for:
-        - Technical depth
-        - Relevance to candidate 
-        - Difficulty appropriateness
-        - Non-generic specificity
-        - Overall quality
-        
-        Be strict - only approve questions that truly test deep understanding."""
+            for q in questions
+        ]
         
         human_prompt = f"""
-        Evaluate these {len(questions_data)} questions:
+        Evaluate these {len(questions_data)} technical interview questions. They all target the same skill.
         
-        {json.dumps(questions_data, indent=2)}
+        CANDIDATE'S SKILL CONTEXT:
+        Skill: {skill.skill_name}
+        Experience Level: {skill.experience_level}
+        Confidence Score: {skill.confidence_score}/5
+        Evidence: {skill.evidence_from_text}
+        Context: {skill.context}
+        Technologies: {skill.specific_technologies}
+        
+        QUESTIONS:
+        {compact_json(questions_data)}
         
-        Return evaluations in JSON format:
+        Return exactly one evaluation per question, using the question_id given above:
         {{
             "evaluations": [
                 {{
@@ -380,15 +464,22 @@ class BatchQuestionEvaluator:
                     "non_generic_score": 1-5,
                     "overall_quality": 1-5,
                     "approved": true/false,
-                    "feedback": "brief feedback"
+                    "feedback": "what could be improved"
                 }}
             ]
         }}
+        
+        Be strict in your evaluation. Only approve questions that truly test deep technical understanding
+        and are specifically tailored to the candidate's experience.
         """
         
-        # This would implement the actual batch evaluation
-        # For now, return individual evaluations
-        return []
+        response = self.llm.invoke([
+            SystemMessage(content=EVALUATION_SYSTEM_PROMPT),
+            HumanMessage(content=human_prompt)
+        ])
+        
+        requested_ids = {q.question_id for q in questions}
+        return [e for e in response.evaluations if e.question_id in requested_ids]
 
 # Testing the Question Evaluation Agent
 def test_question_evaluation_agent():
@@ -1,18 +1,52 @@
-import json
+import threading
 import time
-from typing import List, Dict, Optional, TYPE_CHECKING
+from typing import List, Dict, Optional, Tuple, TYPE_CHECKING
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 from app.services.qgen.agents.base_agent import BaseAgent
+from app.services.qgen.agents.skill_extraction_agent import normalize_skill_name
 from app.services.qgen.models.schemas import (
     TechnicalQuestion, QuestionType, ProcessingStage,
     MultiAgentInterviewState, LLMConfig, ExtractedSkill, InputScenario,
     create_initial_state, LLMProvider, QuestionGenerationOutput
 )
+from app.services.qgen.utils.concurrency import get_max_concurrency, run_bounded
+from app.services.qgen.utils.prompt_budget import compact_json
+from app.services.qgen.utils.question_dedup import DuplicateMerge, get_question_deduplicator
+from app.services.qgen.utils.settings import get_agent_settings
+from app.services.qgen.utils.structured_repair import coerce_to_model, collect_repairs
+from app.services.qgen.stores.question_bank import get_question_bank
 from app.logger import get_logger
 
 if TYPE_CHECKING:
     from app.services.qgen.streaming.stream_manager import StreamManager
 
+# Generation modes (qgen.agents.question_generation.generation_mode)
+LLM_MODE = "llm"
+HYBRID_MODE = "hybrid"
+
+# Question difficulty levels that suit a candidate's experience level
+DIFFICULTY_BY_EXPERIENCE = {
+    "Beginner": (1, 2),
+    "Intermediate": (2, 3),
+    "Advanced": (3, 4),
+    "Expert": (4, 5)
+}
+
+class QuestionNumbering:
+    """Thread-safe question numbering shared by concurrent category calls."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._count = 0
+    
+    def reserve(self, count: int) -> int:
+        """Reserve `count` consecutive numbers; returns the first one."""
+        with self._lock:
+            first_number = self._count + 1
+            self._count += count
+            return first_number
+
+
 class QuestionGenerationAgent(BaseAgent):
     """
     Agent 2: Generates deep, technical interview questions based on extracted skills.
@@ -28,6 +62,10 @@ class QuestionGenerationAgent(BaseAgent):
         super().__init__("QuestionGenerationAgent", llm_config, 
                         structured_output_model=QuestionGenerationOutput,
                         stream_manager=stream_manager)
+        settings = get_agent_settings(self.agent_name)
+        self.stream_questions = (settings.get("streaming") or {}).get("enabled", True)
+        self.generation_mode = settings.get("generation_mode", LLM_MODE)
+        self.bank_settings = settings.get("question_bank") or {}
     
     def execute(self, state: MultiAgentInterviewState) -> MultiAgentInterviewState:
         """Generate technical questions for all extracted skills."""
@@ -59,14 +97,24 @@ class QuestionGenerationAgent(BaseAgent):
             
             self.stream_thinking_sync(f"Generating questions across {total_categories} skill categories...")
             
-            for category_index, (category_name, skills) in enumerate(skills_by_category.items(), 1):
+            # Fan out one LLM call per category, bounded per provider
+            numbering = QuestionNumbering()
+            
+            def generate(indexed_category):
+                category_index, (category_name, skills) = indexed_category
                 self.stream_thinking_sync(f"Processing category {category_index}/{total_categories}: {category_name} ({len(skills)} skills)")
-                
-                category_questions = self._generate_questions_for_category(
-                    category_name, skills, input_scenario, category_index, total_categories
+                return self._generate_questions_for_category(
+                    category_name, skills, input_scenario, category_index, total_categories, numbering
                 )
+            
+            max_workers = get_max_concurrency(self.llm_config.provider.value)
+            self.logger.info(f"Generating questions for {total_categories} categories with concurrency {max_workers}")
+            for category_questions in run_bounded(generate, enumerate(skills_by_category.items(), 1), max_workers):
                 all_questions.extend(category_questions)
             
+            # Drop near-duplicates across categories before they are evaluated
+            all_questions, merges = self.deduplicate_questions(all_questions, extracted_skills)
+            
             # Update state
             state["generated_questions"] = all_questions
             state["processing_stage"] = ProcessingStage.QUESTIONS_GENERATED
@@ -81,7 +129,8 @@ class QuestionGenerationAgent(BaseAgent):
                 success=True,
                 output_data={
                     "questions_generated": total_questions,
-                    "categories_covered": categories_covered
+                    "categories_covered": categories_covered,
+                    "duplicates_removed": [merge.to_dict() for merge in merges]
                 },
                 execution_time=execution_time
             )
@@ -106,11 +155,23 @@ class QuestionGenerationAgent(BaseAgent):
                 state,
                 success=False,
                 error_message=error_msg,
-                execution_time=execution_time
+                execution_time=execution_time,
+                error=e
             )
         
         return state
     
+    def deduplicate_questions(self, questions: List[TechnicalQuestion], skills: List[ExtractedSkill],
+                              accepted: List[TechnicalQuestion] = ()) -> Tuple[List[TechnicalQuestion], List[DuplicateMerge]]:
+        """Remove near-duplicate questions (`qgen.question_dedup`); returns the kept questions and the merges."""
+        deduplicator = get_question_deduplicator()
+        if deduplicator is None:
+            return questions, []
+        kept, merges = deduplicator.deduplicate(questions, skills, accepted)
+        if merges:
+            self.stream_thinking_sync(f"Removed {len(merges)} near-duplicate questions before evaluation")
+        return kept, merges
+    
     def _group_skills_by_category(self, skills: List[ExtractedSkill]) -> Dict[str, List[ExtractedSkill]]:
         """Group skills by their categories."""
         skills_by_category = {}
@@ -127,8 +188,22 @@ class QuestionGenerationAgent(BaseAgent):
                                        skills: List[ExtractedSkill], 
                                        input_scenario: InputScenario,
                                        category_index: int = 1,
-                                       total_categories: int = 1) -> List[TechnicalQuestion]:
-        """Generate questions for a specific category of skills."""
+                                       total_categories: int = 1,
+                                       numbering: Optional['QuestionNumbering'] = None,
+                                       allow_reask: bool = True) -> List[TechnicalQuestion]:
+        """
+        Generate questions for a specific category of skills.
+
+        If the answer had to be repaired and lost questions on the way, only
+        the skills left without a question are asked for again (once). In
+        hybrid mode, skills with enough question bank questions take them
+        from the bank and only the remaining skills are sent to the LLM.
+        """
+        banked = []
+        if allow_reask and self.generation_mode == HYBRID_MODE:
+            banked, skills = self._questions_from_bank(category_name, skills, numbering)
+            if not skills:
+                return banked
         
         # Prepare skills context for the LLM
         skills_context = []
@@ -170,7 +245,7 @@ class QuestionGenerationAgent(BaseAgent):
         Generate deep technical interview questions for the {category_name} category.
         
         CANDIDATE'S SKILLS IN THIS CATEGORY:
-        {json.dumps(skills_context, indent=2)}
+        {compact_json(skills_context)}
         
         INPUT SCENARIO: {input_scenario.value}
         
@@ -205,54 +280,167 @@ class QuestionGenerationAgent(BaseAgent):
         Make each question specific to their experience and test deep technical understanding!
         """
         
+        messages = [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=human_prompt)
+        ]
+        
         try:
-            response = self.llm.invoke([
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=human_prompt)
-            ])
+            questions, complete = [], True
+            # Emit each question as soon as it is complete in the token stream
+            if self.stream_questions and self.stream_manager and hasattr(self.llm, "stream_items"):
+                questions, complete = self._stream_questions_for_category(messages, category_name, numbering)
             
-            # Stream generated questions
-            questions = response.questions
-            for i, question in enumerate(questions):
-                if self.stream_manager:
-                    self._ensure_async_context(self.stream_manager.emit_question_generated(
-                        {
-                            "question_id": question.question_id,
-                            "question_text": question.question_text,
-                            "question_type": question.question_type.value,
-                            "difficulty_level": question.difficulty_level,
-                            "targeted_skill": question.targeted_skill,
-                            "category": category_name,
-                            "estimated_time_minutes": question.estimated_time_minutes
-                        },
-                        i + 1,  # question_number (1-based)
-                        len(questions)  # total_questions
-                    ))
+            if not questions:
+                with collect_repairs() as repairs:
+                    response = self.llm.invoke(messages)
+                questions = response.questions
+                complete = not any(repair.incomplete for repair in repairs)
+                
+                # Stream generated questions
+                self._emit_generated_questions(questions, category_name, numbering)
             
-            return questions
+            if not complete and allow_reask:
+                questions = questions + self._reask_missing_skills(
+                    category_name, skills, questions, input_scenario, category_index, total_categories, numbering
+                )
+            return banked + questions
         except Exception as e:
             # Fallback: generate basic questions if LLM fails
+            self.logger.error(f"Question generation failed for category {category_name}: {str(e)}")
             fallback_questions = self._generate_fallback_questions(skills, category_name)
             
             # Stream fallback questions too
-            for i, question in enumerate(fallback_questions):
-                if self.stream_manager:
-                    self._ensure_async_context(self.stream_manager.emit_question_generated(
-                        {
-                            "question_id": question.question_id,
-                            "question_text": question.question_text,
-                            "question_type": question.question_type.value,
-                            "difficulty_level": question.difficulty_level,
-                            "targeted_skill": question.targeted_skill,
-                            "category": category_name,
-                            "estimated_time_minutes": question.estimated_time_minutes,
-                            "is_fallback": True
-                        },
-                        i + 1,  # question_number (1-based)
-                        len(fallback_questions)  # total_questions
-                    ))
+            self._emit_generated_questions(fallback_questions, category_name, numbering, is_fallback=True)
                     
-            return fallback_questions
+            return banked + fallback_questions
+    
+    def _questions_from_bank(self, category_name: str, skills: List[ExtractedSkill],
+                             numbering: Optional['QuestionNumbering'] = None
+                             ) -> Tuple[List[TechnicalQuestion], List[ExtractedSkill]]:
+        """
+        Take questions from the question bank for skills it covers.
+
+        A skill is covered when the bank has `questions_per_skill` questions of
+        at least `min_quality` at a difficulty suiting the skill's experience
+        level. Returns (banked questions, skills still to generate for).
+        """
+        bank = get_question_bank()
+        if bank is None:
+            return [], skills
+        
+        per_skill = int(self.bank_settings.get("questions_per_skill", 2))
+        min_quality = int(self.bank_settings.get("min_quality", 4))
+        banked, remaining = [], []
+        for skill in skills:
+            try:
+                entries = bank.find(
+                    skill.skill_name, DIFFICULTY_BY_EXPERIENCE.get(skill.experience_level, (1, 2, 3, 4, 5)),
+                    per_skill, min_quality
+                )
+            except Exception as e:
+                self.logger.warning(f"Question bank lookup failed for {skill.skill_name}: {e}")
+                entries = []
+            if len(entries) < per_skill:
+                remaining.append(skill)
+                continue
+            banked.extend(
+                entry.question.model_copy(update={
+                    "question_id": entry.question_id,
+                    "targeted_skill": skill.skill_name,
+                    "rationale": f"From the question bank ({skill.experience_level} {skill.skill_name}, "
+                                 f"rated {entry.evaluation.overall_quality}/5): {entry.question.rationale}"
+                })
+                for entry in entries
+            )
+        
+        if banked:
+            self.logger.info(
+                f"🏦 {category_name}: {len(banked)} questions from the question bank, "
+                f"{len(remaining)}/{len(skills)} skills left to generate"
+            )
+            self._emit_generated_questions(banked, category_name, numbering)
+        return banked, remaining
+    
+    def _reask_missing_skills(self, category_name: str, skills: List[ExtractedSkill],
+                              questions: List[TechnicalQuestion], input_scenario: InputScenario,
+                              category_index: int, total_categories: int,
+                              numbering: Optional['QuestionNumbering'] = None) -> List[TechnicalQuestion]:
+        """Ask again for the skills of an incomplete answer that got no question."""
+        covered = {normalize_skill_name(question.targeted_skill) for question in questions}
+        missing = [skill for skill in skills if normalize_skill_name(skill.skill_name) not in covered]
+        if not missing:
+            return []
+        self.logger.info(f"Re-asking for {len(missing)} {category_name} skills missing from an incomplete answer")
+        return self._generate_questions_for_category(
+            category_name, missing, input_scenario, category_index, total_categories, numbering, allow_reask=False
+        )
+    
+    def _stream_questions_for_category(self, messages: list, category_name: str,
+                                       numbering: Optional['QuestionNumbering'] = None
+                                       ) -> Tuple[List[TechnicalQuestion], bool]:
+        """
+        Generate questions with token streaming, validating and emitting each one as it closes.
+
+        Returns (questions, complete). Questions are [] if the stream failed
+        before the first question, so the caller can retry without streaming;
+        a stream cut short later keeps what arrived and is marked incomplete.
+        """
+        questions, complete = [], True
+        started = time.time()
+        try:
+            for item in self.llm.stream_items(messages, "questions"):
+                question = coerce_to_model(TechnicalQuestion, item)
+                if question is None:
+                    self.logger.warning(f"Skipping invalid streamed question in {category_name}: {item}")
+                    complete = False
+                    continue
+                if not questions:
+                    self.logger.info(f"⚡ First {category_name} question streamed after {time.time() - started:.2f}s")
+                questions.append(question)
+                self._emit_generated_questions([question], category_name, numbering)
+        except Exception as e:
+            if not questions:
+                self.logger.warning(f"Question streaming failed for {category_name}, retrying without streaming: {e}")
+                return [], True
+            self.logger.warning(f"Question stream for {category_name} ended early after {len(questions)} questions: {e}")
+            complete = False
+        return questions, complete
+    
+    def _emit_generated_questions(self, questions: List[TechnicalQuestion], category_name: str,
+                                  numbering: Optional['QuestionNumbering'] = None,
+                                  is_fallback: bool = False) -> None:
+        """
+        Stream generated questions, numbered across categories when `numbering` is given.
+        
+        Numbered questions carry no total: it is not known until every category is done.
+        """
+        if not self.stream_manager or not questions:
+            return
+        
+        if numbering is not None:
+            first_number, total_questions = numbering.reserve(len(questions)), None
+        else:
+            first_number, total_questions = 1, len(questions)
+        
+        for i, question in enumerate(questions):
+            question_data = {
+                "question_id": question.question_id,
+                "question_text": question.question_text,
+                "question_type": question.question_type.value,
+                "difficulty_level": question.difficulty_level,
+                "targeted_skill": question.targeted_skill,
+                "category": category_name,
+                "estimated_time_minutes": question.estimated_time_minutes
+            }
+            if is_fallback:
+                question_data["is_fallback"] = True
+            
+            self._ensure_async_context(self.stream_manager.emit_question_generated(
+                question_data,
+                first_number + i,  # question_number (1-based)
+                total_questions  # total_questions
+            ))
     
     def _generate_fallback_questions(self, skills: List[ExtractedSkill], category: str) -> List[TechnicalQuestion]:
         """Generate fallback questions if LLM generation fails."""
@@ -9,6 +9,7 @@ from app.services.qgen.models.schemas import (
     QuestionEvaluation, ProcessingStage, MultiAgentInterviewState, LLMConfig,
     InputScenario, LLMProvider, QuestionType, create_initial_state, ScoringRubric
 )
+from app.services.qgen.stores.skill_index import skill_key
 from app.logger import get_logger
 
 if TYPE_CHECKING:
@@ -123,7 +124,8 @@ class ReportAssemblyAgent(BaseAgent):
                 state,
                 success=False,
                 error_message=error_msg,
-                execution_time=execution_time
+                execution_time=execution_time,
+                error=e
             )
         
         return state
@@ -136,11 +138,13 @@ class ReportAssemblyAgent(BaseAgent):
         
         skill_assessments = []
         
-        # Group by targeted skill
+        # Group by targeted skill; spelling variants of a skill share one assessment
+        skills_by_key = {skill_key(s.skill_name): s for s in extracted_skills}
         skills_data = {}
         
         for question in approved_questions:
-            skill_name = question.targeted_skill
+            extracted_skill = skills_by_key.get(skill_key(question.targeted_skill))
+            skill_name = extracted_skill.skill_name if extracted_skill else question.targeted_skill
             if skill_name not in skills_data:
                 skills_data[skill_name] = {
                     "questions": [],
@@ -160,10 +164,7 @@ class ReportAssemblyAgent(BaseAgent):
             if evaluation:
                 skills_data[skill_name]["evaluations"].append(evaluation)
             
-            # Find extracted skill
-            if not skills_data[skill_name]["extracted_skill"]:
-                extracted_skill = next((s for s in extracted_skills if s.skill_name == skill_name), None)
-                skills_data[skill_name]["extracted_skill"] = extracted_skill
+            skills_data[skill_name]["extracted_skill"] = extracted_skill
         
         # Create SkillAssessment objects
         for skill_name, data in skills_data.items():
@@ -1,17 +1,29 @@
 import json
 import time
-from typing import List, Optional, TYPE_CHECKING
+from typing import Callable, Dict, List, Optional, TYPE_CHECKING
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 from app.services.qgen.agents.base_agent import BaseAgent
 from app.services.qgen.models.schemas import (
     ExtractedSkill, SkillCategory, ProcessingStage, 
     MultiAgentInterviewState, LLMConfig, InputScenario, create_initial_state, LLMProvider, SkillExtractionOutput
 )
+from app.services.qgen.utils.concurrency import get_max_concurrency, run_bounded
+from app.services.qgen.utils.prompt_budget import compact_text, count_tokens, get_prompt_budget
+from app.services.qgen.utils.settings import get_agent_settings
+from app.services.qgen.stores.jd_profile_store import get_jd_profile_store
+from app.services.qgen.stores.skill_index import category_key, get_skill_index, skill_key
 from app.logger import get_logger
 
 if TYPE_CHECKING:
     from app.services.qgen.streaming.stream_manager import StreamManager
 
+EXPERIENCE_LEVELS = ["Beginner", "Intermediate", "Advanced", "Expert"]
+
+
+def normalize_skill_name(name: str) -> str:
+    """Key used to detect the same skill across chunks and agents (see `stores.skill_index`)."""
+    return skill_key(name)
+
 class SkillExtractionAgent(BaseAgent):
     """
     Agent 1: Extracts technical skills from resume and/or job description using LLM.
@@ -48,16 +60,42 @@ class SkillExtractionAgent(BaseAgent):
             }
             self.stream_thinking_sync(scenario_msg.get(scenario, "Processing documents..."))
             
+            position_title = state["position_title"]
             if scenario == InputScenario.RESUME_ONLY:
-                results = self._extract_from_resume(state["resume_text"], state["position_title"])
+                results = self._map_reduce(
+                    self._chunk_document(state["resume_text"]),
+                    lambda chunk: self._extract_from_resume(chunk, position_title)
+                )
             elif scenario == InputScenario.JD_ONLY:
-                results = self._extract_from_job_description(state["job_description"], state["position_title"])
-            else:  # BOTH
-                results = self._extract_from_both(
-                    state["resume_text"], 
-                    state["job_description"], 
-                    state["position_title"]
+                results = self.get_jd_profile(state["job_description"], position_title)
+            elif get_jd_profile_store() is not None:
+                # BOTH with the JD profile cache: the JD profile is extracted once per JD,
+                # so each run only pays for the resume and a local merge
+                resume_text, jd_text = state["resume_text"], state["job_description"]
+                resume_results, jd_profile = run_bounded(
+                    lambda extract: extract(),
+                    [
+                        lambda: self._map_reduce(
+                            self._chunk_document(resume_text),
+                            lambda chunk: self._extract_from_resume(chunk, position_title)
+                        ),
+                        lambda: self.get_jd_profile(jd_text, position_title)
+                    ],
+                    2
                 )
+                results = self.merge_resume_with_jd_profile(resume_results, jd_profile)
+            else:  # BOTH - chunk the longer document, the other one accompanies every chunk
+                resume_text, jd_text = state["resume_text"], state["job_description"]
+                if count_tokens(resume_text) >= count_tokens(jd_text):
+                    results = self._map_reduce(
+                        self._chunk_document(resume_text),
+                        lambda chunk: self._extract_from_both(chunk, jd_text, position_title)
+                    )
+                else:
+                    results = self._map_reduce(
+                        self._chunk_document(jd_text),
+                        lambda chunk: self._extract_from_both(resume_text, chunk, position_title)
+                    )
             
             # Update state with extracted skills
             skills_count = len(results["skills"])
@@ -115,13 +153,168 @@ class SkillExtractionAgent(BaseAgent):
                 state, 
                 success=False, 
                 error_message=error_msg,
-                execution_time=execution_time
+                execution_time=execution_time,
+                error=e
             )
         
         return state
     
+    def _chunk_document(self, text: str) -> List[str]:
+        """
+        Split a long document into section-aligned chunks (`qgen.agents.skill_extraction.chunking`).
+
+        Returns the document as a single chunk when chunking is disabled or it
+        is shorter than `min_document_tokens`.
+        """
+        settings = get_agent_settings(self.agent_name).get("chunking") or {}
+        if not settings.get("enabled", False):
+            return [text]
+        
+        model = self.llm_config.model
+        compacted = compact_text(text)
+        if count_tokens(compacted, model) <= settings.get("min_document_tokens", 3000):
+            return [text]
+        
+        budget = get_prompt_budget()
+        chunks = budget.split_chunks(budget.drop_low_value(compacted), settings.get("chunk_tokens", 1500), model)
+        self.logger.info(f"Split document into {len(chunks)} chunks for parallel extraction")
+        return chunks
+    
+    def _map_reduce(self, chunks: List[str], extract: Callable[[str], dict]) -> dict:
+        """Extract skills from every chunk in parallel and merge the canonicalised results."""
+        if len(chunks) == 1:
+            results = [extract(chunks[0])]
+        else:
+            self.stream_thinking_sync(f"Extracting skills from {len(chunks)} document sections in parallel...")
+            max_workers = get_max_concurrency(self.llm_config.provider.value)
+            results = run_bounded(extract, chunks, max_workers)
+        # Merging also collapses skills that only differ in spelling ("Postgres" / "PostgreSQL")
+        return self.merge_extractions([self.canonicalize(result) for result in results])
+    
+    @staticmethod
+    def canonicalize(result: dict) -> dict:
+        """Map skill and category names to their canonical names (`qgen.skill_canonicalisation`)."""
+        index = get_skill_index()
+        if index is None:
+            return result
+        skills, categories = index.canonicalize_extraction(result["skills"], result["categories"])
+        return {**result, "skills": skills, "categories": categories}
+    
+    @staticmethod
+    def merge_extractions(results: List[dict]) -> dict:
+        """
+        Merge per-chunk extractions deterministically.
+        
+        Skills with the same normalised name are merged: the entry with the
+        highest confidence (then experience level, then evidence length) wins and
+        related technologies are unioned. Categories keep their first description
+        and the highest priority. Order follows first appearance across chunks.
+        """
+        def rank(skill: ExtractedSkill):
+            return (skill.confidence_score, EXPERIENCE_LEVELS.index(skill.experience_level), len(skill.evidence_from_text))
+        
+        skills: Dict[str, ExtractedSkill] = {}
+        categories: Dict[str, SkillCategory] = {}
+        for result in results:
+            for skill in result["skills"]:
+                key = normalize_skill_name(skill.skill_name)
+                current = skills.get(key)
+                if current is None:
+                    skills[key] = skill
+                    continue
+                best, other = (skill, current) if rank(skill) > rank(current) else (current, skill)
+                skills[key] = best.model_copy(update={
+                    "specific_technologies": list(dict.fromkeys(current.specific_technologies + skill.specific_technologies)),
+                    "years_of_experience": best.years_of_experience or other.years_of_experience
+                })
+            
+            for category in result["categories"]:
+                key = category_key(category.name)
+                current = categories.get(key)
+                if current is None:
+                    categories[key] = category
+                elif category.priority < current.priority:
+                    categories[key] = current.model_copy(update={"priority": category.priority})
+        
+        # Every skill's category must exist after the merge
+        for skill in skills.values():
+            key = category_key(skill.category)
+            if key not in categories:
+                categories[key] = SkillCategory(name=skill.category, description=f"{skill.category} skills", priority=3)
+        
+        return {"skills": list(skills.values()), "categories": list(categories.values())}
+    
+    def get_jd_profile(self, jd_text: str, position_title: str) -> dict:
+        """
+        Skills and categories of a job description, from the JD profile cache
+        (`qgen.jd_profile_cache`) when possible, extracted and stored otherwise.
+        """
+        store = get_jd_profile_store()
+        provider, model = self.llm_config.provider.value, self.llm_config.model
+        if store is not None:
+            cached = store.get(jd_text, position_title, provider, model)
+            if cached is not None:
+                self.stream_thinking_sync("Reusing the skill profile of this job description from a previous run")
+                return self.canonicalize(cached)
+        
+        results = self._map_reduce(
+            self._chunk_document(jd_text),
+            lambda chunk: self._extract_from_job_description(chunk, position_title)
+        )
+        if store is not None:
+            store.put(jd_text, position_title, provider, model, results["skills"], results["categories"])
+        return results
+    
+    @staticmethod
+    def merge_resume_with_jd_profile(resume: dict, jd_profile: dict) -> dict:
+        """
+        Combine a resume extraction with a JD profile without another LLM call.
+        
+        Skills found in both keep the resume entry (the candidate's evidence and
+        level) with the JD's related technologies added. JD skills missing from
+        the resume are kept as gaps, and resume-only skills as additional skills.
+        JD category priorities take precedence; categories only the resume
+        covers are ranked no higher than 4.
+        """
+        resume_skills = {normalize_skill_name(s.skill_name): s for s in resume["skills"]}
+        jd_skills = {normalize_skill_name(s.skill_name): s for s in jd_profile["skills"]}
+        
+        skills: List[ExtractedSkill] = []
+        for key, jd_skill in jd_skills.items():
+            resume_skill = resume_skills.get(key)
+            if resume_skill is None:
+                skills.append(jd_skill.model_copy(update={
+                    "context": f"GAP - required by the job description, not evidenced in resume. {jd_skill.context}".strip()
+                }))
+                continue
+            skills.append(resume_skill.model_copy(update={
+                "category": jd_skill.category,
+                "specific_technologies": list(dict.fromkeys(
+                    resume_skill.specific_technologies + jd_skill.specific_technologies
+                ))
+            }))
+        skills.extend(skill for key, skill in resume_skills.items() if key not in jd_skills)
+        
+        categories: Dict[str, SkillCategory] = {
+            category_key(c.name): c for c in jd_profile["categories"]
+        }
+        for category in resume["categories"]:
+            key = category_key(category.name)
+            if key not in categories:
+                categories[key] = category.model_copy(update={"priority": max(category.priority, 4)})
+        
+        # Every skill's category must exist after the merge
+        return SkillExtractionAgent.merge_extractions([{"skills": skills, "categories": list(categories.values())}])
+    
+    def _fit_documents(self, **documents: str) -> dict:
+        """Compact the documents and trim them to the provider's prompt budget."""
+        return get_prompt_budget().fit_many(
+            documents, self.llm_config.provider.value, self.llm_config.model
+        )
+    
     def _extract_from_resume(self, resume_text: str, position_title: str) -> dict:
         """Extract skills from resume only."""
+        resume_text = self._fit_documents(resume=resume_text)["resume"]
         
         system_prompt = """You are an expert technical recruiter and skill extraction specialist. 
         Your task is to analyze a resume and extract ALL technical skills with high accuracy.
@@ -185,6 +378,7 @@ class SkillExtractionAgent(BaseAgent):
     
     def _extract_from_job_description(self, jd_text: str, position_title: str) -> dict:
         """Extract required skills from job description."""
+        jd_text = self._fit_documents(job_description=jd_text)["job_description"]
         
         system_prompt = """You are an expert at analyzing job descriptions to identify required technical skills.
         Extract both explicit requirements and implicit skills needed for the role.
@@ -243,6 +437,8 @@ class SkillExtractionAgent(BaseAgent):
     
     def _extract_from_both(self, resume_text: str, jd_text: str, position_title: str) -> dict:
         """Extract skills from both resume and job description, finding matches and gaps."""
+        documents = self._fit_documents(resume=resume_text, job_description=jd_text)
+        resume_text, jd_text = documents["resume"], documents["job_description"]
         
         system_prompt = """You are analyzing both a candidate's resume and a job description to create 
         a comprehensive skill assessment. Identify:
@@ -0,0 +1,306 @@
+"""
+Agent-facing LLM wrapper
+
+Agents call `invoke` / `ainvoke` on this wrapper instead of the shared
+runnable directly, so that every real call is rejected while the provider's
+circuit is open, feeds the provider health monitor, is admitted by the cross-worker rate limiter (with 429 backoff), slow calls
+can be hedged to a secondary provider, structured outputs can be served
+from the response cache, malformed structured outputs are repaired locally
+and token usage is reported to the run's tracker.
+
+`stream_items` streams the provider's tokens instead and yields the objects
+of one array of the structured output as soon as each one closes.
+"""
+
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.exceptions import OutputParserException
+from pydantic import ValidationError
+
+from app.services.qgen.llm.hedging import HedgedCaller
+from app.services.qgen.llm.provider_health import (
+    ProviderHealthMonitor, ProviderUnavailableError, get_provider_health_monitor
+)
+from app.services.qgen.llm.rate_limiter import (
+    ProviderRateLimiter, RateLimitTimeoutError, estimate_tokens, get_rate_limiter, is_rate_limit_error
+)
+from app.services.qgen.llm.recording import ReplayMissError
+from app.services.qgen.llm.response_cache import ResponseCache, make_cache_key
+from app.services.qgen.llm.usage import record_llm_usage
+from app.services.qgen.utils.incremental_json import IncrementalArrayParser
+from app.services.qgen.utils.structured_repair import repair_structured_output
+
+
+def is_provider_error(error: BaseException) -> bool:
+    """Return False for errors caused by the model's output, local rate limiting or replay rather than the provider."""
+    return not isinstance(error, (OutputParserException, ValidationError, RateLimitTimeoutError, ReplayMissError))
+
+
+# Provider SDK exceptions without a status code that are still worth retrying
+TRANSIENT_ERROR_TYPES = ("APIConnectionError", "APITimeoutError", "ServiceUnavailable", "DeadlineExceeded")
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    Return True for failures a later retry may get past: provider rate limits,
+    5xx and connection errors, timeouts, open circuits and local rate-limit waits.
+
+    Errors raised explicitly from such an error (`raise ... from e`) count too;
+    anything else (bad output, validation, empty results) is deterministic.
+    """
+    while error is not None:
+        if is_rate_limit_error(error) or isinstance(
+            error, (ProviderUnavailableError, RateLimitTimeoutError, TimeoutError, ConnectionError)
+        ):
+            return True
+        response = getattr(error, "response", None)
+        for status in (getattr(error, "status_code", None), getattr(error, "code", None),
+                       getattr(response, "status_code", None)):
+            if isinstance(status, int) and status >= 500:
+                return True
+        if type(error).__name__ in TRANSIENT_ERROR_TYPES:
+            return True
+        error = error.__cause__
+    return False
+
+
+def chunk_text(chunk: Any) -> str:
+    """Return the text of a streamed message chunk (string or content-part list)."""
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            part if isinstance(part, str) else part.get("text", "")
+            for part in content if isinstance(part, (str, dict))
+        )
+    return ""
+
+
+def output_items(output: Any, item_key: str) -> List[Dict[str, Any]]:
+    """Return the `item_key` array of a structured output as plain dicts."""
+    return output.model_dump(mode="json").get(item_key) or []
+
+
+def build_output(output_schema: Optional[type], item_key: str, items: List[Dict[str, Any]]) -> Any:
+    """Rebuild a structured output from its streamed items; None if they do not validate."""
+    if output_schema is None or not items:
+        return None
+    try:
+        return output_schema.model_validate({item_key: items})
+    except ValidationError:
+        return None
+
+
+class AgentLLM:
+    """
+    Thin wrapper around a shared runnable that records call outcomes per provider.
+
+    When a response cache and output schema are given, structured outputs are
+    cached under a hash of `cache_key_parts` and the messages. Structured
+    runnables are built with `include_raw=True`; the raw message is used for
+    token accounting and only the parsed output is returned; if parsing
+    failed, the output is repaired from the raw answer. `stream_runnable`
+    is the plain chat model used for token streaming.
+    """
+
+    def __init__(self, provider: str, runnable: Any,
+                 health_monitor: Optional[ProviderHealthMonitor] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 output_schema: Optional[type] = None,
+                 cache_key_parts: Tuple = (),
+                 rate_limiter: Optional[ProviderRateLimiter] = None,
+                 output_tokens: Optional[int] = None,
+                 hedger: Optional[HedgedCaller] = None,
+                 model: Optional[str] = None,
+                 agent_name: Optional[str] = None,
+                 stream_runnable: Any = None):
+        self.provider = provider
+        self.model = model or "unknown"
+        self.agent_name = agent_name
+        self.runnable = runnable
+        self.stream_runnable = stream_runnable
+        self.health_monitor = health_monitor or get_provider_health_monitor()
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.output_tokens = output_tokens or self.rate_limiter.estimated_output_tokens
+        self.hedger = hedger
+        self.response_cache = response_cache if output_schema is not None else None
+        self.output_schema = output_schema
+        self.cache_key_parts = cache_key_parts
+
+    def _cache_lookup(self, messages: Any) -> Tuple[Optional[str], Any]:
+        """Return (cache key, cached output); both None when caching is off."""
+        if self.response_cache is None:
+            return None, None
+        key = make_cache_key(self.cache_key_parts, messages)
+        cached = self.response_cache.get(key, self.output_schema)
+        if cached is not None:
+            record_llm_usage(self.agent_name, self.provider, self.model, cache_hit=True)
+        return key, cached
+
+    def _cache_store(self, key: Optional[str], response: Any) -> None:
+        if key is not None and isinstance(response, self.output_schema):
+            self.response_cache.set(key, response)
+
+    def is_available(self) -> bool:
+        """True if the provider's circuit currently allows calls."""
+        return self.health_monitor.is_available(self.provider)
+
+    def _hedger(self) -> Optional[HedgedCaller]:
+        """The hedge for this call; none while the secondary provider's circuit is open."""
+        if self.hedger is None or not self.hedger.secondary.is_available():
+            return None
+        return self.hedger
+
+    def _ensure_available(self) -> None:
+        """Reject the call if the provider's circuit is open (this also schedules the half-open probe)."""
+        self.health_monitor.ensure_available(self.provider)
+
+    def _record(self, error: Optional[BaseException] = None) -> None:
+        if error is not None and is_provider_error(error):
+            self.health_monitor.record_failure(self.provider, error)
+        else:
+            self.health_monitor.record_success(self.provider)
+
+    def _unwrap(self, response: Any, latency: float) -> Any:
+        """Record the call's token usage and return the parsed output."""
+        if isinstance(response, dict) and "raw" in response and "parsed" in response:
+            record_llm_usage(self.agent_name, self.provider, self.model, response["raw"], latency)
+            if response.get("parsing_error") is not None:
+                return self._repair(response["raw"], response["parsing_error"])
+            return response["parsed"]
+        record_llm_usage(self.agent_name, self.provider, self.model, response, latency)
+        return response
+
+    def _repair(self, raw: Any, error: BaseException) -> Any:
+        """Salvage the output from the raw answer of a failed parse, else re-raise the parse error."""
+        repaired = repair_structured_output(raw, self.output_schema) if self.output_schema else None
+        if repaired is None:
+            raise error
+        return repaired.output
+
+    def _should_retry(self, error: BaseException, attempt: int) -> bool:
+        """On a 429, pause the provider for all workers and allow another attempt."""
+        if not is_rate_limit_error(error) or attempt >= self.rate_limiter.max_retries:
+            return False
+        self.rate_limiter.penalize(self.provider, self.rate_limiter.backoff_seconds(attempt, error))
+        return True
+
+    def invoke(self, messages: Any, config: Optional[dict] = None, **kwargs) -> Any:
+        key, cached = self._cache_lookup(messages)
+        if cached is not None:
+            return cached
+        hedger = self._hedger()
+        if hedger is not None:
+            response = hedger.call(
+                lambda: self._invoke_provider(messages, config, **kwargs),
+                lambda: hedger.secondary._invoke_provider(messages, config, **kwargs)
+            )
+        else:
+            response = self._invoke_provider(messages, config, **kwargs)
+        self._cache_store(key, response)
+        return response
+
+    async def ainvoke(self, messages: Any, config: Optional[dict] = None, **kwargs) -> Any:
+        key, cached = self._cache_lookup(messages)
+        if cached is not None:
+            return cached
+        hedger = self._hedger()
+        if hedger is not None:
+            response = await hedger.acall(
+                lambda: self._ainvoke_provider(messages, config, **kwargs),
+                lambda: hedger.secondary._ainvoke_provider(messages, config, **kwargs)
+            )
+        else:
+            response = await self._ainvoke_provider(messages, config, **kwargs)
+        self._cache_store(key, response)
+        return response
+
+    def _invoke_provider(self, messages: Any, config: Optional[dict] = None, **kwargs) -> Any:
+        """Call the provider under the rate limiter, retrying 429s and recording the outcome."""
+        self._ensure_available()
+        tokens = estimate_tokens(messages, self.output_tokens)
+        attempt = 0
+        while True:
+            try:
+                self.rate_limiter.acquire(self.provider, tokens)
+                started = time.time()
+                response = self.runnable.invoke(messages, config=config, **kwargs)
+                break
+            except Exception as e:
+                if self._should_retry(e, attempt):
+                    attempt += 1
+                    continue
+                self._record(e)
+                raise
+        self._record()
+        return self._unwrap(response, time.time() - started)
+
+    async def _ainvoke_provider(self, messages: Any, config: Optional[dict] = None, **kwargs) -> Any:
+        self._ensure_available()
+        tokens = estimate_tokens(messages, self.output_tokens)
+        attempt = 0
+        while True:
+            try:
+                await self.rate_limiter.aacquire(self.provider, tokens)
+                started = time.time()
+                response = await self.runnable.ainvoke(messages, config=config, **kwargs)
+                break
+            except Exception as e:
+                if self._should_retry(e, attempt):
+                    attempt += 1
+                    continue
+                self._record(e)
+                raise
+        self._record()
+        return self._unwrap(response, time.time() - started)
+
+    def stream_items(self, messages: Any, item_key: str, config: Optional[dict] = None,
+                     **kwargs) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the provider's output and yield each object of its `item_key` array as it closes.
+
+        Items are raw dicts; callers validate them. Cached outputs are replayed
+        item by item, and a completed stream is cached like an `invoke` result.
+        Streamed calls are not hedged.
+        """
+        key, cached = self._cache_lookup(messages)
+        if cached is not None:
+            yield from output_items(cached, item_key)
+            return
+
+        items = []
+        for item in self._stream_provider(messages, item_key, config, **kwargs):
+            items.append(item)
+            yield item
+        self._cache_store(key, build_output(self.output_schema, item_key, items))
+
+    def _stream_provider(self, messages: Any, item_key: str, config: Optional[dict] = None,
+                         **kwargs) -> Iterator[Dict[str, Any]]:
+        """Stream from the provider under the rate limiter; 429s are retried until the first item."""
+        if self.stream_runnable is None:
+            raise RuntimeError(f"Streaming is not configured for provider '{self.provider}'")
+        self._ensure_available()
+        tokens = estimate_tokens(messages, self.output_tokens)
+        attempt = 0
+        while True:
+            parser = IncrementalArrayParser(item_key)
+            message, emitted = None, False
+            try:
+                self.rate_limiter.acquire(self.provider, tokens)
+                started = time.time()
+                for chunk in self.stream_runnable.stream(messages, config=config, **kwargs):
+                    message = chunk if message is None else message + chunk
+                    for item in parser.feed(chunk_text(chunk)):
+                        emitted = True
+                        yield item
+                break
+            except Exception as e:
+                if not emitted and self._should_retry(e, attempt):
+                    attempt += 1
+                    continue
+                self._record(e)
+                raise
+        self._record()
+        record_llm_usage(self.agent_name, self.provider, self.model, message, time.time() - started)
@@ -0,0 +1,157 @@
+"""
+Process-wide LLM Client Registry
+
+Keeps long-lived LLM clients so that agents and Celery tasks running in the
+same process share HTTP connection pools instead of building (and health
+checking) a new client for every agent of every job.
+
+Example Usage:
+    registry = get_llm_client_registry()
+    llm = registry.get_llm(llm_config, SkillExtractionOutput)
+"""
+
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.llm_client_ops import LLM_Client_Ops
+from app.logger import get_logger
+from app.services.qgen.models.schemas import LLMConfig, LLMProvider
+
+logger = get_logger(__name__)
+
+# Map qgen provider names to rubri provider names
+PROVIDER_MAPPING = {
+    LLMProvider.OPENAI: "openai",
+    LLMProvider.GEMINI: "gemini",
+    LLMProvider.GROQ: "groq",
+    LLMProvider.AZURE_OPENAI: "azure_openai",
+    LLMProvider.PORTKEY: "portkey",
+    LLMProvider.FAKE: "fake"
+}
+
+
+def to_rubri_provider(provider: LLMProvider) -> str:
+    """Return the rubri provider name for a qgen provider."""
+    rubri_provider = PROVIDER_MAPPING.get(provider)
+    if not rubri_provider:
+        raise ValueError(f"Unsupported LLM provider: {provider}")
+    return rubri_provider
+
+
+def get_default_model(provider: LLMProvider) -> str:
+    """Return the provider's default model from the YAML `llm_providers` config."""
+    return LLM_Client_Ops.get_default_model(to_rubri_provider(provider))
+
+
+def model_for_provider(provider: LLMProvider, config: LLMConfig) -> str:
+    """Return `config.model` if the config targets `provider`, else the provider's default model."""
+    return config.model if provider == config.provider else get_default_model(provider)
+
+
+class LLMClientRegistry:
+    """
+    Thread-safe registry of LLM clients.
+
+    Base clients are built once per provider, model, temperature and max
+    tokens; runnables (optionally wrapped with structured output) are cached
+    per client and output schema.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._client_ops: Dict[Tuple, LLM_Client_Ops] = {}
+        self._runnables: Dict[Tuple, Any] = {}
+
+    @staticmethod
+    def runnable_key(config: LLMConfig, structured_output_model: Optional[type]) -> Tuple:
+        """Identify a runnable by provider, model, temperature, max tokens and output schema."""
+        schema_key = None
+        if structured_output_model is not None:
+            schema_key = f"{structured_output_model.__module__}.{structured_output_model.__qualname__}"
+        return (
+            to_rubri_provider(config.provider),
+            config.model,
+            config.temperature,
+            config.max_tokens,
+            schema_key
+        )
+
+    def get_client_ops(self, provider: LLMProvider, config: Optional[LLMConfig] = None) -> LLM_Client_Ops:
+        """
+        Return the shared LLM_Client_Ops for a provider, creating it on first use.
+
+        With a `config`, its model, temperature and max tokens override the
+        provider's YAML `constructor_params`; without one the YAML defaults are used.
+        No health check is made here; provider health is tracked from real
+        calls by the ProviderHealthMonitor.
+        """
+        rubri_provider = to_rubri_provider(provider)
+        if config is None:
+            key = (rubri_provider, None, None, None)
+        else:
+            key = (rubri_provider, config.model, config.temperature, config.max_tokens)
+
+        client_ops = self._client_ops.get(key)
+        if client_ops is not None:
+            return client_ops
+
+        with self._lock:
+            client_ops = self._client_ops.get(key)
+            if client_ops is None:
+                logger.info(f"Building shared LLM client: {key}")
+                overrides = LLM_Client_Ops.build_constructor_overrides(rubri_provider, *key[1:])
+                client_ops = LLM_Client_Ops(provider_name=rubri_provider, constructor_overrides=overrides)
+                self._client_ops[key] = client_ops
+        return client_ops
+
+    def get_llm(self, config: LLMConfig, structured_output_model: Optional[type] = None):
+        """Return a shared runnable for the given config and optional output schema."""
+        key = self.runnable_key(config, structured_output_model)
+
+        runnable = self._runnables.get(key)
+        if runnable is not None:
+            return runnable
+
+        with self._lock:
+            runnable = self._runnables.get(key)
+            if runnable is None:
+                runnable = self.get_client_ops(config.provider, config).llm_client
+                if structured_output_model is not None:
+                    # The raw message carries token usage; AgentLLM unwraps the parsed output
+                    runnable = runnable.with_structured_output(structured_output_model, include_raw=True)
+                self._runnables[key] = runnable
+                logger.info(f"Registered LLM runnable: {key}")
+        return runnable
+
+    def warm_up(self, providers: Iterable[LLMProvider]) -> None:
+        """Eagerly build clients for the given providers; failures are logged, not raised."""
+        for provider in providers:
+            try:
+                self.get_client_ops(provider)
+            except Exception as e:
+                logger.warning(f"Failed to warm up LLM client for {provider}: {e}")
+
+    def reset(self) -> None:
+        """Drop all cached clients (e.g. after a worker process fork)."""
+        with self._lock:
+            self._client_ops.clear()
+            self._runnables.clear()
+
+
+# Singleton instance for reuse across agents and Celery tasks
+_registry_instance = None
+_registry_lock = threading.Lock()
+
+
+def get_llm_client_registry() -> LLMClientRegistry:
+    """
+    Get singleton LLM client registry.
+
+    This ensures clients are shared across all agents in the process.
+    """
+    global _registry_instance
+    if _registry_instance is None:
+        with _registry_lock:
+            if _registry_instance is None:
+                _registry_instance = LLMClientRegistry()
+    return _registry_instance
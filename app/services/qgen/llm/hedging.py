@@ -0,0 +1,175 @@
+"""
+Hedged LLM requests
+
+When a primary call takes longer than a percentile of its recent latencies,
+the same request is sent to a secondary provider/model and whichever answer
+arrives first is used. The loser is cancelled (async) or abandoned and its
+result discarded (sync calls, which cannot be interrupted mid-request).
+
+A per-agent budget caps how many calls in a sliding window may be hedged.
+Configured per agent under `qgen.agents.<agent>.hedging`.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Shared pool that runs the calls of agents with hedging enabled
+_executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix="qgen-hedge")
+
+
+class LatencyTracker:
+    """Rolling window of call latencies with percentile lookup."""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, int(round(pct / 100 * len(samples))) - 1))
+        return samples[index]
+
+
+class HedgedCaller:
+    """
+    Runs a primary call and, if it is slow, a secondary one; returns the first result.
+
+    Args:
+        secondary: AgentLLM for the secondary provider/model
+        percentile: primary latency percentile after which a hedge is sent
+        min_samples: primary samples needed before the percentile is trusted
+        default_delay_seconds: hedge delay used until `min_samples` is reached
+        max_hedge_ratio: at most this fraction of the last `budget_window` calls are hedged
+    """
+
+    def __init__(self, secondary: Any, percentile: float = 95, min_samples: int = 20,
+                 default_delay_seconds: float = 20, max_hedge_ratio: float = 0.1,
+                 budget_window: int = 100):
+        self.secondary = secondary
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default_delay_seconds = default_delay_seconds
+        self.max_hedge_ratio = max_hedge_ratio
+
+        self.latencies = LatencyTracker()
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=budget_window)
+        self._stats = {"calls": 0, "hedged": 0, "hedge_wins": 0}
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for the primary before hedging."""
+        if len(self.latencies) < self.min_samples:
+            return self.default_delay_seconds
+        return self.latencies.percentile(self.percentile)
+
+    def _start_call(self) -> None:
+        with self._lock:
+            self._stats["calls"] += 1
+            self._recent.append(False)
+
+    def _claim_hedge(self) -> bool:
+        """Spend budget on a hedge if the sliding window allows it."""
+        with self._lock:
+            # Budget against the calls actually seen, so a cold start cannot hedge every call
+            if sum(self._recent) + 1 > self.max_hedge_ratio * max(len(self._recent), 1):
+                return False
+            self._recent[-1] = True
+            self._stats["hedged"] += 1
+            return True
+
+    def _record_win(self) -> None:
+        with self._lock:
+            self._stats["hedge_wins"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["hedge_delay_seconds"] = round(self.hedge_delay(), 3)
+        return stats
+
+    # ---- sync ---------------------------------------------------------------
+
+    def call(self, primary: Callable[[], Any], secondary: Callable[[], Any]) -> Any:
+        """Run `primary`, hedging with `secondary` if it is slower than the hedge delay."""
+        self._start_call()
+        started = time.time()
+        primary_future = _executor.submit(contextvars.copy_context().run, primary)
+        primary_future.add_done_callback(lambda f: self._record_latency(f, started))
+
+        try:
+            return primary_future.result(timeout=self.hedge_delay())
+        except FutureTimeoutError:
+            pass
+
+        if not self._claim_hedge():
+            return primary_future.result()
+
+        logger.info(f"🔀 Hedging slow call to {self.secondary.provider} after {time.time() - started:.1f}s")
+        secondary_future = _executor.submit(contextvars.copy_context().run, secondary)
+        return self._first_result(primary_future, secondary_future)
+
+    def _record_latency(self, future: Future, started: float) -> None:
+        if not future.cancelled() and future.exception() is None:
+            self.latencies.record(time.time() - started)
+
+    def _first_result(self, primary_future: Future, secondary_future: Future) -> Any:
+        """Return the first successful result; raise the primary's error if both fail."""
+        pending = {primary_future, secondary_future}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    if future is secondary_future:
+                        self._record_win()
+                    return future.result()
+        return primary_future.result()
+
+    # ---- async --------------------------------------------------------------
+
+    async def acall(self, primary: Callable[[], Awaitable[Any]],
+                    secondary: Callable[[], Awaitable[Any]]) -> Any:
+        """Async version of `call`; the losing request is cancelled."""
+        self._start_call()
+        started = time.time()
+        primary_task = asyncio.ensure_future(primary())
+        primary_task.add_done_callback(lambda t: self._record_latency(t, started))
+
+        done, _ = await asyncio.wait({primary_task}, timeout=self.hedge_delay())
+        if done or not self._claim_hedge():
+            return await primary_task
+
+        logger.info(f"🔀 Hedging slow call to {self.secondary.provider} after {time.time() - started:.1f}s")
+        secondary_task = asyncio.ensure_future(secondary())
+        pending = {primary_task, secondary_task}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    if task is secondary_task:
+                        self._record_win()
+                    return task.result()
+        return primary_task.result()
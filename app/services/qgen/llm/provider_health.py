@@ -0,0 +1,245 @@
+"""
+Provider Health Monitor with Circuit Breaking
+
+Tracks the outcome of real LLM calls per provider instead of sending a
+synthetic health-check prompt before every job. After repeated failures the
+provider's circuit opens; once the cool-down has elapsed a single background
+probe decides whether to close it again.
+
+State is kept in-process, or in Redis (`qgen.provider_health.backend: redis`)
+so that all workers share it.
+
+States:
+    closed    -> calls allowed
+    open      -> calls rejected with ProviderUnavailableError
+    half_open -> background probe in flight, calls still rejected
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import redis
+
+from app.logger import get_logger
+from app.services.qgen.utils.settings import get_qgen_settings
+
+logger = get_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ProviderUnavailableError(RuntimeError):
+    """Raised when a provider's circuit is open."""
+
+    def __init__(self, provider: str, state: Dict[str, Any]):
+        self.provider = provider
+        self.state = state
+        super().__init__(
+            f"LLM provider '{provider}' is unavailable (circuit {state.get('state')}, "
+            f"last error: {state.get('last_error')})"
+        )
+
+
+def _default_probe(provider: str) -> bool:
+    """Probe a provider with the shared client's health check."""
+    from app.services.qgen.llm.client_registry import get_llm_client_registry
+    return get_llm_client_registry().get_client_ops(provider).health_check()
+
+
+class ProviderHealthMonitor:
+    """Records call outcomes per provider and exposes circuit state."""
+
+    REDIS_KEY_PREFIX = "qgen:llm_health"
+
+    def __init__(self, failure_threshold: int = 3, failure_window_seconds: float = 60,
+                 open_seconds: float = 30, state_ttl_seconds: float = 600,
+                 redis_url: Optional[str] = None,
+                 probe: Optional[Callable[[str], bool]] = None):
+        self.failure_threshold = failure_threshold
+        self.failure_window_seconds = failure_window_seconds
+        self.open_seconds = open_seconds
+        self.state_ttl_seconds = state_ttl_seconds
+        self.redis_url = redis_url
+        self._probe = probe or _default_probe
+
+        self._lock = threading.Lock()
+        self._local_states: Dict[str, Dict[str, Any]] = {}
+        self._probing = set()
+        self._redis_client = None
+
+    # ---- storage ----------------------------------------------------------
+
+    @property
+    def redis_client(self):
+        """Lazy Redis client, only used when a Redis URL is configured."""
+        if self.redis_url and self._redis_client is None:
+            self._redis_client = redis.from_url(
+                self.redis_url, decode_responses=True, socket_connect_timeout=2
+            )
+        return self._redis_client
+
+    def _key(self, provider: str) -> str:
+        return f"{self.REDIS_KEY_PREFIX}:{provider}"
+
+    def _load(self, provider: str) -> Dict[str, Any]:
+        if self.redis_client is not None:
+            try:
+                raw = self.redis_client.get(self._key(provider))
+                return json.loads(raw) if raw else {}
+            except Exception as e:
+                logger.warning(f"Provider health Redis read failed, using local state: {e}")
+
+        entry = self._local_states.get(provider)
+        if entry is None or entry["expires_at"] < time.time():
+            return {}
+        return dict(entry["state"])
+
+    def _save(self, provider: str, state: Dict[str, Any]) -> None:
+        if self.redis_client is not None:
+            try:
+                self.redis_client.set(
+                    self._key(provider), json.dumps(state), ex=int(self.state_ttl_seconds)
+                )
+                return
+            except Exception as e:
+                logger.warning(f"Provider health Redis write failed, using local state: {e}")
+
+        self._local_states[provider] = {
+            "state": state,
+            "expires_at": time.time() + self.state_ttl_seconds
+        }
+
+    def _claim_probe(self, provider: str) -> bool:
+        """Make sure only one probe per provider runs (per process, or cluster-wide with Redis)."""
+        if provider in self._probing:
+            return False
+        if self.redis_client is not None:
+            try:
+                return bool(self.redis_client.set(
+                    f"{self._key(provider)}:probe", "1", nx=True, ex=max(int(self.open_seconds), 1)
+                ))
+            except Exception as e:
+                logger.warning(f"Provider health Redis probe lock failed: {e}")
+        return True
+
+    # ---- public API -------------------------------------------------------
+
+    def get_state(self, provider: str) -> Dict[str, Any]:
+        """Return the recorded state for a provider (closed if nothing is recorded)."""
+        state = self._load(provider)
+        state.setdefault("state", CLOSED)
+        state.setdefault("failures", 0)
+        return state
+
+    def record_success(self, provider: str) -> None:
+        """Record a successful call; closes the circuit."""
+        with self._lock:
+            previous = self._load(provider)
+            if previous.get("state", CLOSED) != CLOSED:
+                logger.info(f"✅ Circuit closed for provider {provider}")
+            self._save(provider, {
+                "state": CLOSED,
+                "failures": 0,
+                "last_success": time.time(),
+                "last_failure": previous.get("last_failure"),
+                "last_error": previous.get("last_error")
+            })
+
+    def record_failure(self, provider: str, error: Optional[BaseException] = None) -> None:
+        """Record a failed call; opens the circuit after `failure_threshold` failures."""
+        now = time.time()
+        with self._lock:
+            state = self._load(provider)
+            last_failure = state.get("last_failure") or 0
+            failures = state.get("failures", 0)
+            if now - last_failure > self.failure_window_seconds:
+                failures = 0
+            failures += 1
+
+            state.update({
+                "failures": failures,
+                "last_failure": now,
+                "last_error": str(error)[:500] if error else None
+            })
+            if state.get("state") == HALF_OPEN or failures >= self.failure_threshold:
+                if state.get("state") != OPEN:
+                    logger.warning(f"⚠️ Circuit opened for provider {provider} after {failures} failures")
+                state["state"] = OPEN
+                state["opened_at"] = now
+            else:
+                state.setdefault("state", CLOSED)
+            self._save(provider, state)
+
+    def is_available(self, provider: str) -> bool:
+        """Return True if calls to the provider are allowed right now."""
+        state = self.get_state(provider)
+        if state["state"] == CLOSED:
+            return True
+
+        if state["state"] in (OPEN, HALF_OPEN) and time.time() - state.get("opened_at", 0) >= self.open_seconds:
+            self._start_probe(provider)
+        return False
+
+    def ensure_available(self, provider: str) -> None:
+        """Raise ProviderUnavailableError if the provider's circuit is not closed."""
+        if not self.is_available(provider):
+            raise ProviderUnavailableError(provider, self.get_state(provider))
+
+    def _start_probe(self, provider: str) -> None:
+        with self._lock:
+            if not self._claim_probe(provider):
+                return
+            self._probing.add(provider)
+            state = self._load(provider)
+            state["state"] = HALF_OPEN
+            self._save(provider, state)
+
+        thread = threading.Thread(
+            target=self._run_probe, args=(provider,), name=f"llm-probe-{provider}", daemon=True
+        )
+        thread.start()
+
+    def _run_probe(self, provider: str) -> None:
+        logger.info(f"🔍 Probing provider {provider}")
+        try:
+            healthy = self._probe(provider)
+        except Exception as e:
+            logger.error(f"Probe for provider {provider} raised: {e}")
+            healthy = False
+
+        try:
+            if healthy:
+                self.record_success(provider)
+            else:
+                self.record_failure(provider, RuntimeError("health probe failed"))
+        finally:
+            self._probing.discard(provider)
+
+
+# Singleton instance for reuse across agents and Celery tasks
+_monitor_instance = None
+
+
+def get_provider_health_monitor() -> ProviderHealthMonitor:
+    """
+    Get singleton provider health monitor configured from `qgen.provider_health`.
+    """
+    global _monitor_instance
+    if _monitor_instance is None:
+        settings = get_qgen_settings().get("provider_health") or {}
+        redis_url = None
+        if settings.get("backend", "memory") == "redis":
+            redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+        _monitor_instance = ProviderHealthMonitor(
+            failure_threshold=settings.get("failure_threshold", 3),
+            failure_window_seconds=settings.get("failure_window_seconds", 60),
+            open_seconds=settings.get("open_seconds", 30),
+            state_ttl_seconds=settings.get("state_ttl_seconds", 600),
+            redis_url=redis_url
+        )
+    return _monitor_instance
@@ -0,0 +1,291 @@
+"""
+Cross-worker LLM rate limiter
+
+Token buckets for requests per minute and tokens per minute per provider,
+configured under `llm_providers.<provider>.rate_limits`. With the Redis
+backend (`qgen.rate_limiting.backend: redis`) the buckets are shared by all
+Celery workers and hosts, so the fleet as a whole stays under the provider
+ceiling instead of every process discovering it through 429s.
+
+Callers reserve capacity with `acquire` before each call and wait if the
+buckets are empty. A 429 from the provider pauses the provider for every
+worker (`penalize`) for the Retry-After period or an exponential backoff.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import redis
+
+from app.db_ops.db_config import load_app_config
+from app.logger import get_logger
+from app.services.qgen.utils.settings import get_qgen_settings
+
+logger = get_logger(__name__)
+
+# Both buckets are checked and debited atomically. Returns 0 when the
+# reservation succeeded, otherwise the number of milliseconds to wait.
+_ACQUIRE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+
+local blocked_until = tonumber(redis.call('GET', KEYS[3]) or '0')
+if blocked_until > now then
+    return blocked_until - now
+end
+
+local wait = 0
+local levels = {}
+for i = 1, 2 do
+    local capacity = tonumber(ARGV[(i - 1) * 2 + 1])
+    local amount = tonumber(ARGV[(i - 1) * 2 + 2])
+    if capacity > 0 then
+        local bucket = redis.call('HMGET', KEYS[i], 'level', 'ts')
+        local level = tonumber(bucket[1] or capacity)
+        local ts = tonumber(bucket[2] or now)
+        local rate = capacity / 60000.0
+        level = math.min(capacity, level + math.max(0, now - ts) * rate)
+        amount = math.min(amount, capacity)
+        if level < amount then
+            wait = math.max(wait, math.ceil((amount - level) / rate))
+        end
+        levels[i] = {level, amount}
+    end
+end
+
+if wait > 0 then
+    return wait
+end
+
+for i = 1, 2 do
+    if levels[i] then
+        redis.call('HSET', KEYS[i], 'level', levels[i][1] - levels[i][2], 'ts', now)
+        redis.call('PEXPIRE', KEYS[i], 120000)
+    end
+end
+return 0
+"""
+
+
+class RateLimitTimeoutError(RuntimeError):
+    """Raised when capacity could not be reserved within the configured wait."""
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """
+    Return True for provider 429 / quota-exhausted errors.
+
+    Decided by status code, exception type or an explicit rate-limit phrase;
+    a bare "429" in the message is not enough (e.g. "14290 tokens").
+    """
+    response = getattr(error, "response", None)
+    status_codes = (getattr(error, "status_code", None), getattr(error, "code", None),
+                    getattr(response, "status_code", None))
+    if 429 in status_codes:
+        return True
+    name = type(error).__name__
+    if name in ("RateLimitError", "ResourceExhausted", "TooManyRequests"):
+        return True
+    message = str(error).lower()
+    return any(phrase in message for phrase in ("rate limit", "too many requests", "resource_exhausted"))
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Return the provider's Retry-After hint in seconds, if it sent one."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class ProviderRateLimiter:
+    """Per-provider request and token buckets, in-process or shared through Redis."""
+
+    REDIS_KEY_PREFIX = "qgen:ratelimit"
+
+    def __init__(self, limits: Dict[str, Dict[str, Any]], redis_url: Optional[str] = None,
+                 max_wait_seconds: float = 120, max_retries: int = 3,
+                 base_backoff_seconds: float = 2, max_backoff_seconds: float = 60,
+                 estimated_output_tokens: int = 1000):
+        self.limits = limits
+        self.redis_url = redis_url
+        self.max_wait_seconds = max_wait_seconds
+        self.max_retries = max_retries
+        self.estimated_output_tokens = estimated_output_tokens
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+        self._lock = threading.Lock()
+        self._local_buckets: Dict[str, Dict[str, float]] = {}
+        self._local_blocked_until: Dict[str, float] = {}
+        self._redis_client = None
+        self._acquire_script = None
+
+    @property
+    def redis_client(self):
+        """Lazy Redis client, only used when a Redis URL is configured."""
+        if self.redis_url and self._redis_client is None:
+            self._redis_client = redis.from_url(self.redis_url, socket_connect_timeout=2)
+            self._acquire_script = self._redis_client.register_script(_ACQUIRE_SCRIPT)
+        return self._redis_client
+
+    def _capacities(self, provider: str):
+        limits = self.limits.get(provider) or {}
+        return (
+            float(limits.get("requests_per_minute") or 0),
+            float(limits.get("tokens_per_minute") or 0)
+        )
+
+    # ---- reservation ------------------------------------------------------
+
+    def _try_reserve(self, provider: str, tokens: int) -> float:
+        """
+        Reserve one request and `tokens` tokens; return 0 or the seconds to wait.
+
+        Providers without limits only honour pauses set by `penalize`.
+        """
+        rpm, tpm = self._capacities(provider)
+
+        if self.redis_client is not None:
+            try:
+                key = f"{self.REDIS_KEY_PREFIX}:{provider}"
+                wait_ms = self._acquire_script(
+                    keys=[f"{key}:requests", f"{key}:tokens", f"{key}:blocked_until"],
+                    args=[rpm, 1, tpm, tokens]
+                )
+                return int(wait_ms) / 1000
+            except Exception as e:
+                logger.warning(f"Rate limiter Redis call failed, using local buckets: {e}")
+
+        now = time.time()
+        with self._lock:
+            blocked_until = self._local_blocked_until.get(provider, 0)
+            if blocked_until > now:
+                return blocked_until - now
+
+            wait = 0.0
+            levels = {}
+            for name, capacity, amount in (("requests", rpm, 1), ("tokens", tpm, tokens)):
+                if capacity <= 0:
+                    continue
+                bucket = self._local_buckets.setdefault(f"{provider}:{name}", {"level": capacity, "ts": now})
+                rate = capacity / 60
+                level = min(capacity, bucket["level"] + (now - bucket["ts"]) * rate)
+                amount = min(amount, capacity)
+                if level < amount:
+                    wait = max(wait, (amount - level) / rate)
+                levels[name] = (bucket, level, amount)
+
+            if wait > 0:
+                return wait
+            for bucket, level, amount in levels.values():
+                bucket["level"] = level - amount
+                bucket["ts"] = now
+        return 0.0
+
+    def acquire(self, provider: str, tokens: int = 0) -> None:
+        """Block until a request of `tokens` estimated tokens fits the provider's limits."""
+        deadline = time.time() + self.max_wait_seconds
+        while True:
+            wait = self._try_reserve(provider, tokens)
+            if wait <= 0:
+                return
+            if time.time() + wait > deadline:
+                raise RateLimitTimeoutError(
+                    f"Rate limit for provider '{provider}' not available within {self.max_wait_seconds}s"
+                )
+            logger.debug(f"Rate limit reached for {provider}, waiting {wait:.2f}s")
+            time.sleep(wait + random.uniform(0, 0.05))
+
+    async def aacquire(self, provider: str, tokens: int = 0) -> None:
+        """Async version of `acquire`."""
+        deadline = time.time() + self.max_wait_seconds
+        while True:
+            wait = await asyncio.to_thread(self._try_reserve, provider, tokens)
+            if wait <= 0:
+                return
+            if time.time() + wait > deadline:
+                raise RateLimitTimeoutError(
+                    f"Rate limit for provider '{provider}' not available within {self.max_wait_seconds}s"
+                )
+            await asyncio.sleep(wait + random.uniform(0, 0.05))
+
+    # ---- 429 handling -----------------------------------------------------
+
+    def backoff_seconds(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """Return how long to pause after the `attempt`-th 429 (Retry-After if given)."""
+        hinted = retry_after_seconds(error) if error is not None else None
+        if hinted is not None:
+            return min(hinted, self.max_backoff_seconds)
+        backoff = self.base_backoff_seconds * (2 ** attempt)
+        return min(backoff, self.max_backoff_seconds) * random.uniform(0.8, 1.2)
+
+    def penalize(self, provider: str, seconds: float) -> None:
+        """Pause all callers of a provider for `seconds` after it returned a 429."""
+        logger.warning(f"⏳ Provider {provider} rate limited, pausing calls for {seconds:.1f}s")
+        if self.redis_client is not None:
+            try:
+                blocked_until_ms = int((time.time() + seconds) * 1000)
+                key = f"{self.REDIS_KEY_PREFIX}:{provider}:blocked_until"
+                current = self.redis_client.get(key)
+                if current is None or int(current) < blocked_until_ms:
+                    self.redis_client.set(key, blocked_until_ms, px=max(int(seconds * 1000), 1))
+                return
+            except Exception as e:
+                logger.warning(f"Rate limiter Redis penalize failed, pausing locally: {e}")
+        with self._lock:
+            self._local_blocked_until[provider] = max(
+                self._local_blocked_until.get(provider, 0), time.time() + seconds
+            )
+
+
+def estimate_tokens(messages: Any, output_tokens: int = 0) -> int:
+    """Rough token estimate for a call (about 4 characters per token) plus expected output."""
+    if isinstance(messages, (list, tuple)):
+        text_length = sum(len(str(getattr(m, "content", m))) for m in messages)
+    else:
+        text_length = len(str(getattr(messages, "content", messages)))
+    return text_length // 4 + output_tokens
+
+
+# Singleton instance for reuse across agents and Celery tasks
+_limiter_instance = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> ProviderRateLimiter:
+    """
+    Get singleton rate limiter configured from `llm_providers.<provider>.rate_limits`
+    and `qgen.rate_limiting`.
+    """
+    global _limiter_instance
+    if _limiter_instance is None:
+        with _limiter_lock:
+            if _limiter_instance is None:
+                settings = get_qgen_settings().get("rate_limiting") or {}
+                providers = load_app_config().get("llm_providers") or {}
+                limits = {
+                    name: provider_config.get("rate_limits") or {}
+                    for name, provider_config in providers.items()
+                    if isinstance(provider_config, dict)
+                }
+                redis_url = None
+                if settings.get("backend", "memory") == "redis":
+                    redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+                _limiter_instance = ProviderRateLimiter(
+                    limits,
+                    redis_url=redis_url,
+                    max_wait_seconds=settings.get("max_wait_seconds", 120),
+                    max_retries=settings.get("max_retries_on_429", 3),
+                    base_backoff_seconds=settings.get("base_backoff_seconds", 2),
+                    max_backoff_seconds=settings.get("max_backoff_seconds", 60),
+                    estimated_output_tokens=settings.get("estimated_output_tokens", 1000)
+                )
+    return _limiter_instance
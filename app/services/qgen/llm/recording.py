@@ -0,0 +1,280 @@
+"""
+Record and replay of LLM traffic
+
+In `record` mode every provider call made through AgentLLM (structured
+invoke or token stream) is appended, with its request, response and timing,
+to a gzip-compressed JSONL corpus. In `replay` mode the same calls are
+answered from the corpus by request hash, without touching the network,
+sleeping for the recorded latency (`original`), a fraction of it
+(`compressed`, divided by `speedup`) or not at all (`none`).
+
+Replaying a production run reproduces `MultiAgentTechnicalInterviewSystem`
+offline, so orchestrator, streaming and DB overhead can be profiled apart
+from provider latency, and performance regressions caught in CI. Replay
+still builds the provider clients, which only need an API key variable set
+(any value), never a connection.
+
+Configured under `qgen.llm_corpus`; `QGEN_LLM_RECORD_MODE` (off | record |
+replay) and `QGEN_LLM_CORPUS_DIR` override the mode and directory.
+"""
+
+import asyncio
+import glob
+import gzip
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from pydantic import BaseModel
+
+from app.logger import get_logger
+from app.services.qgen.llm.response_cache import make_cache_key
+from app.services.qgen.utils.settings import get_qgen_settings
+
+logger = get_logger(__name__)
+
+RECORD_MODES = ("off", "record", "replay")
+TIMING_MODES = ("original", "compressed", "none")
+
+
+class ReplayMissError(RuntimeError):
+    """Raised in replay mode when the corpus has no recording for a request."""
+
+
+def _dump_message(message: BaseMessage) -> Dict[str, Any]:
+    return message_to_dict(message)
+
+
+def _load_message(data: Dict[str, Any]) -> BaseMessage:
+    return messages_from_dict([data])[0]
+
+
+def dump_response(response: Any) -> Dict[str, Any]:
+    """Serialise an invoke result (raw/parsed dict, message or Pydantic model)."""
+    if isinstance(response, dict) and "raw" in response and "parsed" in response:
+        parsed, error = response.get("parsed"), response.get("parsing_error")
+        return {
+            "kind": "structured",
+            "raw": _dump_message(response["raw"]),
+            "parsed": parsed.model_dump(mode="json") if isinstance(parsed, BaseModel) else parsed,
+            "parsing_error": str(error) if error is not None else None
+        }
+    if isinstance(response, BaseMessage):
+        return {"kind": "message", "message": _dump_message(response)}
+    if isinstance(response, BaseModel):
+        return {"kind": "model", "parsed": response.model_dump(mode="json")}
+    return {"kind": "value", "value": response}
+
+
+def load_response(data: Dict[str, Any], output_schema: Optional[type]) -> Any:
+    """Rebuild an invoke result serialised by `dump_response`."""
+    kind = data.get("kind")
+    if kind == "structured":
+        parsed = data.get("parsed")
+        if parsed is not None and output_schema is not None:
+            parsed = output_schema.model_validate(parsed)
+        error = data.get("parsing_error")
+        return {
+            "raw": _load_message(data["raw"]),
+            "parsed": parsed,
+            "parsing_error": OutputParserException(error) if error is not None else None
+        }
+    if kind == "message":
+        return _load_message(data["message"])
+    if kind == "model":
+        return output_schema.model_validate(data["parsed"]) if output_schema is not None else data["parsed"]
+    return data.get("value")
+
+
+class LLMCorpus:
+    """
+    Corpus of recorded LLM calls in `directory`.
+
+    Each process appends to its own `llm-<date>-<pid>.jsonl.gz` file; replay
+    reads every file of the directory. A request recorded several times is
+    replayed in recorded order, cycling when exhausted.
+    """
+
+    def __init__(self, directory: str, mode: str = "record", timing: str = "original", speedup: float = 10.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unsupported LLM corpus mode: {mode}")
+        if timing not in TIMING_MODES:
+            raise ValueError(f"Unsupported LLM replay timing: {timing}")
+        self.directory = os.path.abspath(directory)
+        self.mode = mode
+        self.timing = timing
+        self.speedup = max(float(speedup), 1.0)
+
+        self._lock = threading.Lock()
+        self._recordings: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self._positions: Dict[str, int] = {}
+        self._path = os.path.join(
+            self.directory, f"llm-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.jsonl.gz"
+        )
+
+    # ---- recording ----------------------------------------------------------
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        """Append one call to this process' corpus file; failures are logged, never raised."""
+        line = json.dumps(entry, separators=(",", ":"), ensure_ascii=False, default=str) + "\n"
+        try:
+            with self._lock:
+                os.makedirs(self.directory, exist_ok=True)
+                # One gzip member per call keeps the file valid even if the process dies
+                with gzip.open(self._path, "at", encoding="utf-8") as f:
+                    f.write(line)
+        except Exception as e:
+            logger.warning(f"Failed to record LLM call to corpus: {e}")
+
+    # ---- replay -------------------------------------------------------------
+
+    def _load(self) -> Dict[str, List[Dict[str, Any]]]:
+        if self._recordings is None:
+            with self._lock:
+                if self._recordings is None:
+                    recordings: Dict[str, List[Dict[str, Any]]] = {}
+                    files = sorted(glob.glob(os.path.join(self.directory, "*.jsonl.gz")))
+                    for path in files:
+                        with gzip.open(path, "rt", encoding="utf-8") as f:
+                            for line in f:
+                                if line.strip():
+                                    entry = json.loads(line)
+                                    recordings.setdefault(entry["key"], []).append(entry)
+                    logger.info(f"📼 Loaded {sum(len(v) for v in recordings.values())} LLM recordings from {len(files)} files")
+                    self._recordings = recordings
+        return self._recordings
+
+    def lookup(self, key: str) -> Dict[str, Any]:
+        """Return the next recording for `key`; raises ReplayMissError if there is none."""
+        entries = self._load().get(key)
+        if not entries:
+            raise ReplayMissError(f"No recorded LLM response for request {key[:12]} in {self.directory}")
+        with self._lock:
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+        return entries[position % len(entries)]
+
+    def replay_delay(self, seconds: float) -> float:
+        """Seconds to wait for a recorded latency under the configured timing."""
+        if self.timing == "none":
+            return 0.0
+        if self.timing == "compressed":
+            return seconds / self.speedup
+        return seconds
+
+    def wrap(self, runnable: Any, key_parts: Tuple, output_schema: Optional[type] = None) -> 'CorpusRunnable':
+        return CorpusRunnable(runnable, self, key_parts, output_schema)
+
+
+class CorpusRunnable:
+    """Runnable wrapper that records calls to, or replays them from, an LLMCorpus."""
+
+    def __init__(self, runnable: Any, corpus: LLMCorpus, key_parts: Tuple, output_schema: Optional[type] = None):
+        self.runnable = runnable
+        self.corpus = corpus
+        self.key_parts = key_parts
+        self.output_schema = output_schema
+
+    def _key(self, kind: str, messages: Any) -> str:
+        return make_cache_key(self.key_parts + (kind,), messages)
+
+    def _entry(self, key: str, kind: str, messages: Any, **fields) -> Dict[str, Any]:
+        provider, model = self.key_parts[0], self.key_parts[1]
+        if isinstance(messages, (list, tuple)):
+            messages = [_dump_message(m) if isinstance(m, BaseMessage) else m for m in messages]
+        return {
+            "key": key, "kind": kind, "provider": provider, "model": model,
+            "schema": self.key_parts[-1], "recorded_at": time.time(), "messages": messages, **fields
+        }
+
+    def invoke(self, messages: Any, config: Optional[dict] = None, **kwargs) -> Any:
+        key = self._key("invoke", messages)
+        if self.corpus.mode == "replay":
+            entry = self.corpus.lookup(key)
+            time.sleep(self.corpus.replay_delay(entry["latency"]))
+            return load_response(entry["response"], self.output_schema)
+
+        started = time.time()
+        response = self.runnable.invoke(messages, config=config, **kwargs)
+        self.corpus.record(self._entry(
+            key, "invoke", messages, latency=round(time.time() - started, 4), response=dump_response(response)
+        ))
+        return response
+
+    async def ainvoke(self, messages: Any, config: Optional[dict] = None, **kwargs) -> Any:
+        key = self._key("invoke", messages)
+        if self.corpus.mode == "replay":
+            entry = self.corpus.lookup(key)
+            await asyncio.sleep(self.corpus.replay_delay(entry["latency"]))
+            return load_response(entry["response"], self.output_schema)
+
+        started = time.time()
+        response = await self.runnable.ainvoke(messages, config=config, **kwargs)
+        entry = self._entry(
+            key, "invoke", messages, latency=round(time.time() - started, 4), response=dump_response(response)
+        )
+        await asyncio.to_thread(self.corpus.record, entry)
+        return response
+
+    def stream(self, messages: Any, config: Optional[dict] = None, **kwargs) -> Iterator[Any]:
+        """Stream chunks; recordings keep each chunk's offset from the start of the call."""
+        key = self._key("stream", messages)
+        if self.corpus.mode == "replay":
+            entry = self.corpus.lookup(key)
+            elapsed = 0.0
+            for offset, chunk in entry["chunks"]:
+                time.sleep(self.corpus.replay_delay(max(offset - elapsed, 0.0)))
+                elapsed = offset
+                yield _load_message(chunk)
+            return
+
+        started = time.time()
+        chunks = []
+        for chunk in self.runnable.stream(messages, config=config, **kwargs):
+            chunks.append([round(time.time() - started, 4), _dump_message(chunk)])
+            yield chunk
+        self.corpus.record(self._entry(
+            key, "stream", messages, latency=round(time.time() - started, 4), chunks=chunks
+        ))
+
+
+# Singleton instance for reuse across agents and Celery tasks
+_corpus_instance = None
+_corpus_initialized = False
+_corpus_lock = threading.Lock()
+
+
+def get_llm_corpus() -> Optional[LLMCorpus]:
+    """
+    Get singleton LLM corpus configured from `qgen.llm_corpus` and the
+    `QGEN_LLM_RECORD_MODE` / `QGEN_LLM_CORPUS_DIR` environment variables.
+
+    Returns None when recording and replay are off.
+    """
+    global _corpus_instance, _corpus_initialized
+    if _corpus_initialized:
+        return _corpus_instance
+
+    with _corpus_lock:
+        if _corpus_initialized:
+            return _corpus_instance
+
+        settings = get_qgen_settings().get("llm_corpus") or {}
+        mode = os.getenv("QGEN_LLM_RECORD_MODE", settings.get("mode", "off")).lower()
+        if mode not in RECORD_MODES:
+            logger.warning(f"Unknown QGEN_LLM_RECORD_MODE '{mode}', recording and replay disabled")
+        elif mode != "off":
+            _corpus_instance = LLMCorpus(
+                os.getenv("QGEN_LLM_CORPUS_DIR", settings.get("directory", "cache/llm_corpus")),
+                mode=mode,
+                timing=os.getenv("QGEN_LLM_REPLAY_TIMING", settings.get("timing", "original")),
+                speedup=float(settings.get("speedup", 10))
+            )
+            logger.info(f"📼 LLM corpus {mode} mode ({_corpus_instance.directory})")
+        _corpus_initialized = True
+    return _corpus_instance
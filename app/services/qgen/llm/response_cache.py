@@ -0,0 +1,255 @@
+"""
+Content-addressed LLM response cache
+
+Caches structured agent outputs keyed by a hash of provider, model,
+temperature, max tokens, output schema and the exact messages sent, so that
+re-runs of the same inputs (a recruiter re-running a JD, a retried task) do
+not call the provider again.
+
+Backends:
+    memory -> in-process LRU
+    sqlite -> on-disk file shared by the processes of one host
+    redis  -> shared by all workers (size bounded by Redis' own eviction policy)
+
+Configured under `qgen.response_cache`; agents opt out with
+`qgen.agents.<agent>.cache: false`.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import redis
+
+from app.logger import get_logger
+from app.services.qgen.utils.settings import get_qgen_settings
+
+logger = get_logger(__name__)
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+
+
+def _serialize_message(message: Any) -> Any:
+    if isinstance(message, str):
+        return message
+    if hasattr(message, "type") and hasattr(message, "content"):
+        return {"type": message.type, "content": message.content}
+    return message
+
+
+def make_cache_key(key_parts: Tuple, messages: Any) -> str:
+    """Return the SHA-256 cache key for a call's configuration and messages."""
+    if isinstance(messages, (list, tuple)):
+        messages = [_serialize_message(m) for m in messages]
+    else:
+        messages = _serialize_message(messages)
+    payload = json.dumps([list(key_parts), messages], sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryCacheBackend:
+    """In-process LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCacheBackend:
+    """On-disk cache; least recently used entries are evicted beyond `max_entries`."""
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = os.path.abspath(path)
+        self.max_entries = max_entries
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_response_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_llm_response_cache_accessed_at "
+                "ON llm_response_cache (accessed_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM llm_response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                conn.execute("DELETE FROM llm_response_cache WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE llm_response_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_response_cache (key, value, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl_seconds, now)
+            )
+            conn.execute("DELETE FROM llm_response_cache WHERE expires_at < ?", (now,))
+            conn.execute(
+                "DELETE FROM llm_response_cache WHERE key IN ("
+                "SELECT key FROM llm_response_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM llm_response_cache")
+
+
+class RedisCacheBackend:
+    """Cache shared across workers; entries expire with Redis TTLs."""
+
+    KEY_PREFIX = "qgen:llm_cache"
+
+    def __init__(self, redis_url: str):
+        self.client = redis.from_url(redis_url, decode_responses=True, socket_connect_timeout=2)
+
+    def get(self, key: str) -> Optional[str]:
+        return self.client.get(f"{self.KEY_PREFIX}:{key}")
+
+    def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        self.client.set(f"{self.KEY_PREFIX}:{key}", value, ex=max(int(ttl_seconds), 1))
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(f"{self.KEY_PREFIX}:*"):
+            self.client.delete(key)
+
+
+class ResponseCache:
+    """
+    Cache of structured LLM outputs with hit/miss counters.
+
+    Backend errors are logged and treated as misses; the cache never fails a call.
+    """
+
+    def __init__(self, backend, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "errors": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, key: str, output_schema: type) -> Optional[Any]:
+        """Return the cached output for `key`, or None on a miss."""
+        try:
+            value = self.backend.get(key)
+            if value is not None:
+                result = output_schema.model_validate_json(value)
+                self._count("hits")
+                return result
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"LLM response cache read failed: {e}")
+        self._count("misses")
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a structured output under `key`."""
+        try:
+            self.backend.set(key, value.model_dump_json(), self.ttl_seconds)
+            self._count("writes")
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"LLM response cache write failed: {e}")
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for this process, with the hit rate."""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+
+
+# Singleton instance for reuse across agents and Celery tasks
+_cache_instance = None
+_cache_initialized = False
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Get singleton response cache configured from `qgen.response_cache`.
+
+    Returns None when caching is disabled.
+    """
+    global _cache_instance, _cache_initialized
+    if _cache_initialized:
+        return _cache_instance
+
+    with _cache_lock:
+        if _cache_initialized:
+            return _cache_instance
+
+        settings = get_qgen_settings().get("response_cache") or {}
+        if settings.get("enabled", False):
+            backend_name = settings.get("backend", "memory")
+            max_entries = int(settings.get("max_entries", DEFAULT_MAX_ENTRIES))
+            try:
+                if backend_name == "redis":
+                    backend = RedisCacheBackend(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+                elif backend_name == "sqlite":
+                    backend = SQLiteCacheBackend(settings.get("sqlite_path", "cache/llm_responses.db"), max_entries)
+                else:
+                    backend = MemoryCacheBackend(max_entries)
+                _cache_instance = ResponseCache(backend, float(settings.get("ttl_seconds", DEFAULT_TTL_SECONDS)))
+                logger.info(f"LLM response cache enabled (backend: {backend_name})")
+            except Exception as e:
+                logger.warning(f"Failed to initialize LLM response cache, continuing without it: {e}")
+        _cache_initialized = True
+    return _cache_instance
@@ -0,0 +1,319 @@
+"""
+Adaptive provider routing
+
+Keeps rolling (EWMA) latency, error-rate and throughput statistics per
+provider/model and routes each call of an agent to the best available
+backend within the agent's allowed set (`qgen.agents.<agent>.routing`).
+Backends whose circuit is open are skipped, and a provider error fails over
+to the next best backend, so traffic shifts away from a degraded vendor
+without a redeploy or a different `llm_provider` in the request.
+
+Statistics are kept in-process; with `qgen.routing.backend: redis` each
+worker also publishes its view and routes on the call-weighted average of
+all workers.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import redis
+
+from app.logger import get_logger
+from app.services.qgen.llm.agent_llm import AgentLLM, build_output, is_provider_error, output_items
+from app.services.qgen.llm.provider_health import ProviderUnavailableError
+from app.services.qgen.llm.response_cache import ResponseCache, make_cache_key
+from app.services.qgen.llm.usage import record_llm_usage
+from app.services.qgen.utils.settings import get_qgen_settings
+
+logger = get_logger(__name__)
+
+
+class ProviderStats:
+    """EWMA latency, error rate and throughput for one provider/model."""
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.latency = None
+        self.error_rate = 0.0
+        self.calls_per_minute = 0.0
+        self.calls = 0
+        self._last_call = None
+
+    def record(self, latency: float, success: bool) -> None:
+        now = time.time()
+        if success:
+            self.latency = latency if self.latency is None else (
+                self.alpha * latency + (1 - self.alpha) * self.latency
+            )
+        self.error_rate = self.alpha * (0.0 if success else 1.0) + (1 - self.alpha) * self.error_rate
+        if self._last_call is not None:
+            instant_rate = 60 / max(now - self._last_call, 1e-3)
+            self.calls_per_minute = self.alpha * instant_rate + (1 - self.alpha) * self.calls_per_minute
+        self._last_call = now
+        self.calls += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "latency": self.latency,
+            "error_rate": self.error_rate,
+            "calls_per_minute": self.calls_per_minute,
+            "calls": self.calls
+        }
+
+
+class ProviderRouter:
+    """Ranks provider/model backends by latency penalised by error rate."""
+
+    REDIS_KEY_PREFIX = "qgen:llm_router"
+
+    def __init__(self, alpha: float = 0.2, error_penalty: float = 5.0,
+                 exploration_rate: float = 0.05, redis_url: Optional[str] = None,
+                 refresh_seconds: float = 10, stats_ttl_seconds: int = 600):
+        self.alpha = alpha
+        self.error_penalty = error_penalty
+        self.exploration_rate = exploration_rate
+        self.redis_url = redis_url
+        self.refresh_seconds = refresh_seconds
+        self.stats_ttl_seconds = stats_ttl_seconds
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, ProviderStats] = {}
+        self._shared: Dict[str, Dict[str, Any]] = {}
+        self._last_refresh = 0.0
+        self._worker_id = uuid.uuid4().hex
+        self._redis_client = None
+
+    @property
+    def redis_client(self):
+        """Lazy Redis client, only used when a Redis URL is configured."""
+        if self.redis_url and self._redis_client is None:
+            self._redis_client = redis.from_url(
+                self.redis_url, decode_responses=True, socket_connect_timeout=2
+            )
+        return self._redis_client
+
+    # ---- statistics ---------------------------------------------------------
+
+    def record(self, backend: str, latency: float, success: bool) -> None:
+        """Record the outcome of a call to a backend ("provider:model")."""
+        with self._lock:
+            stats = self._stats.setdefault(backend, ProviderStats(self.alpha))
+            stats.record(latency, success)
+
+    def get_stats(self, backend: str) -> Dict[str, Any]:
+        """Return the statistics used for routing (shared across workers when enabled)."""
+        self._maybe_sync()
+        with self._lock:
+            if backend in self._shared:
+                return dict(self._shared[backend])
+            stats = self._stats.get(backend)
+            return stats.to_dict() if stats else {"latency": None, "error_rate": 0.0, "calls": 0}
+
+    def _maybe_sync(self) -> None:
+        """Publish local stats to Redis and pull the fleet-wide view every `refresh_seconds`."""
+        if self.redis_client is None or time.time() - self._last_refresh < self.refresh_seconds:
+            return
+        self._last_refresh = time.time()
+
+        try:
+            with self._lock:
+                local = {backend: stats.to_dict() for backend, stats in self._stats.items()}
+            pipe = self.redis_client.pipeline()
+            for backend, stats in local.items():
+                key = f"{self.REDIS_KEY_PREFIX}:{backend}"
+                pipe.hset(key, self._worker_id, json.dumps(stats))
+                pipe.expire(key, self.stats_ttl_seconds)
+            pipe.execute()
+
+            shared = {}
+            for key in self.redis_client.scan_iter(f"{self.REDIS_KEY_PREFIX}:*"):
+                backend = key[len(self.REDIS_KEY_PREFIX) + 1:]
+                views = [json.loads(v) for v in self.redis_client.hgetall(key).values()]
+                shared[backend] = self._merge(views)
+            with self._lock:
+                self._shared = shared
+        except Exception as e:
+            logger.warning(f"Provider router Redis sync failed, routing on local stats: {e}")
+
+    @staticmethod
+    def _merge(views: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Call-weighted average of several workers' statistics."""
+        calls = sum(v.get("calls", 0) for v in views)
+        if not calls:
+            return {"latency": None, "error_rate": 0.0, "calls_per_minute": 0.0, "calls": 0}
+        latencies = [(v["latency"], v["calls"]) for v in views if v.get("latency") is not None]
+        latency_calls = sum(c for _, c in latencies)
+        return {
+            "latency": sum(l * c for l, c in latencies) / latency_calls if latency_calls else None,
+            "error_rate": sum(v["error_rate"] * v["calls"] for v in views) / calls,
+            "calls_per_minute": sum(v.get("calls_per_minute", 0.0) for v in views),
+            "calls": calls
+        }
+
+    # ---- routing ------------------------------------------------------------
+
+    def score(self, backend: str) -> float:
+        """Lower is better. Backends without latency samples score 0 so they get tried."""
+        stats = self.get_stats(backend)
+        if stats.get("latency") is None:
+            return 0.0
+        return stats["latency"] * (1 + self.error_penalty * stats["error_rate"])
+
+    def rank(self, backends: List[str]) -> List[str]:
+        """Order backends best first, occasionally promoting a random one to keep stats fresh."""
+        ranked = sorted(backends, key=self.score)
+        if len(ranked) > 1 and random.random() < self.exploration_rate:
+            explored = random.choice(ranked[1:])
+            ranked.remove(explored)
+            ranked.insert(0, explored)
+        return ranked
+
+
+class RoutedLLM:
+    """
+    Agent LLM that routes each call to the best available backend.
+
+    Candidates are AgentLLM instances (without their own cache); the routed
+    call is cached once, independent of the backend that answered it.
+    """
+
+    def __init__(self, candidates: Dict[str, AgentLLM], primary: str, router: ProviderRouter,
+                 response_cache: Optional[ResponseCache] = None, output_schema: Optional[type] = None,
+                 cache_key_parts: Tuple = (), max_attempts: int = 2):
+        self.candidates = candidates
+        self.primary = primary
+        self.router = router
+        self.response_cache = response_cache if output_schema is not None else None
+        self.output_schema = output_schema
+        self.cache_key_parts = cache_key_parts
+        self.max_attempts = max_attempts
+
+    @property
+    def provider(self) -> str:
+        return self.candidates[self.primary].provider
+
+    def _available(self) -> List[str]:
+        available = [
+            backend for backend, llm in self.candidates.items()
+            if llm.health_monitor.is_available(llm.provider)
+        ]
+        if not available:
+            primary = self.candidates[self.primary]
+            raise ProviderUnavailableError(primary.provider, primary.health_monitor.get_state(primary.provider))
+        return self.router.rank(available)[:self.max_attempts]
+
+    def _cache_lookup(self, messages: Any) -> Tuple[Optional[str], Any]:
+        if self.response_cache is None:
+            return None, None
+        key = make_cache_key(self.cache_key_parts, messages)
+        cached = self.response_cache.get(key, self.output_schema)
+        if cached is not None:
+            primary = self.candidates[self.primary]
+            record_llm_usage(primary.agent_name, primary.provider, primary.model, cache_hit=True)
+        return key, cached
+
+    def _cache_store(self, key: Optional[str], response: Any) -> None:
+        if key is not None and isinstance(response, self.output_schema):
+            self.response_cache.set(key, response)
+
+    def invoke(self, messages: Any, config: Optional[dict] = None, **kwargs) -> Any:
+        key, cached = self._cache_lookup(messages)
+        if cached is not None:
+            return cached
+
+        last_error = None
+        for backend in self._available():
+            started = time.time()
+            try:
+                response = self.candidates[backend].invoke(messages, config=config, **kwargs)
+            except Exception as e:
+                if not is_provider_error(e):
+                    raise
+                self.router.record(backend, time.time() - started, success=False)
+                logger.warning(f"Routed call to {backend} failed, trying next backend: {e}")
+                last_error = e
+                continue
+            self.router.record(backend, time.time() - started, success=True)
+            self._cache_store(key, response)
+            return response
+        raise last_error
+
+    async def ainvoke(self, messages: Any, config: Optional[dict] = None, **kwargs) -> Any:
+        key, cached = self._cache_lookup(messages)
+        if cached is not None:
+            return cached
+
+        last_error = None
+        for backend in self._available():
+            started = time.time()
+            try:
+                response = await self.candidates[backend].ainvoke(messages, config=config, **kwargs)
+            except Exception as e:
+                if not is_provider_error(e):
+                    raise
+                self.router.record(backend, time.time() - started, success=False)
+                logger.warning(f"Routed call to {backend} failed, trying next backend: {e}")
+                last_error = e
+                continue
+            self.router.record(backend, time.time() - started, success=True)
+            self._cache_store(key, response)
+            return response
+        raise last_error
+
+    def stream_items(self, messages: Any, item_key: str, config: Optional[dict] = None,
+                     **kwargs) -> Iterator[Dict[str, Any]]:
+        """
+        Stream from the best available backend, yielding `item_key` objects as they close.
+
+        There is no failover once a stream has started; callers fall back to `invoke`.
+        """
+        key, cached = self._cache_lookup(messages)
+        if cached is not None:
+            yield from output_items(cached, item_key)
+            return
+
+        backend = self._available()[0]
+        started = time.time()
+        items = []
+        try:
+            for item in self.candidates[backend].stream_items(messages, item_key, config=config, **kwargs):
+                items.append(item)
+                yield item
+        except Exception as e:
+            if is_provider_error(e):
+                self.router.record(backend, time.time() - started, success=False)
+            raise
+        self.router.record(backend, time.time() - started, success=True)
+        self._cache_store(key, build_output(self.output_schema, item_key, items))
+
+
+# Singleton instance for reuse across agents and Celery tasks
+_router_instance = None
+_router_lock = threading.Lock()
+
+
+def get_provider_router() -> ProviderRouter:
+    """
+    Get singleton provider router configured from `qgen.routing`.
+    """
+    global _router_instance
+    if _router_instance is None:
+        with _router_lock:
+            if _router_instance is None:
+                settings = get_qgen_settings().get("routing") or {}
+                redis_url = None
+                if settings.get("backend", "memory") == "redis":
+                    redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+                _router_instance = ProviderRouter(
+                    alpha=settings.get("ewma_alpha", 0.2),
+                    error_penalty=settings.get("error_penalty", 5.0),
+                    exploration_rate=settings.get("exploration_rate", 0.05),
+                    redis_url=redis_url,
+                    refresh_seconds=settings.get("refresh_seconds", 10)
+                )
+    return _router_instance
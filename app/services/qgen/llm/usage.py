@@ -0,0 +1,150 @@
+"""
+LLM token and cost accounting
+
+Every provider call made through AgentLLM reports its prompt, completion and
+cached tokens and its latency to the usage tracker of the current run (set
+with `use_usage_tracker`). Responses served from the response cache are
+counted as cache hits without tokens. The run's totals end up in
+`AgentResult.metadata`, the task result and the `llm_usage_records` table.
+
+Costs are estimated from `qgen.usage.pricing` (USD per million tokens, keyed
+by model name).
+"""
+
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.qgen.utils.settings import get_qgen_settings
+
+# Usage tracker of the current run
+_current_usage_tracker: contextvars.ContextVar[Optional['UsageTracker']] = contextvars.ContextVar(
+    "qgen_usage_tracker", default=None
+)
+
+USAGE_FIELDS = ("calls", "cache_hits", "prompt_tokens", "completion_tokens", "cached_tokens", "total_tokens")
+
+
+def extract_token_usage(message: Any) -> Dict[str, int]:
+    """Return prompt, completion and cached token counts from a raw LLM response message."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    if usage:
+        details = usage.get("input_token_details") or {}
+        return {
+            "prompt_tokens": usage.get("input_tokens") or 0,
+            "completion_tokens": usage.get("output_tokens") or 0,
+            "cached_tokens": details.get("cache_read") or 0
+        }
+
+    # Older integrations only report usage in the response metadata
+    metadata = getattr(message, "response_metadata", None) or {}
+    token_usage = metadata.get("token_usage") or metadata.get("usage") or {}
+    details = token_usage.get("prompt_tokens_details") or {}
+    return {
+        "prompt_tokens": token_usage.get("prompt_tokens") or 0,
+        "completion_tokens": token_usage.get("completion_tokens") or 0,
+        "cached_tokens": details.get("cached_tokens") or 0
+    }
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> Optional[float]:
+    """Estimated cost in USD from `qgen.usage.pricing`; None if the model has no price."""
+    pricing = ((get_qgen_settings().get("usage") or {}).get("pricing") or {}).get(model)
+    if not pricing:
+        return None
+    input_price = pricing.get("input", 0.0)
+    cached_price = pricing.get("cached_input", input_price)
+    cost = (
+        (prompt_tokens - cached_tokens) * input_price
+        + cached_tokens * cached_price
+        + completion_tokens * pricing.get("output", 0.0)
+    )
+    return round(cost / 1_000_000, 6)
+
+
+class UsageTracker:
+    """Thread-safe token, latency and cost totals per agent, provider and model for one run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+
+    def record(self, agent_name: Optional[str], provider: str, model: str,
+               prompt_tokens: int = 0, completion_tokens: int = 0, cached_tokens: int = 0,
+               latency_seconds: float = 0.0, cache_hit: bool = False) -> None:
+        key = (agent_name or "unknown", provider, model)
+        with self._lock:
+            totals = self._totals.setdefault(key, {field: 0 for field in USAGE_FIELDS} | {"latency_seconds": 0.0})
+            totals["calls"] += 1
+            totals["cache_hits"] += int(cache_hit)
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+            totals["cached_tokens"] += cached_tokens
+            totals["total_tokens"] += prompt_tokens + completion_tokens
+            totals["latency_seconds"] += latency_seconds
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Totals per (agent, provider, model), with estimated cost."""
+        with self._lock:
+            items = [(key, dict(totals)) for key, totals in self._totals.items()]
+        records = []
+        for (agent_name, provider, model), totals in items:
+            totals["latency_seconds"] = round(totals["latency_seconds"], 3)
+            totals["estimated_cost_usd"] = estimate_cost(
+                model, totals["prompt_tokens"], totals["completion_tokens"], totals["cached_tokens"]
+            )
+            records.append({"agent_name": agent_name, "provider": provider, "model": model, **totals})
+        return records
+
+    @staticmethod
+    def _sum(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        summary = {field: sum(r[field] for r in records) for field in USAGE_FIELDS}
+        summary["latency_seconds"] = round(sum(r["latency_seconds"] for r in records), 3)
+        costs = [r["estimated_cost_usd"] for r in records if r["estimated_cost_usd"] is not None]
+        summary["estimated_cost_usd"] = round(sum(costs), 6) if costs else None
+        return summary
+
+    def summary(self, agent_name: Optional[str] = None) -> Dict[str, Any]:
+        """Totals for the run, or for one agent."""
+        records = [r for r in self.records() if agent_name is None or r["agent_name"] == agent_name]
+        return self._sum(records)
+
+    def report(self) -> Dict[str, Any]:
+        """Run totals with breakdowns by agent and by provider/model."""
+        records = self.records()
+        by_agent: Dict[str, List[Dict[str, Any]]] = {}
+        by_model: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records:
+            by_agent.setdefault(record["agent_name"], []).append(record)
+            by_model.setdefault(f"{record['provider']}:{record['model']}", []).append(record)
+        return {
+            "total": self._sum(records),
+            "by_agent": {name: self._sum(items) for name, items in by_agent.items()},
+            "by_model": {name: self._sum(items) for name, items in by_model.items()},
+            "records": records
+        }
+
+
+@contextmanager
+def use_usage_tracker(tracker: Optional[UsageTracker]):
+    """Make `tracker` collect the LLM usage of this context."""
+    token = _current_usage_tracker.set(tracker)
+    try:
+        yield
+    finally:
+        _current_usage_tracker.reset(token)
+
+
+def get_current_usage_tracker() -> Optional[UsageTracker]:
+    return _current_usage_tracker.get()
+
+
+def record_llm_usage(agent_name: Optional[str], provider: str, model: str, raw_response: Any = None,
+                     latency_seconds: float = 0.0, cache_hit: bool = False) -> None:
+    """Add one call to the current run's tracker (no-op outside a tracked run)."""
+    tracker = _current_usage_tracker.get()
+    if tracker is None:
+        return
+    tokens = extract_token_usage(raw_response) if raw_response is not None else {}
+    tracker.record(agent_name, provider, model, latency_seconds=latency_seconds, cache_hit=cache_hit, **tokens)
@@ -12,6 +12,7 @@ class LLMProvider(str, Enum):
     GROQ = "groq"
     AZURE_OPENAI = "azure_openai"
     PORTKEY = "portkey"
+    FAKE = "fake"
 
 class LLMConfig(BaseModel):
     provider: LLMProvider
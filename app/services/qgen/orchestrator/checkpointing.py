@@ -0,0 +1,354 @@
+"""
+Durable checkpointing for the multi-agent workflow
+
+Stores LangGraph checkpoints in the application database so that a failed
+run can be resumed from the last completed agent instead of starting again
+from skill extraction. Retention is bounded per thread and by age.
+Configured under `qgen.checkpointing`.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP, BaseCheckpointSaver, ChannelVersions, Checkpoint,
+    CheckpointMetadata, CheckpointTuple, get_checkpoint_id, get_checkpoint_metadata
+)
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.types import TASKS
+
+from app.db_ops.database import SessionLocal, engine
+from app.db_ops.models import WorkflowCheckpoint, WorkflowCheckpointWrite
+from app.logger import get_logger
+from app.services.qgen.utils.settings import get_qgen_settings
+
+logger = get_logger(__name__)
+
+DEFAULT_RETENTION_HOURS = 24
+DEFAULT_MAX_CHECKPOINTS_PER_THREAD = 20
+PRUNE_INTERVAL_SECONDS = 300
+
+
+class SQLAlchemyCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    LangGraph checkpointer backed by the application's SQLAlchemy database.
+
+    Each thread keeps at most `max_checkpoints_per_thread` checkpoints, and
+    threads whose latest checkpoint is older than `retention_hours` are pruned
+    opportunistically on write.
+    """
+
+    def __init__(self, session_factory=SessionLocal,
+                 retention_hours: float = DEFAULT_RETENTION_HOURS,
+                 max_checkpoints_per_thread: int = DEFAULT_MAX_CHECKPOINTS_PER_THREAD,
+                 serde=None):
+        super().__init__(serde=serde)
+        self.session_factory = session_factory
+        self.retention = timedelta(hours=retention_hours)
+        self.max_checkpoints_per_thread = max(1, max_checkpoints_per_thread)
+        self._prune_lock = threading.Lock()
+        self._last_prune = 0.0
+
+    # Reads
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Return the requested checkpoint, or the latest one for the thread."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+
+        with self.session_factory() as db:
+            query = db.query(WorkflowCheckpoint).filter(
+                WorkflowCheckpoint.thread_id == thread_id,
+                WorkflowCheckpoint.checkpoint_ns == checkpoint_ns
+            )
+            if checkpoint_id := get_checkpoint_id(config):
+                row = query.filter(WorkflowCheckpoint.checkpoint_id == checkpoint_id).first()
+            else:
+                row = query.order_by(WorkflowCheckpoint.checkpoint_id.desc()).first()
+
+            if row is None:
+                return None
+            return self._to_tuple(db, row)
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        """List checkpoints, newest first, optionally filtered by thread, metadata and position."""
+        with self.session_factory() as db:
+            query = db.query(WorkflowCheckpoint)
+            if config:
+                query = query.filter(WorkflowCheckpoint.thread_id == config["configurable"]["thread_id"])
+                checkpoint_ns = config["configurable"].get("checkpoint_ns")
+                if checkpoint_ns is not None:
+                    query = query.filter(WorkflowCheckpoint.checkpoint_ns == checkpoint_ns)
+                if checkpoint_id := get_checkpoint_id(config):
+                    query = query.filter(WorkflowCheckpoint.checkpoint_id == checkpoint_id)
+            if before and (before_id := get_checkpoint_id(before)):
+                query = query.filter(WorkflowCheckpoint.checkpoint_id < before_id)
+
+            tuples = []
+            for row in query.order_by(WorkflowCheckpoint.checkpoint_id.desc()):
+                if limit is not None and len(tuples) >= limit:
+                    break
+                metadata = self.serde.loads_typed((row.metadata_type, row.checkpoint_metadata))
+                if filter and not all(metadata.get(k) == v for k, v in filter.items()):
+                    continue
+                tuples.append(self._to_tuple(db, row, metadata))
+
+        yield from tuples
+
+    def _to_tuple(self, db, row: WorkflowCheckpoint,
+                  metadata: Optional[CheckpointMetadata] = None) -> CheckpointTuple:
+        """Build a CheckpointTuple (with pending writes and sends) from a stored row."""
+        writes = self._load_writes(db, row.thread_id, row.checkpoint_ns, row.checkpoint_id)
+        sends = []
+        if row.parent_checkpoint_id:
+            sends = [
+                self.serde.loads_typed((w.value_type, w.value))
+                for w in sorted(
+                    self._load_writes(db, row.thread_id, row.checkpoint_ns, row.parent_checkpoint_id),
+                    key=lambda w: (w.task_path, w.task_id, w.idx)
+                )
+                if w.channel == TASKS
+            ]
+
+        if metadata is None:
+            metadata = self.serde.loads_typed((row.metadata_type, row.checkpoint_metadata))
+
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": row.thread_id,
+                    "checkpoint_ns": row.checkpoint_ns,
+                    "checkpoint_id": row.checkpoint_id
+                }
+            },
+            checkpoint={
+                **self.serde.loads_typed((row.checkpoint_type, row.checkpoint)),
+                "pending_sends": sends
+            },
+            metadata=metadata,
+            pending_writes=[
+                (w.task_id, w.channel, self.serde.loads_typed((w.value_type, w.value)))
+                for w in writes
+            ],
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": row.thread_id,
+                        "checkpoint_ns": row.checkpoint_ns,
+                        "checkpoint_id": row.parent_checkpoint_id
+                    }
+                }
+                if row.parent_checkpoint_id
+                else None
+            )
+        )
+
+    @staticmethod
+    def _load_writes(db, thread_id: str, checkpoint_ns: str, checkpoint_id: str):
+        return db.query(WorkflowCheckpointWrite).filter(
+            WorkflowCheckpointWrite.thread_id == thread_id,
+            WorkflowCheckpointWrite.checkpoint_ns == checkpoint_ns,
+            WorkflowCheckpointWrite.checkpoint_id == checkpoint_id
+        ).order_by(WorkflowCheckpointWrite.task_id, WorkflowCheckpointWrite.idx).all()
+
+    # Writes
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint,
+            metadata: CheckpointMetadata, new_versions: ChannelVersions) -> RunnableConfig:
+        """Store a checkpoint and trim the thread to the retention limit."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+
+        c = checkpoint.copy()
+        c.pop("pending_sends", None)
+        checkpoint_type, checkpoint_data = self.serde.dumps_typed(c)
+        metadata_type, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        with self.session_factory() as db:
+            db.merge(WorkflowCheckpoint(
+                thread_id=thread_id,
+                checkpoint_ns=checkpoint_ns,
+                checkpoint_id=checkpoint["id"],
+                parent_checkpoint_id=config["configurable"].get("checkpoint_id"),
+                checkpoint_type=checkpoint_type,
+                checkpoint=checkpoint_data,
+                metadata_type=metadata_type,
+                checkpoint_metadata=metadata_data,
+                created_at=datetime.utcnow()
+            ))
+            db.flush()
+            self._trim_thread(db, thread_id, checkpoint_ns)
+            db.commit()
+
+        self._maybe_prune_expired()
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"]
+            }
+        }
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]],
+                   task_id: str, task_path: str = "") -> None:
+        """Store the pending writes of a task against a checkpoint."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        with self.session_factory() as db:
+            existing = {
+                w.idx for w in db.query(WorkflowCheckpointWrite.idx).filter(
+                    WorkflowCheckpointWrite.thread_id == thread_id,
+                    WorkflowCheckpointWrite.checkpoint_ns == checkpoint_ns,
+                    WorkflowCheckpointWrite.checkpoint_id == checkpoint_id,
+                    WorkflowCheckpointWrite.task_id == task_id
+                )
+            }
+            for idx, (channel, value) in enumerate(writes):
+                write_idx = WRITES_IDX_MAP.get(channel, idx)
+                # Special writes (errors, interrupts) overwrite; regular writes are written once
+                if write_idx >= 0 and write_idx in existing:
+                    continue
+                value_type, value_data = self.serde.dumps_typed(value)
+                db.merge(WorkflowCheckpointWrite(
+                    thread_id=thread_id,
+                    checkpoint_ns=checkpoint_ns,
+                    checkpoint_id=checkpoint_id,
+                    task_id=task_id,
+                    idx=write_idx,
+                    channel=channel,
+                    value_type=value_type,
+                    value=value_data,
+                    task_path=task_path
+                ))
+            db.commit()
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete all checkpoints and writes for a thread."""
+        with self.session_factory() as db:
+            db.query(WorkflowCheckpointWrite).filter(
+                WorkflowCheckpointWrite.thread_id == thread_id
+            ).delete(synchronize_session=False)
+            db.query(WorkflowCheckpoint).filter(
+                WorkflowCheckpoint.thread_id == thread_id
+            ).delete(synchronize_session=False)
+            db.commit()
+
+    # Retention
+
+    def _trim_thread(self, db, thread_id: str, checkpoint_ns: str) -> None:
+        """Keep only the newest `max_checkpoints_per_thread` checkpoints of a thread."""
+        stale_ids = [
+            row.checkpoint_id for row in db.query(WorkflowCheckpoint.checkpoint_id).filter(
+                WorkflowCheckpoint.thread_id == thread_id,
+                WorkflowCheckpoint.checkpoint_ns == checkpoint_ns
+            ).order_by(WorkflowCheckpoint.checkpoint_id.desc()).offset(self.max_checkpoints_per_thread)
+        ]
+        if not stale_ids:
+            return
+
+        db.query(WorkflowCheckpointWrite).filter(
+            WorkflowCheckpointWrite.thread_id == thread_id,
+            WorkflowCheckpointWrite.checkpoint_ns == checkpoint_ns,
+            WorkflowCheckpointWrite.checkpoint_id.in_(stale_ids)
+        ).delete(synchronize_session=False)
+        db.query(WorkflowCheckpoint).filter(
+            WorkflowCheckpoint.thread_id == thread_id,
+            WorkflowCheckpoint.checkpoint_ns == checkpoint_ns,
+            WorkflowCheckpoint.checkpoint_id.in_(stale_ids)
+        ).delete(synchronize_session=False)
+
+    def _maybe_prune_expired(self) -> None:
+        """Prune expired threads at most once per PRUNE_INTERVAL_SECONDS per process."""
+        now = time.monotonic()
+        with self._prune_lock:
+            if now - self._last_prune < PRUNE_INTERVAL_SECONDS:
+                return
+            self._last_prune = now
+
+        try:
+            self.prune_expired()
+        except Exception as e:
+            logger.warning(f"Failed to prune expired workflow checkpoints: {e}")
+
+    def prune_expired(self) -> int:
+        """Delete every thread with no checkpoint newer than the retention window."""
+        cutoff = datetime.utcnow() - self.retention
+        with self.session_factory() as db:
+            live_threads = db.query(WorkflowCheckpoint.thread_id).filter(
+                WorkflowCheckpoint.created_at >= cutoff
+            )
+            expired_threads = [
+                row.thread_id for row in db.query(WorkflowCheckpoint.thread_id).filter(
+                    WorkflowCheckpoint.created_at < cutoff,
+                    WorkflowCheckpoint.thread_id.notin_(live_threads)
+                ).distinct()
+            ]
+            if not expired_threads:
+                return 0
+
+            db.query(WorkflowCheckpointWrite).filter(
+                WorkflowCheckpointWrite.thread_id.in_(expired_threads)
+            ).delete(synchronize_session=False)
+            db.query(WorkflowCheckpoint).filter(
+                WorkflowCheckpoint.thread_id.in_(expired_threads)
+            ).delete(synchronize_session=False)
+            db.commit()
+
+        logger.info(f"🧹 Pruned checkpoints for {len(expired_threads)} expired workflow threads")
+        return len(expired_threads)
+
+    # Async API (graphs are run synchronously in the workers)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint,
+                   metadata: CheckpointMetadata, new_versions: ChannelVersions) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]],
+                          task_id: str, task_path: str = "") -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self.delete_thread(thread_id)
+
+
+_checkpointer: Optional[BaseCheckpointSaver] = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_workflow_checkpointer() -> BaseCheckpointSaver:
+    """Return the process-wide workflow checkpointer configured by `qgen.checkpointing`."""
+    global _checkpointer
+    with _checkpointer_lock:
+        if _checkpointer is None:
+            settings = get_qgen_settings().get("checkpointing") or {}
+            backend = settings.get("backend", "database")
+            if backend == "memory":
+                logger.info("Using in-memory workflow checkpoints (runs cannot be resumed across workers)")
+                _checkpointer = MemorySaver()
+            else:
+                # Workers may start before the API has run init_db
+                for model in (WorkflowCheckpoint, WorkflowCheckpointWrite):
+                    model.__table__.create(bind=engine, checkfirst=True)
+                _checkpointer = SQLAlchemyCheckpointSaver(
+                    retention_hours=float(settings.get("retention_hours", DEFAULT_RETENTION_HOURS)),
+                    max_checkpoints_per_thread=int(
+                        settings.get("max_checkpoints_per_thread", DEFAULT_MAX_CHECKPOINTS_PER_THREAD)
+                    )
+                )
+                logger.info("Using database-backed workflow checkpoints")
+    return _checkpointer
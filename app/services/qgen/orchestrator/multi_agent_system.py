@@ -1,23 +1,74 @@
 from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import MemorySaver
 from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableConfig
+import threading
 import time
-from typing import Literal, Optional, TYPE_CHECKING
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Literal, Optional, Tuple, TYPE_CHECKING
 from app.services.qgen.models.schemas import (
     LLMConfig, LLMProvider, MultiAgentInterviewState, ProcessingStage,
     create_initial_state
 )
+from app.services.qgen.agents.base_agent import use_stream_manager
 from app.services.qgen.agents.skill_extraction_agent import SkillExtractionAgent
 from app.services.qgen.agents.question_generation_agent import QuestionGenerationAgent
 from app.services.qgen.agents.question_evaluation_agent import QuestionEvaluationAgent
 from app.services.qgen.agents.expected_response_agent import ExpectedResponseAgent
 from app.services.qgen.agents.report_assembly_agent import ReportAssemblyAgent
+from app.services.qgen.llm.agent_llm import is_transient_error
+from app.services.qgen.llm.client_registry import get_default_model, model_for_provider
+from app.services.qgen.llm.response_cache import get_response_cache
+from app.services.qgen.llm.usage import UsageTracker, use_usage_tracker
+from app.services.qgen.orchestrator.checkpointing import get_workflow_checkpointer
+from app.services.qgen.orchestrator.pipelined_stages import PipelinedQuestionStages
+from app.services.qgen.stores.question_bank import get_question_bank
 from app.services.qgen.utils.report_formatter import format_final_report
+from app.services.qgen.utils.settings import get_agent_settings, get_qgen_settings
 from app.logger import get_logger
 
 if TYPE_CHECKING:
     from app.services.qgen.streaming.stream_manager import StreamManager
 
+logger = get_logger(__name__)
+
+# Pipeline modes (qgen.pipeline_mode)
+STAGED = "staged"
+PIPELINED = "pipelined"
+
+
+@dataclass
+class InterviewAgents:
+    """The five agents for one LLM configuration (shared across runs)."""
+    skill_extractor: SkillExtractionAgent
+    question_generator: QuestionGenerationAgent
+    question_evaluator: QuestionEvaluationAgent
+    response_generator: ExpectedResponseAgent
+    report_assembler: ReportAssemblyAgent
+
+
+@dataclass
+class InterviewRun:
+    """Per-run context passed to graph nodes through the LangGraph run config."""
+    agents: InterviewAgents
+    progress_tracker: Optional[Any] = None
+    stream_manager: Optional['StreamManager'] = None
+    usage_tracker: Optional[UsageTracker] = None
+
+
+# Graph node name -> (InterviewAgents attribute, agent name used for progress tracking)
+AGENT_NODES = {
+    "extract_skills": ("skill_extractor", "SkillExtractionAgent"),
+    "generate_questions": ("question_generator", "QuestionGenerationAgent"),
+    "evaluate_questions": ("question_evaluator", "QuestionEvaluationAgent"),
+    "generate_responses": ("response_generator", "ExpectedResponseAgent"),
+    "assemble_report": ("report_assembler", "ReportAssemblyAgent")
+}
+
+# Nodes a failed run can be resumed at
+RESUMABLE_NODES = frozenset(AGENT_NODES) | {"run_question_pipeline"}
+
+
 class MultiAgentTechnicalInterviewSystem:
     """
     Complete Multi-Agent Technical Interview System
@@ -28,56 +79,243 @@ class MultiAgentTechnicalInterviewSystem:
     3. QuestionEvaluationAgent - Evaluates question quality
     4. ExpectedResponseAgent - Generates interviewer guidance
     5. ReportAssemblyAgent - Creates final comprehensive report
+    
+    The workflow graph is compiled once per pipeline mode and agents are
+    pooled per LLM configuration; progress tracking and streaming are
+    injected per run through the LangGraph run config. Checkpoints are
+    durable, so a failed run can be resumed from its last completed agent.
     """
     
-    def __init__(self, llm_config: LLMConfig, stream_manager: Optional['StreamManager'] = None):
+    # Process-wide caches shared by all instances
+    _compiled_graphs: Dict[str, Any] = {}
+    _agent_pool: Dict[Tuple, InterviewAgents] = {}
+    _cache_lock = threading.Lock()
+    
+    def __init__(self, llm_config: LLMConfig, stream_manager: Optional['StreamManager'] = None,
+                 pipeline_mode: Optional[str] = None, progress_tracker: Optional[Any] = None):
         self.llm_config = llm_config
         self.stream_manager = stream_manager
-        self.memory = MemorySaver()
+        self.progress_tracker = progress_tracker
+        self.pipeline_mode = pipeline_mode or get_qgen_settings().get("pipeline_mode", STAGED)
         self.logger = get_logger(__name__)
         
         self.logger.info("Initializing Multi-Agent Technical Interview System")
         self.logger.info(f"LLM Configuration: Provider={llm_config.provider.value}, Model={llm_config.model}, Temperature={llm_config.temperature}")
-        self.logger.info(f"Streaming enabled: {stream_manager is not None}")
-        
-        # Initialize all agents with streaming support
-        self.logger.info("Initializing all agents...")
-        self.skill_extractor = SkillExtractionAgent(llm_config, stream_manager)
-        self.question_generator = QuestionGenerationAgent(llm_config, stream_manager)
-        self.question_evaluator = QuestionEvaluationAgent(llm_config, stream_manager)
-        self.response_generator = ExpectedResponseAgent(llm_config, stream_manager)
-        self.report_assembler = ReportAssemblyAgent(llm_config, stream_manager)
-        self.logger.info("All agents initialized successfully")
-        
-        # Build workflow
-        self.logger.info("Building multi-agent workflow...")
-        self.workflow = self._build_workflow()
-        self.agent = self.workflow.compile(checkpointer=self.memory)
+        self.logger.info(f"Streaming enabled: {stream_manager is not None}, pipeline mode: {self.pipeline_mode}")
+        
+        self.checkpointer = get_workflow_checkpointer()
+        self.agents = self._get_agents(llm_config)
+        self.agent = self._get_compiled_graph(self.pipeline_mode)
         self.logger.info("Multi-Agent Technical Interview System initialized successfully")
     
-    def _build_workflow(self) -> StateGraph:
+    @staticmethod
+    def resolve_agent_llm_config(llm_config: LLMConfig, agent_name: str) -> LLMConfig:
+        """
+        Apply an agent's `qgen.agents.<agent>.llm` tier to the run's LLM configuration.
+        
+        `provider` pins the agent to a provider; `model` (or `models.<provider>`
+        for the resolved provider) picks its model, falling back to the run's
+        model on the same provider or the provider's default model otherwise.
+        `temperature` and `max_tokens` override the run's values.
+        """
+        tier = get_agent_settings(agent_name).get("llm") or {}
+        if not tier:
+            return llm_config
+        
+        provider = LLMProvider(tier["provider"]) if tier.get("provider") else llm_config.provider
+        model = (
+            tier.get("model")
+            or (tier.get("models") or {}).get(provider.value)
+            or model_for_provider(provider, llm_config)
+        )
+        return LLMConfig(
+            provider=provider,
+            model=model,
+            temperature=tier.get("temperature", llm_config.temperature),
+            max_tokens=tier.get("max_tokens", llm_config.max_tokens)
+        )
+    
+    @classmethod
+    def _get_agents(cls, llm_config: LLMConfig) -> InterviewAgents:
+        """
+        Return the pooled agents for an LLM configuration, creating them on first use.
+        
+        Pooled agents make no availability decisions at construction; circuit
+        checks, routing and hedging are decided on every call.
+        """
+        key = (llm_config.provider.value, llm_config.model, llm_config.temperature, llm_config.max_tokens)
+        
+        with cls._cache_lock:
+            agents = cls._agent_pool.get(key)
+            if agents is None:
+                logger.info(f"Initializing agents for LLM configuration {key}")
+                configs = {
+                    agent_name: cls.resolve_agent_llm_config(llm_config, agent_name)
+                    for _, agent_name in AGENT_NODES.values()
+                }
+                for agent_name, config in configs.items():
+                    if config != llm_config:
+                        logger.info(f"{agent_name} tier: {config.provider.value}/{config.model}, "
+                                    f"temperature={config.temperature}, max_tokens={config.max_tokens}")
+                agents = InterviewAgents(
+                    skill_extractor=SkillExtractionAgent(configs["SkillExtractionAgent"]),
+                    question_generator=QuestionGenerationAgent(configs["QuestionGenerationAgent"]),
+                    question_evaluator=QuestionEvaluationAgent(configs["QuestionEvaluationAgent"]),
+                    response_generator=ExpectedResponseAgent(configs["ExpectedResponseAgent"]),
+                    report_assembler=ReportAssemblyAgent(configs["ReportAssemblyAgent"])
+                )
+                cls._agent_pool[key] = agents
+                logger.info("All agents initialized successfully")
+        return agents
+    
+    @classmethod
+    def _get_compiled_graph(cls, pipeline_mode: str):
+        """Return the compiled workflow for a pipeline mode, compiling it once per process."""
+        with cls._cache_lock:
+            graph = cls._compiled_graphs.get(pipeline_mode)
+            if graph is None:
+                logger.info(f"Compiling multi-agent workflow (pipeline mode: {pipeline_mode})")
+                graph = cls._build_workflow(pipeline_mode).compile(checkpointer=get_workflow_checkpointer())
+                cls._compiled_graphs[pipeline_mode] = graph
+        return graph
+    
+    @property
+    def skill_extractor(self) -> SkillExtractionAgent:
+        return self.agents.skill_extractor
+    
+    @property
+    def question_generator(self) -> QuestionGenerationAgent:
+        return self.agents.question_generator
+    
+    @property
+    def question_evaluator(self) -> QuestionEvaluationAgent:
+        return self.agents.question_evaluator
+    
+    @property
+    def response_generator(self) -> ExpectedResponseAgent:
+        return self.agents.response_generator
+    
+    @property
+    def report_assembler(self) -> ReportAssemblyAgent:
+        return self.agents.report_assembler
+    
+    @staticmethod
+    def _detach_state(state: MultiAgentInterviewState) -> MultiAgentInterviewState:
+        """
+        Copy the state's lists before an agent runs.
+        
+        Agents append to state lists in place, and the checkpoint a failed run
+        resumes from holds the same lists, so without copies it would also hold
+        the failed agent's results and errors.
+        """
+        return {key: list(value) if isinstance(value, list) else value for key, value in state.items()}
+    
+    @classmethod
+    def _agent_node(cls, agent_attr: str, agent_name: str):
+        """Create a graph node that runs an agent with the run's progress tracker and stream manager."""
+        def run_agent(state: MultiAgentInterviewState, config: RunnableConfig) -> MultiAgentInterviewState:
+            run: InterviewRun = config["configurable"]["interview_run"]
+            agent = getattr(run.agents, agent_attr)
+            
+            if run.progress_tracker:
+                run.progress_tracker.update_agent_progress(agent_name, 0)
+            
+            state = cls._detach_state(state)
+            recorded = len(state["agent_results"])
+            with use_stream_manager(run.stream_manager), use_usage_tracker(run.usage_tracker):
+                result = agent.execute(state)
+                agent.stream_result_sync(result, since=recorded)
+            
+            if run.progress_tracker:
+                run.progress_tracker.update_agent_progress(agent_name, 100)
+            return result
+        
+        return run_agent
+    
+    @classmethod
+    def _run_question_pipeline(cls, state: MultiAgentInterviewState, config: RunnableConfig) -> MultiAgentInterviewState:
+        """Run generation, evaluation and expected responses as one overlapped stage."""
+        run: InterviewRun = config["configurable"]["interview_run"]
+        stages = PipelinedQuestionStages(
+            run.agents.question_generator,
+            run.agents.question_evaluator,
+            run.agents.response_generator,
+            progress_callback=run.progress_tracker.update_agent_progress if run.progress_tracker else None
+        )
+        with use_stream_manager(run.stream_manager), use_usage_tracker(run.usage_tracker):
+            return stages.execute(cls._detach_state(state))
+    
+    @classmethod
+    def _build_workflow(cls, pipeline_mode: str = STAGED) -> StateGraph:
         """Build the complete multi-agent workflow."""
         
-        self.logger.info("Building multi-agent workflow with 5 agents")
+        logger.info("Building multi-agent workflow with 5 agents")
         workflow = StateGraph(MultiAgentInterviewState)
         
         # Add all agent nodes
-        workflow.add_node("extract_skills", self.skill_extractor.execute)
-        workflow.add_node("generate_questions", self.question_generator.execute)
-        workflow.add_node("evaluate_questions", self.question_evaluator.execute)
-        workflow.add_node("generate_responses", self.response_generator.execute)
-        workflow.add_node("assemble_report", self.report_assembler.execute)
-        workflow.add_node("handle_error", self._handle_error)
+        workflow.add_node("extract_skills", cls._agent_node(*AGENT_NODES["extract_skills"]))
+        workflow.add_node("assemble_report", cls._agent_node(*AGENT_NODES["assemble_report"]))
+        workflow.add_node("handle_error", cls._handle_error)
         
         # Set entry point
         workflow.add_edge(START, "extract_skills")
-        self.logger.info("Workflow entry point set to skill extraction")
+        logger.info("Workflow entry point set to skill extraction")
         
         # Define workflow transitions
-        self.logger.info("Setting up workflow transitions and conditional routing")
+        logger.info("Setting up workflow transitions and conditional routing")
+        cls._add_question_stages(workflow, pipeline_mode)
+        
+        workflow.add_conditional_edges(
+            "assemble_report",
+            cls._route_from_report_assembly,
+            {
+                "complete": END,
+                "error": "handle_error"
+            }
+        )
+        
+        # Error handling leads to END
+        workflow.add_edge("handle_error", END)
+        logger.info("Multi-agent workflow built successfully with error handling")
+        
+        return workflow
+    
+    @classmethod
+    def _add_question_stages(cls, workflow: StateGraph, pipeline_mode: str) -> None:
+        """
+        Add the nodes between skill extraction and report assembly.
+
+        In "staged" mode questions are generated, evaluated and answered by three
+        sequential nodes. In "pipelined" mode a single node overlaps the three
+        stages per question, with report assembly as the only barrier.
+        """
+        if pipeline_mode == PIPELINED:
+            logger.info("Using pipelined question stages")
+            workflow.add_node("run_question_pipeline", cls._run_question_pipeline)
+            workflow.add_conditional_edges(
+                "extract_skills",
+                cls._route_from_skill_extraction,
+                {
+                    "generate_questions": "run_question_pipeline",
+                    "error": "handle_error"
+                }
+            )
+            workflow.add_conditional_edges(
+                "run_question_pipeline",
+                cls._route_from_response_generation,
+                {
+                    "assemble_report": "assemble_report",
+                    "error": "handle_error"
+                }
+            )
+            return
+        
+        for node_name in ("generate_questions", "evaluate_questions", "generate_responses"):
+            workflow.add_node(node_name, cls._agent_node(*AGENT_NODES[node_name]))
+        
         workflow.add_conditional_edges(
             "extract_skills",
-            self._route_from_skill_extraction,
+            cls._route_from_skill_extraction,
             {
                 "generate_questions": "generate_questions",
                 "error": "handle_error"
@@ -86,7 +324,7 @@ class MultiAgentTechnicalInterviewSystem:
         
         workflow.add_conditional_edges(
             "generate_questions", 
-            self._route_from_question_generation,
+            cls._route_from_question_generation,
             {
                 "evaluate_questions": "evaluate_questions",
                 "error": "handle_error"
@@ -95,7 +333,7 @@ class MultiAgentTechnicalInterviewSystem:
         
         workflow.add_conditional_edges(
             "evaluate_questions",
-            self._route_from_question_evaluation,
+            cls._route_from_question_evaluation,
             {
                 "generate_responses": "generate_responses",
                 "error": "handle_error"
@@ -104,110 +342,101 @@ class MultiAgentTechnicalInterviewSystem:
         
         workflow.add_conditional_edges(
             "generate_responses",
-            self._route_from_response_generation,
+            cls._route_from_response_generation,
             {
                 "assemble_report": "assemble_report",
                 "error": "handle_error"
             }
         )
-        
-        workflow.add_conditional_edges(
-            "assemble_report",
-            self._route_from_report_assembly,
-            {
-                "complete": END,
-                "error": "handle_error"
-            }
-        )
-        
-        # Error handling leads to END
-        workflow.add_edge("handle_error", END)
-        self.logger.info("Multi-agent workflow built successfully with error handling")
-        
-        return workflow
     
-    def _route_from_skill_extraction(self, state: MultiAgentInterviewState) -> str:
+    @staticmethod
+    def _route_from_skill_extraction(state: MultiAgentInterviewState) -> str:
         """Route after skill extraction."""
         stage = state["processing_stage"]
-        self.logger.info(f"Routing from skill extraction, current stage: {stage}")
+        logger.info(f"Routing from skill extraction, current stage: {stage}")
         
         if stage == ProcessingStage.ERROR:
-            self.logger.error("Skill extraction failed, routing to error handler")
+            logger.error("Skill extraction failed, routing to error handler")
             return "error"
         elif stage == ProcessingStage.SKILLS_EXTRACTED:
-            self.logger.info("Skill extraction successful, routing to question generation")
+            logger.info("Skill extraction successful, routing to question generation")
             return "generate_questions"
         else:
-            self.logger.error(f"Unexpected processing stage after skill extraction: {stage}")
+            logger.error(f"Unexpected processing stage after skill extraction: {stage}")
             return "error"
     
-    def _route_from_question_generation(self, state: MultiAgentInterviewState) -> str:
+    @staticmethod
+    def _route_from_question_generation(state: MultiAgentInterviewState) -> str:
         """Route after question generation."""
         stage = state["processing_stage"]
-        self.logger.info(f"Routing from question generation, current stage: {stage}")
+        logger.info(f"Routing from question generation, current stage: {stage}")
         
         if stage == ProcessingStage.ERROR:
-            self.logger.error("Question generation failed, routing to error handler")
+            logger.error("Question generation failed, routing to error handler")
             return "error"
         elif stage == ProcessingStage.QUESTIONS_GENERATED:
-            self.logger.info("Question generation successful, routing to question evaluation")
+            logger.info("Question generation successful, routing to question evaluation")
             return "evaluate_questions"
         else:
-            self.logger.error(f"Unexpected processing stage after question generation: {stage}")
+            logger.error(f"Unexpected processing stage after question generation: {stage}")
             return "error"
     
-    def _route_from_question_evaluation(self, state: MultiAgentInterviewState) -> str:
+    @staticmethod
+    def _route_from_question_evaluation(state: MultiAgentInterviewState) -> str:
         """Route after question evaluation."""
         stage = state["processing_stage"]
-        self.logger.info(f"Routing from question evaluation, current stage: {stage}")
+        logger.info(f"Routing from question evaluation, current stage: {stage}")
         
         if stage == ProcessingStage.ERROR:
-            self.logger.error("Question evaluation failed, routing to error handler")
+            logger.error("Question evaluation failed, routing to error handler")
             return "error"
         elif stage == ProcessingStage.QUESTIONS_EVALUATED:
-            self.logger.info("Question evaluation successful, routing to expected response generation")
+            logger.info("Question evaluation successful, routing to expected response generation")
             return "generate_responses"
         else:
-            self.logger.error(f"Unexpected processing stage after question evaluation: {stage}")
+            logger.error(f"Unexpected processing stage after question evaluation: {stage}")
             return "error"
     
-    def _route_from_response_generation(self, state: MultiAgentInterviewState) -> str:
+    @staticmethod
+    def _route_from_response_generation(state: MultiAgentInterviewState) -> str:
         """Route after response generation."""
         stage = state["processing_stage"]
-        self.logger.info(f"Routing from response generation, current stage: {stage}")
+        logger.info(f"Routing from response generation, current stage: {stage}")
         
         if stage == ProcessingStage.ERROR:
-            self.logger.error("Expected response generation failed, routing to error handler")
+            logger.error("Expected response generation failed, routing to error handler")
             return "error"
         elif stage == ProcessingStage.RESPONSES_GENERATED:
-            self.logger.info("Expected response generation successful, routing to report assembly")
+            logger.info("Expected response generation successful, routing to report assembly")
             return "assemble_report"
         else:
-            self.logger.error(f"Unexpected processing stage after response generation: {stage}")
+            logger.error(f"Unexpected processing stage after response generation: {stage}")
             return "error"
     
-    def _route_from_report_assembly(self, state: MultiAgentInterviewState) -> str:
+    @staticmethod
+    def _route_from_report_assembly(state: MultiAgentInterviewState) -> str:
         """Route after report assembly."""
         stage = state["processing_stage"]
-        self.logger.info(f"Routing from report assembly, current stage: {stage}")
+        logger.info(f"Routing from report assembly, current stage: {stage}")
         
         if stage == ProcessingStage.ERROR:
-            self.logger.error("Report assembly failed, routing to error handler")
+            logger.error("Report assembly failed, routing to error handler")
             return "error"
         elif stage == ProcessingStage.COMPLETED:
-            self.logger.info("Report assembly completed successfully, workflow complete")
+            logger.info("Report assembly completed successfully, workflow complete")
             return "complete"
         else:
-            self.logger.error(f"Unexpected processing stage after report assembly: {stage}")
+            logger.error(f"Unexpected processing stage after report assembly: {stage}")
             return "error"
     
-    def _handle_error(self, state: MultiAgentInterviewState) -> MultiAgentInterviewState:
+    @staticmethod
+    def _handle_error(state: MultiAgentInterviewState) -> MultiAgentInterviewState:
         """Handle errors that occur during processing."""
         errors = state.get("errors", [])
         
-        self.logger.error(f"Multi-agent workflow encountered {len(errors)} errors:")
+        logger.error(f"Multi-agent workflow encountered {len(errors)} errors:")
         for i, error in enumerate(errors, 1):
-            self.logger.error(f"  Error {i}: {error}")
+            logger.error(f"  Error {i}: {error}")
         
         error_message = "❌ Multi-agent interview generation failed:\n"
         for i, error in enumerate(errors, 1):
@@ -219,14 +448,15 @@ class MultiAgentTechnicalInterviewSystem:
         state["messages"].append(AIMessage(content=error_message))
         state["processing_stage"] = ProcessingStage.ERROR
         
-        self.logger.error("Multi-agent workflow terminated due to errors")
+        logger.error("Multi-agent workflow terminated due to errors")
         return state
     
     def generate_technical_interview(self, 
                                    resume_text: str = "",
                                    job_description: str = "",
                                    position_title: str = "Technical Position",
-                                   thread_id: str = "default") -> dict:
+                                   thread_id: Optional[str] = None,
+                                   resume_thread_id: Optional[str] = None) -> dict:
         """
         Main method to generate complete technical interview evaluation.
         
@@ -234,39 +464,66 @@ class MultiAgentTechnicalInterviewSystem:
             resume_text: Candidate's resume (optional)
             job_description: Job description (optional) 
             position_title: Position title
-            thread_id: Unique thread ID for tracking
+            thread_id: Unique thread ID of this run (generated if omitted); its
+                checkpoints are cleared at the start, so it must not be shared
+                between concurrent runs
+            resume_thread_id: Thread ID of a failed run to resume from its last
+                completed agent; starts a fresh run if nothing can be resumed
             
         Returns:
             Complete interview evaluation results
         """
         
+        thread_id = thread_id or f"run_{uuid.uuid4()}"
         self.logger.info(f"Starting technical interview generation for position: {position_title}")
         self.logger.info(f"Thread ID: {thread_id}")
         self.logger.info(f"Resume text length: {len(resume_text)} characters")
         self.logger.info(f"Job description length: {len(job_description)} characters")
         
         start_time = time.time()
+        usage_tracker = UsageTracker()
         
         try:
-            # Create initial state
-            self.logger.info("Creating initial state for multi-agent workflow")
-            initial_state = create_initial_state(
-                resume_text=resume_text,
-                job_description=job_description,
-                position_title=position_title,
-                llm_provider=self.llm_config.provider,
-                llm_model=self.llm_config.model
+            run = InterviewRun(
+                agents=self.agents,
+                progress_tracker=self.progress_tracker,
+                stream_manager=self.stream_manager,
+                usage_tracker=usage_tracker
             )
-            self.logger.info(f"Initial state created with input scenario: {initial_state['input_scenario']}")
             
-            # Add initial message
-            initial_state["messages"] = [
-                HumanMessage(content=f"Generate comprehensive technical interview evaluation for {position_title}")
-            ]
+            resume_config = self._find_resume_checkpoint(resume_thread_id) if resume_thread_id else None
+            if resume_config:
+                # Continue the failed run; completed agents are not re-run
+                thread_id = resume_thread_id
+                workflow_input = None
+                configurable = {**resume_config, "interview_run": run}
+            else:
+                if resume_thread_id:
+                    self.logger.warning(f"No resumable checkpoint for thread {resume_thread_id}, starting a fresh run")
+                
+                # Create initial state
+                self.logger.info("Creating initial state for multi-agent workflow")
+                workflow_input = create_initial_state(
+                    resume_text=resume_text,
+                    job_description=job_description,
+                    position_title=position_title,
+                    llm_provider=self.llm_config.provider,
+                    llm_model=self.llm_config.model
+                )
+                self.logger.info(f"Initial state created with input scenario: {workflow_input['input_scenario']}")
+                
+                # Add initial message
+                workflow_input["messages"] = [
+                    HumanMessage(content=f"Generate comprehensive technical interview evaluation for {position_title}")
+                ]
+                
+                # A fresh run must not pick up checkpoints left by an earlier attempt
+                self.checkpointer.delete_thread(thread_id)
+                configurable = {"thread_id": thread_id, "interview_run": run}
             
-            # Execute multi-agent workflow
+            # Execute multi-agent workflow; per-run dependencies travel in the run config
             self.logger.info("Executing multi-agent workflow...")
-            result = self.agent.invoke(initial_state, config={"thread_id": thread_id})
+            result = self.agent.invoke(workflow_input, config={"configurable": configurable})
             
             total_time = time.time() - start_time
             
@@ -274,13 +531,24 @@ class MultiAgentTechnicalInterviewSystem:
             final_stage = result["processing_stage"]
             self.logger.info(f"Multi-agent workflow completed with stage: {final_stage}")
             self.logger.info(f"Total processing time: {total_time:.2f} seconds")
+            response_cache = get_response_cache()
+            if response_cache:
+                self.logger.info(f"LLM response cache stats: {response_cache.stats()}")
+            llm_usage = usage_tracker.report()
+            self.logger.info(f"📊 LLM usage: {llm_usage['total']}")
             
             if final_stage == ProcessingStage.COMPLETED:
                 self.logger.info("Multi-agent workflow completed successfully")
-                return self._create_success_response(result, total_time)
+                # Checkpoints are only kept for runs that may be resumed
+                self.checkpointer.delete_thread(thread_id)
+                self._save_to_question_bank(result)
+                response = self._create_success_response(result, total_time)
             else:
                 self.logger.error(f"Multi-agent workflow failed at stage: {final_stage}")
-                return self._create_error_response(result, total_time)
+                response = self._create_error_response(result, total_time)
+                response["thread_id"] = thread_id
+            response["llm_usage"] = llm_usage
+            return response
                 
         except Exception as e:
             total_time = time.time() - start_time
@@ -292,9 +560,43 @@ class MultiAgentTechnicalInterviewSystem:
                 "success": False,
                 "error": error_msg,
                 "processing_time": total_time,
-                "stage_reached": "initialization"
+                "stage_reached": "initialization",
+                "transient_error": is_transient_error(e),
+                "thread_id": thread_id,
+                "llm_usage": usage_tracker.report()
             }
     
+    def _save_to_question_bank(self, result: MultiAgentInterviewState) -> None:
+        """Store the run's approved questions in the question bank; failures are logged, not raised."""
+        bank = get_question_bank()
+        if bank is None:
+            return
+        try:
+            bank.save(
+                result["approved_questions"], result["question_evaluations"], result["expected_responses"],
+                provider=self.question_generator.llm_config.provider.value,
+                model=self.question_generator.llm_config.model
+            )
+        except Exception as e:
+            self.logger.warning(f"Failed to store questions in the question bank: {e}")
+    
+    def _find_resume_checkpoint(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the configurable of the latest checkpoint that is about to run an
+        agent and is not in an error state, i.e. the point just before the agent
+        that failed. Returns None if the thread has nothing to resume.
+        """
+        history = self.agent.get_state_history({"configurable": {"thread_id": thread_id}})
+        for snapshot in history:
+            if not snapshot.next or not set(snapshot.next) <= RESUMABLE_NODES:
+                continue
+            if snapshot.values.get("processing_stage") == ProcessingStage.ERROR:
+                continue
+            
+            self.logger.info(f"Resuming thread {thread_id} at {', '.join(snapshot.next)}")
+            return dict(snapshot.config["configurable"])
+        return None
+    
     def _create_success_response(self, result: MultiAgentInterviewState, total_time: float) -> dict:
         """Create success response with all results."""
         
@@ -312,7 +614,8 @@ class MultiAgentTechnicalInterviewSystem:
             agent_performance[agent_result.agent_name] = {
                 "success": agent_result.success,
                 "execution_time": agent_result.execution_time,
-                "output_data": agent_result.output_data
+                "output_data": agent_result.output_data,
+                "usage": agent_result.metadata.get("usage")
             }
         
         # Generate formatted report
@@ -363,6 +666,7 @@ class MultiAgentTechnicalInterviewSystem:
         # Find where the workflow failed
         last_successful_agent = None
         failed_agent = None
+        transient_error = False
         
         for agent_result in agent_results:
             if agent_result.success:
@@ -370,6 +674,7 @@ class MultiAgentTechnicalInterviewSystem:
                 self.logger.info(f"Agent {agent_result.agent_name} completed successfully")
             else:
                 failed_agent = agent_result.agent_name
+                transient_error = agent_result.metadata.get("transient_error", False)
                 self.logger.error(f"Agent {agent_result.agent_name} failed: {agent_result.error_message}")
                 break
         
@@ -382,6 +687,7 @@ class MultiAgentTechnicalInterviewSystem:
             "stage_reached": result.get("processing_stage", "unknown"),
             "last_successful_agent": last_successful_agent,
             "failed_agent": failed_agent,
+            "transient_error": transient_error,
             "errors": errors,
             "messages": [msg.content for msg in result.get("messages", [])],
             "partial_results": {
@@ -393,14 +699,14 @@ class MultiAgentTechnicalInterviewSystem:
 
 # Factory function for easy instantiation
 def create_technical_interview_system(llm_provider: LLMProvider = LLMProvider.OPENAI,
-                                     llm_model: str = "gpt-4.1",
+                                     llm_model: Optional[str] = None,
                                      temperature: float = 0.1) -> MultiAgentTechnicalInterviewSystem:
     """
     Factory function to create a technical interview system.
     
     Args:
         llm_provider: LLM provider (OpenAI, Gemini, Groq, etc.)
-        llm_model: Model name (e.g., "gpt-4o-mini", "gemini-2.0-flash-001")
+        llm_model: Model name (e.g., "gpt-4o-mini"); defaults to the provider's configured model
         temperature: Model temperature for generation
         
     Returns:
@@ -408,6 +714,7 @@ def create_technical_interview_system(llm_provider: LLMProvider = LLMProvider.OP
     """
     
     logger = get_logger(__name__)
+    llm_model = llm_model or get_default_model(llm_provider)
     logger.info(f"Creating technical interview system with provider: {llm_provider.value}, model: {llm_model}, temperature: {temperature}")
     
     llm_config = LLMConfig(
@@ -419,159 +726,3 @@ def create_technical_interview_system(llm_provider: LLMProvider = LLMProvider.OP
     system = MultiAgentTechnicalInterviewSystem(llm_config)
     logger.info("Technical interview system created successfully")
     return system
-
-def _create_interview_system_with_progress_patching(llm_config, progress_tracker, stream_manager=None):
-    """
-    Create interview system with progress tracking and streaming integrated during initialization
-    """
-    logger = get_logger(__name__)
-    logger.info("Creating interview system with progress tracking and streaming integration")
-    
-    # Create system with modified initialization that includes progress patching and streaming
-    system = ProgressTrackingMultiAgentSystem(llm_config, progress_tracker, stream_manager)
-    logger.info("Progress-tracking and streaming interview system created successfully")
-    return system
-
-class ProgressTrackingMultiAgentSystem(MultiAgentTechnicalInterviewSystem):
-    """
-    Modified MultiAgentTechnicalInterviewSystem that integrates progress tracking
-    during initialization, before workflow compilation
-    """
-    
-    def __init__(self, llm_config, progress_tracker, stream_manager=None):
-        self.progress_tracker = progress_tracker
-        self.stream_manager = stream_manager
-        self.llm_config = llm_config
-        self.memory = MemorySaver()
-        self.logger = get_logger(__name__)
-        
-        self.logger.info("Initializing Multi-Agent Technical Interview System with Progress Tracking and Streaming")
-        self.logger.info(f"LLM Configuration: Provider={llm_config.provider.value}, Model={llm_config.model}, Temperature={llm_config.temperature}")
-        self.logger.info(f"Streaming enabled: {stream_manager is not None}")
-        
-        # Initialize all agents with streaming support
-        self.logger.info("Initializing all agents...")
-        self.skill_extractor = SkillExtractionAgent(llm_config, stream_manager)
-        self.question_generator = QuestionGenerationAgent(llm_config, stream_manager)
-        self.question_evaluator = QuestionEvaluationAgent(llm_config, stream_manager)
-        self.response_generator = ExpectedResponseAgent(llm_config, stream_manager)
-        self.report_assembler = ReportAssemblyAgent(llm_config, stream_manager)
-        self.logger.info("All agents initialized successfully")
-        
-        # PATCH AGENTS BEFORE WORKFLOW BUILDING
-        self.logger.info("Patching agents for progress tracking BEFORE workflow compilation")
-        self._patch_agents_for_progress()
-        
-        # Build workflow (now with patched agents)
-        self.logger.info("Building multi-agent workflow...")
-        self.workflow = self._build_workflow()
-        self.agent = self.workflow.compile(checkpointer=self.memory)
-        self.logger.info("Multi-Agent Technical Interview System with Progress Tracking initialized successfully")
-    
-    def _patch_agents_for_progress(self):
-        """Patch agents to include progress tracking before workflow compilation"""
-        agents = [
-            (self.skill_extractor, "SkillExtractionAgent"),
-            (self.question_generator, "QuestionGenerationAgent"),
-            (self.question_evaluator, "QuestionEvaluationAgent"),
-            (self.response_generator, "ExpectedResponseAgent"),
-            (self.report_assembler, "ReportAssemblyAgent")
-        ]
-        
-        for agent, agent_name in agents:
-            self.logger.info(f"DEBUG: Patching {agent_name} execute method BEFORE workflow compilation")
-            original_execute = agent.execute
-            
-            def create_wrapped_execute(original_method, name):
-                def wrapped_execute(state):
-                    self.logger.info(f"DEBUG: Starting agent: {name}")
-                    self.progress_tracker.update_agent_progress(name, 0)
-                    
-                    try:
-                        result = original_method(state)
-                        self.progress_tracker.update_agent_progress(name, 100)
-                        self.logger.info(f"DEBUG: Completed agent: {name}")
-                        return result
-                    except Exception as e:
-                        self.logger.error(f"Agent {name} failed: {str(e)}")
-                        raise
-                
-                return wrapped_execute
-            
-            # Replace the execute method BEFORE workflow uses it
-            agent.execute = create_wrapped_execute(original_execute, agent_name)
-            self.logger.info(f"DEBUG: Successfully patched {agent_name} BEFORE workflow compilation")
-        
-        self.logger.info("DEBUG: Finished patching all agents BEFORE workflow compilation")
-    
-    def _build_workflow(self) -> StateGraph:
-        """Build the complete multi-agent workflow with lambda functions to support progress tracking."""
-        
-        self.logger.info("Building multi-agent workflow with 5 agents (with lambda functions for progress tracking)")
-        workflow = StateGraph(MultiAgentInterviewState)
-        
-        # Add all agent nodes using lambda functions to call current method references
-        self.logger.info("DEBUG: Adding workflow nodes with lambda functions for progress tracking")
-        workflow.add_node("extract_skills", lambda state: self.skill_extractor.execute(state))
-        workflow.add_node("generate_questions", lambda state: self.question_generator.execute(state))
-        workflow.add_node("evaluate_questions", lambda state: self.question_evaluator.execute(state))
-        workflow.add_node("generate_responses", lambda state: self.response_generator.execute(state))
-        workflow.add_node("assemble_report", lambda state: self.report_assembler.execute(state))
-        workflow.add_node("handle_error", self._handle_error)
-        
-        # Set entry point
-        workflow.add_edge(START, "extract_skills")
-        self.logger.info("Workflow entry point set to skill extraction")
-        
-        # Define workflow transitions
-        self.logger.info("Setting up workflow transitions and conditional routing")
-        workflow.add_conditional_edges(
-            "extract_skills",
-            self._route_from_skill_extraction,
-            {
-                "generate_questions": "generate_questions",
-                "error": "handle_error"
-            }
-        )
-        
-        workflow.add_conditional_edges(
-            "generate_questions", 
-            self._route_from_question_generation,
-            {
-                "evaluate_questions": "evaluate_questions",
-                "error": "handle_error"
-            }
-        )
-        
-        workflow.add_conditional_edges(
-            "evaluate_questions",
-            self._route_from_question_evaluation,
-            {
-                "generate_responses": "generate_responses",
-                "error": "handle_error"
-            }
-        )
-        
-        workflow.add_conditional_edges(
-            "generate_responses",
-            self._route_from_response_generation,
-            {
-                "assemble_report": "assemble_report",
-                "error": "handle_error"
-            }
-        )
-        
-        workflow.add_conditional_edges(
-            "assemble_report",
-            self._route_from_report_assembly,
-            {
-                "complete": END,
-                "error": "handle_error"
-            }
-        )
-        
-        # Error handling leads to END
-        workflow.add_edge("handle_error", END)
-        self.logger.info("Multi-agent workflow built successfully with lambda functions for progress tracking")
-        
-        return workflow
\ No newline at end of file
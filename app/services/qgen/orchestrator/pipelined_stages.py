@@ -0,0 +1,275 @@
+"""
+Pipelined question stages for the multi-agent workflow
+
+Runs question generation, question evaluation and expected response
+generation as one overlapped pipeline instead of three barriers:
+
+    category generated  -> its questions are evaluated straight away
+    question approved   -> its expected response is generated straight away
+
+Near-duplicates of questions already sent for evaluation are dropped as
+each category arrives. Report assembly remains the only barrier. Enabled with
+`qgen.pipeline_mode: pipelined`.
+"""
+
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage
+
+from app.logger import get_logger
+from app.services.qgen.agents.expected_response_agent import ExpectedResponseAgent
+from app.services.qgen.agents.question_evaluation_agent import QuestionEvaluationAgent
+from app.services.qgen.agents.question_generation_agent import QuestionGenerationAgent, QuestionNumbering
+from app.services.qgen.models.schemas import (
+    ExpectedResponse, MultiAgentInterviewState, ProcessingStage,
+    QuestionEvaluation, TechnicalQuestion
+)
+from app.services.qgen.stores.skill_index import skill_key
+from app.services.qgen.utils.concurrency import get_max_concurrency
+
+logger = get_logger(__name__)
+
+GENERATE = "generate"
+EVALUATE = "evaluate"
+RESPOND = "respond"
+
+# Agents covered by the pipeline, in progress-reporting order
+PIPELINE_AGENTS = ("QuestionGenerationAgent", "QuestionEvaluationAgent", "ExpectedResponseAgent")
+
+
+class PipelinedQuestionStages:
+    """Overlaps the three LLM-bound question stages on one bounded thread pool."""
+
+    def __init__(self, question_generator: QuestionGenerationAgent,
+                 question_evaluator: QuestionEvaluationAgent,
+                 response_generator: ExpectedResponseAgent,
+                 progress_callback: Optional[Callable[[str, int], None]] = None):
+        self.question_generator = question_generator
+        self.question_evaluator = question_evaluator
+        self.response_generator = response_generator
+        self.progress_callback = progress_callback
+        self._last_progress = -1
+
+    def execute(self, state: MultiAgentInterviewState) -> MultiAgentInterviewState:
+        """Generate, evaluate and write guidance for questions, updating state like the staged agents."""
+        logger.info("Starting pipelined question generation, evaluation and response generation")
+        start_time = time.time()
+        self._last_progress = -1
+        recorded = len(state["agent_results"])
+
+        self.question_generator.stream_start_sync("Generating technical interview questions...")
+        self.question_evaluator.stream_start_sync("Evaluating questions as they are generated...")
+        self.response_generator.stream_start_sync("Creating response guidelines for approved questions...")
+
+        stage_times = {GENERATE: 0.0, EVALUATE: 0.0, RESPOND: 0.0}
+
+        try:
+            extracted_skills = state["extracted_skills"]
+            if not extracted_skills:
+                raise Exception("No extracted skills found. Run SkillExtractionAgent first.")
+
+            categories = list(self.question_generator._group_skills_by_category(extracted_skills).items())
+            total_categories = len(categories)
+            skills_by_key = {skill_key(s.skill_name): s for s in extracted_skills}
+            input_scenario = state["input_scenario"]
+            numbering = QuestionNumbering()
+
+            category_questions: List[Optional[List[TechnicalQuestion]]] = [None] * total_categories
+            category_evaluations: List[Optional[List[QuestionEvaluation]]] = [None] * total_categories
+            responses: Dict[Tuple[int, int], ExpectedResponse] = {}
+            # Questions sent for evaluation; later categories are deduplicated against them
+            accepted_questions: List[TechnicalQuestion] = []
+            merges = []
+
+            questions_seen = 0
+            approved_seen = 0
+            evaluations_done = 0
+            generations_done = 0
+
+            max_workers = get_max_concurrency(self.question_generator.llm_config.provider.value)
+            logger.info(f"Pipelining {total_categories} categories with concurrency {max_workers}")
+
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="qgen-pipeline") as executor:
+                pending = {}
+
+                def submit(kind, key, func, *args):
+                    future = executor.submit(contextvars.copy_context().run, func, *args)
+                    pending[future] = (kind, key)
+
+                for category_index, (category_name, skills) in enumerate(categories):
+                    submit(
+                        GENERATE, category_index,
+                        self.question_generator._generate_questions_for_category,
+                        category_name, skills, input_scenario,
+                        category_index + 1, total_categories, numbering
+                    )
+
+                while pending:
+                    done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        kind, key = pending.pop(future)
+                        result = future.result()
+                        stage_times[kind] = time.time() - start_time
+
+                        if kind == GENERATE:
+                            generations_done += 1
+                            result, category_merges = self.question_generator.deduplicate_questions(
+                                result, extracted_skills, accepted_questions
+                            )
+                            accepted_questions.extend(result)
+                            merges.extend(category_merges)
+                            category_questions[key] = result
+                            if result:
+                                submit(
+                                    EVALUATE, key,
+                                    self.question_evaluator.evaluate_questions,
+                                    result, extracted_skills, questions_seen, questions_seen + len(result)
+                                )
+                                questions_seen += len(result)
+                            else:
+                                category_evaluations[key] = []
+                                evaluations_done += 1
+
+                        elif kind == EVALUATE:
+                            evaluations_done += 1
+                            category_evaluations[key] = result
+                            for position, (question, evaluation) in enumerate(zip(category_questions[key], result)):
+                                if not evaluation.approved:
+                                    continue
+                                approved_seen += 1
+                                submit(
+                                    RESPOND, (key, position),
+                                    self.response_generator._generate_expected_response,
+                                    question, skills_by_key.get(skill_key(question.targeted_skill)),
+                                    evaluation, approved_seen, None  # total unknown until evaluation ends
+                                )
+
+                        else:
+                            responses[key] = result
+
+                    self._report_progress(
+                        generations_done, evaluations_done, total_categories,
+                        len(responses), approved_seen
+                    )
+
+            # Assemble results in category order, as the staged agents would
+            generated_questions = []
+            question_evaluations = []
+            approved_questions = []
+            expected_responses = []
+            for category_index in range(total_categories):
+                questions = category_questions[category_index] or []
+                evaluations = category_evaluations[category_index] or []
+                generated_questions.extend(questions)
+                question_evaluations.extend(evaluations)
+                for position, (question, evaluation) in enumerate(zip(questions, evaluations)):
+                    if evaluation.approved:
+                        approved_questions.append(question)
+                        expected_responses.append(responses[(category_index, position)])
+
+            state["generated_questions"] = generated_questions
+            state["question_evaluations"] = question_evaluations
+            state["approved_questions"] = approved_questions
+
+            if not generated_questions:
+                raise Exception("No questions were generated.")
+
+            self.question_generator._record_result(
+                state, success=True,
+                output_data={
+                    "questions_generated": len(generated_questions),
+                    "categories_covered": total_categories,
+                    "duplicates_removed": [merge.to_dict() for merge in merges]
+                },
+                execution_time=stage_times[GENERATE]
+            )
+
+            avg_quality = sum(e.overall_quality for e in question_evaluations) / len(question_evaluations)
+            self.question_evaluator._record_result(
+                state, success=True,
+                output_data={
+                    "total_questions": len(generated_questions),
+                    "approved_questions": len(approved_questions),
+                    "approval_rate": len(approved_questions) / len(generated_questions),
+                    "average_quality_score": round(avg_quality, 2)
+                },
+                execution_time=stage_times[EVALUATE]
+            )
+
+            if not approved_questions:
+                raise Exception("No approved questions found.")
+
+            state["expected_responses"] = expected_responses
+            state["processing_stage"] = ProcessingStage.RESPONSES_GENERATED
+            self.response_generator._record_result(
+                state, success=True,
+                output_data={
+                    "responses_generated": len(expected_responses),
+                    "questions_covered": len(approved_questions)
+                },
+                execution_time=stage_times[RESPOND]
+            )
+
+            execution_time = time.time() - start_time
+            logger.info(
+                f"Pipelined stages completed: {len(generated_questions)} questions, "
+                f"{len(approved_questions)} approved, {len(expected_responses)} responses ({execution_time:.2f}s)"
+            )
+            state["messages"].append(AIMessage(
+                content=f"✅ Generated {len(generated_questions)} questions across {total_categories} categories, "
+                        f"approved {len(approved_questions)} and wrote interviewer guidance for each "
+                        f"(pipelined). Processing time: {execution_time:.2f}s"
+            ))
+
+        except Exception as e:
+            execution_time = time.time() - start_time
+            error_msg = f"Pipelined question stages failed: {str(e)}"
+            logger.error(f"{error_msg} ({execution_time:.2f}s)")
+
+            state["errors"].append(error_msg)
+            state["processing_stage"] = ProcessingStage.ERROR
+
+            completed = {r.agent_name for r in state["agent_results"][recorded:]}
+            failed_agent = next(
+                (agent for agent in (self.question_generator, self.question_evaluator, self.response_generator)
+                 if agent.agent_name not in completed),
+                self.response_generator
+            )
+            failed_agent._record_result(
+                state, success=False, error_message=error_msg, execution_time=execution_time, error=e
+            )
+
+        # Completion (or error) events, as each staged agent sends them; agents the
+        # failure stopped before their result was recorded get an error event too
+        finished = {r.agent_name for r in state["agent_results"][recorded:]}
+        for agent in (self.question_generator, self.question_evaluator, self.response_generator):
+            if agent.agent_name in finished:
+                agent.stream_result_sync(state, since=recorded)
+            else:
+                agent.stream_error_sync(f"{agent.agent_name} stopped: {state['errors'][-1]}")
+
+        return state
+
+    def _report_progress(self, generations_done: int, evaluations_done: int, total_categories: int,
+                         responses_done: int, responses_total: int) -> None:
+        """Map overall pipeline completion onto the three agents' progress steps (never backwards)."""
+        if not self.progress_callback or not total_categories:
+            return
+
+        fraction = (generations_done + evaluations_done) / (2 * total_categories) * 2 / 3
+        if evaluations_done == total_categories and responses_total:
+            fraction += responses_done / responses_total / 3
+
+        progress = int(fraction * 300)
+        if progress <= self._last_progress:
+            return
+        self._last_progress = progress
+
+        stage_index = min(progress // 100, len(PIPELINE_AGENTS) - 1)
+        try:
+            self.progress_callback(PIPELINE_AGENTS[stage_index], progress - stage_index * 100)
+        except Exception as e:
+            logger.warning(f"Pipeline progress callback failed: {e}")
@@ -0,0 +1,157 @@
+"""
+Job description skill-profile cache
+
+Recruiters run one job description against many resumes. The skills and
+categories extracted from a JD are stored in the `jd_skill_profiles` table,
+keyed by a hash of the normalised JD text and position title (both are part
+of the extraction prompt), the extraction provider/model and `PROFILE_VERSION`
+(bump it when the JD extraction prompt or schema changes), so every later run
+with the same JD only pays for resume extraction.
+
+Configured under `qgen.jd_profile_cache`.
+"""
+
+import hashlib
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from app.db_ops.database import SessionLocal
+from app.db_ops.models import JDSkillProfile
+from app.logger import get_logger
+from app.services.qgen.models.schemas import ExtractedSkill, SkillCategory
+from app.services.qgen.utils.prompt_budget import compact_text
+from app.services.qgen.utils.settings import get_qgen_settings
+
+logger = get_logger(__name__)
+
+PROFILE_VERSION = 1
+DEFAULT_TTL_DAYS = 30
+
+
+def normalize_document_text(text: str) -> str:
+    """Text used for content hashing: compacted, lower-cased, whitespace collapsed."""
+    return re.sub(r"\s+", " ", compact_text(text or "").lower()).strip()
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 of the normalised document text."""
+    return hashlib.sha256(normalize_document_text(text).encode("utf-8")).hexdigest()
+
+
+def normalize_position_title(title: str) -> str:
+    """Position title used in profile keys: lower-cased, whitespace collapsed."""
+    return re.sub(r"\s+", " ", (title or "").lower()).strip()
+
+
+class JDProfileStore:
+    """
+    Database-backed cache of JD skill profiles.
+
+    Database errors are logged and treated as misses; the store never fails
+    a run.
+    """
+
+    def __init__(self, session_factory=SessionLocal, ttl_days: float = DEFAULT_TTL_DAYS):
+        self.session_factory = session_factory
+        self.ttl = timedelta(days=ttl_days)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "errors": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    @staticmethod
+    def profile_key(jd_text: str, position_title: str, provider: str, model: str) -> str:
+        return hashlib.sha256(
+            f"{content_hash(jd_text)}|{normalize_position_title(position_title)}|{provider}|{model}"
+            f"|v{PROFILE_VERSION}".encode("utf-8")
+        ).hexdigest()
+
+    def get(self, jd_text: str, position_title: str, provider: str, model: str) -> Optional[Dict[str, list]]:
+        """Return {"skills", "categories"} for a JD, or None on a miss or expired profile."""
+        key = self.profile_key(jd_text, position_title, provider, model)
+        try:
+            with self.session_factory() as db:
+                row = db.query(JDSkillProfile).filter(JDSkillProfile.profile_key == key).first()
+                if row is None or row.created_at < datetime.utcnow() - self.ttl:
+                    self._count("misses")
+                    return None
+                profile = {
+                    "skills": [ExtractedSkill.model_validate(s) for s in row.skills],
+                    "categories": [SkillCategory.model_validate(c) for c in row.categories]
+                }
+                row.hit_count += 1
+                row.last_used_at = datetime.utcnow()
+                db.commit()
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"JD profile cache read failed: {e}")
+            return None
+        self._count("hits")
+        logger.info(f"📋 Reusing cached JD skill profile ({len(profile['skills'])} skills, key {key[:12]})")
+        return profile
+
+    def put(self, jd_text: str, position_title: str, provider: str, model: str,
+            skills: List[ExtractedSkill], categories: List[SkillCategory]) -> None:
+        """Store (or refresh) the profile of a JD."""
+        key = self.profile_key(jd_text, position_title, provider, model)
+        now = datetime.utcnow()
+        try:
+            with self.session_factory() as db:
+                row = db.query(JDSkillProfile).filter(JDSkillProfile.profile_key == key).first()
+                if row is None:
+                    row = JDSkillProfile(profile_key=key, content_hash=content_hash(jd_text),
+                                         provider=provider, model=model)
+                    db.add(row)
+                row.skills = [s.model_dump(mode="json") for s in skills]
+                row.categories = [c.model_dump(mode="json") for c in categories]
+                row.created_at = now
+                row.last_used_at = now
+                db.commit()
+            self._count("writes")
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"JD profile cache write failed: {e}")
+
+    def prune(self) -> int:
+        """Delete profiles older than the TTL; returns the number deleted."""
+        with self.session_factory() as db:
+            deleted = db.query(JDSkillProfile).filter(
+                JDSkillProfile.created_at < datetime.utcnow() - self.ttl
+            ).delete(synchronize_session=False)
+            db.commit()
+        return deleted
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+# Singleton instance for reuse across agents and Celery tasks
+_store_instance = None
+_store_initialized = False
+_store_lock = threading.Lock()
+
+
+def get_jd_profile_store() -> Optional[JDProfileStore]:
+    """
+    Get singleton JD profile store configured from `qgen.jd_profile_cache`.
+
+    Returns None when the cache is disabled.
+    """
+    global _store_instance, _store_initialized
+    if _store_initialized:
+        return _store_instance
+
+    with _store_lock:
+        if _store_initialized:
+            return _store_instance
+        settings = get_qgen_settings().get("jd_profile_cache") or {}
+        if settings.get("enabled", False):
+            _store_instance = JDProfileStore(ttl_days=float(settings.get("ttl_days", DEFAULT_TTL_DAYS)))
+            logger.info("JD skill profile cache enabled")
+        _store_initialized = True
+    return _store_instance
@@ -0,0 +1,226 @@
+"""
+Question bank - approved questions reused across interviews
+
+Approved questions of completed runs are stored with their evaluation and
+expected response in the `question_bank` table, indexed by normalised skill
+name, question type and difficulty level. In the question generation agent's
+hybrid mode, skills with enough high-scoring bank questions at the right
+difficulty take them from the bank and only the remaining skills go to the
+LLM. Bank questions keep their stored evaluation and expected response, so
+they cost no LLM call at any stage.
+
+Banked questions carry ids of the form `bank_<entry id>` within a run.
+Questions from excluded providers (the fake load-test provider by default)
+are never stored nor served.
+
+Configured under `qgen.question_bank`.
+"""
+
+import hashlib
+import re
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
+from app.db_ops.database import SessionLocal
+from app.db_ops.models import QuestionBankEntry
+from app.logger import get_logger
+from app.services.qgen.stores.skill_index import skill_key
+from app.services.qgen.models.schemas import ExpectedResponse, QuestionEvaluation, TechnicalQuestion
+from app.services.qgen.utils.settings import get_qgen_settings
+
+logger = get_logger(__name__)
+
+BANK_ID_PREFIX = "bank_"
+DEFAULT_MIN_QUALITY = 4
+DEFAULT_EXCLUDED_PROVIDERS = ("fake",)
+
+
+def question_hash(text: str) -> str:
+    """SHA-256 of a question text with case, punctuation and spacing ignored."""
+    normalised = re.sub(r"[^a-z0-9]+", " ", text.lower()).strip()
+    return hashlib.sha256(normalised.encode("utf-8")).hexdigest()
+
+
+def average_score(evaluation: QuestionEvaluation) -> float:
+    return (evaluation.technical_depth_score + evaluation.relevance_score + evaluation.difficulty_appropriateness
+            + evaluation.non_generic_score + evaluation.overall_quality) / 5
+
+
+@dataclass
+class BankedQuestion:
+    """A question bank entry with its stored evaluation and expected response."""
+    entry_id: str
+    question: TechnicalQuestion
+    evaluation: QuestionEvaluation
+    expected_response: ExpectedResponse
+
+    @property
+    def question_id(self) -> str:
+        return f"{BANK_ID_PREFIX}{self.entry_id}"
+
+    @classmethod
+    def from_row(cls, row: QuestionBankEntry) -> 'BankedQuestion':
+        return cls(
+            entry_id=row.entry_id,
+            question=TechnicalQuestion.model_validate(row.question),
+            evaluation=QuestionEvaluation.model_validate(row.evaluation),
+            expected_response=ExpectedResponse.model_validate(row.expected_response)
+        )
+
+
+class QuestionBank:
+    """
+    Database-backed store of approved questions.
+
+    Args:
+        min_quality: lowest evaluation `overall_quality` stored in the bank
+        excluded_providers: providers whose questions are never stored or served
+    """
+
+    def __init__(self, session_factory=SessionLocal, min_quality: int = DEFAULT_MIN_QUALITY,
+                 excluded_providers: Iterable[str] = DEFAULT_EXCLUDED_PROVIDERS):
+        self.session_factory = session_factory
+        self.min_quality = min_quality
+        self.excluded_providers = list(excluded_providers)
+        self._lock = threading.Lock()
+        # Entries are immutable once stored; evaluator and response agents look them up by id
+        self._entries: Dict[str, BankedQuestion] = {}
+
+    @staticmethod
+    def entry_id_for(question_id: str) -> Optional[str]:
+        """Bank entry id of a banked question id, None for generated questions."""
+        return question_id[len(BANK_ID_PREFIX):] if question_id.startswith(BANK_ID_PREFIX) else None
+
+    def save(self, questions: Iterable[TechnicalQuestion], evaluations: Iterable[QuestionEvaluation],
+             responses: Iterable[ExpectedResponse], provider: Optional[str] = None,
+             model: Optional[str] = None) -> int:
+        """
+        Store the approved questions of a run that meet `min_quality`.
+
+        Banked questions and questions already in the bank (same normalised
+        text) are skipped, as are runs of excluded providers. Returns the
+        number of new entries.
+        """
+        if provider in self.excluded_providers:
+            logger.info(f"Not banking questions generated by excluded provider '{provider}'")
+            return 0
+        evaluations_by_id = {e.question_id: e for e in evaluations}
+        responses_by_id = {r.question_id: r for r in responses}
+        stored = 0
+        with self.session_factory() as db:
+            for question in questions:
+                evaluation = evaluations_by_id.get(question.question_id)
+                response = responses_by_id.get(question.question_id)
+                if (self.entry_id_for(question.question_id) or evaluation is None or response is None
+                        or not evaluation.approved or evaluation.overall_quality < self.min_quality):
+                    continue
+                db.add(QuestionBankEntry(
+                    skill_key=skill_key(question.targeted_skill),
+                    skill_name=question.targeted_skill,
+                    question_type=question.question_type.value,
+                    difficulty_level=question.difficulty_level,
+                    question_hash=question_hash(question.question_text),
+                    question=question.model_dump(mode="json"),
+                    evaluation=evaluation.model_dump(mode="json"),
+                    expected_response=response.model_dump(mode="json"),
+                    overall_quality=evaluation.overall_quality,
+                    average_score=average_score(evaluation),
+                    provider=provider,
+                    model=model
+                ))
+                try:
+                    db.commit()
+                    stored += 1
+                except IntegrityError:
+                    db.rollback()  # already banked
+        if stored:
+            logger.info(f"🏦 Stored {stored} approved questions in the question bank")
+        return stored
+
+    def find(self, skill_name: str, difficulty_levels: Iterable[int], limit: int,
+             min_quality: int = DEFAULT_MIN_QUALITY) -> List[BankedQuestion]:
+        """
+        Best bank questions for a skill at the given difficulty levels.
+
+        Ranked by quality, then least used; distinct question types are
+        preferred so a skill does not get several questions of one kind.
+        """
+        with self.session_factory() as db:
+            rows = db.query(QuestionBankEntry).filter(
+                QuestionBankEntry.skill_key == skill_key(skill_name),
+                QuestionBankEntry.difficulty_level.in_(list(difficulty_levels)),
+                QuestionBankEntry.overall_quality >= min_quality,
+                or_(QuestionBankEntry.provider.is_(None), QuestionBankEntry.provider.notin_(self.excluded_providers))
+            ).order_by(
+                QuestionBankEntry.overall_quality.desc(),
+                QuestionBankEntry.average_score.desc(),
+                QuestionBankEntry.use_count.asc()
+            ).limit(limit * 3).all()
+
+            types_seen = set()
+            distinct = [r for r in rows if not (r.question_type in types_seen or types_seen.add(r.question_type))]
+            chosen = (distinct + [r for r in rows if r not in distinct])[:limit]
+
+            now = datetime.utcnow()
+            for row in chosen:
+                row.use_count += 1
+                row.last_used_at = now
+            db.commit()
+            entries = [BankedQuestion.from_row(row) for row in chosen]
+
+        with self._lock:
+            self._entries.update((entry.entry_id, entry) for entry in entries)
+        return entries
+
+    def get(self, question_id: str) -> Optional[BankedQuestion]:
+        """Bank entry of a banked question id, None for generated questions."""
+        entry_id = self.entry_id_for(question_id)
+        if entry_id is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(entry_id)
+        if entry is not None:
+            return entry
+
+        with self.session_factory() as db:
+            row = db.query(QuestionBankEntry).filter(QuestionBankEntry.entry_id == entry_id).first()
+            entry = BankedQuestion.from_row(row) if row else None
+        if entry is not None:
+            with self._lock:
+                self._entries[entry_id] = entry
+        return entry
+
+
+# Singleton instance for reuse across agents and Celery tasks
+_bank_instance = None
+_bank_initialized = False
+_bank_lock = threading.Lock()
+
+
+def get_question_bank() -> Optional[QuestionBank]:
+    """
+    Get singleton question bank configured from `qgen.question_bank`.
+
+    Returns None when the bank is disabled.
+    """
+    global _bank_instance, _bank_initialized
+    if _bank_initialized:
+        return _bank_instance
+
+    with _bank_lock:
+        if _bank_initialized:
+            return _bank_instance
+        settings = get_qgen_settings().get("question_bank") or {}
+        if settings.get("enabled", False):
+            _bank_instance = QuestionBank(
+                min_quality=int(settings.get("min_quality", DEFAULT_MIN_QUALITY)),
+                excluded_providers=settings.get("excluded_providers", DEFAULT_EXCLUDED_PROVIDERS)
+            )
+            logger.info("Question bank enabled")
+        _bank_initialized = True
+    return _bank_instance
@@ -0,0 +1,320 @@
+"""
+Skill name canonicalisation
+
+Skill and category names are free text from the LLM, so "Postgres",
+"PostgreSQL" and "postgresql db" name one skill. Names are canonicalised at
+extraction time:
+
+    1. the name is reduced to a compact key (case, spacing, punctuation,
+       version numbers, plurals and generic suffixes such as "db" or
+       "framework" ignored, so "Node.js", "NodeJS" and "node js" share a key)
+    2. the key is looked up in the alias map (built-in aliases plus
+       `qgen.skill_canonicalisation.aliases`)
+    3. then in the in-memory index of known names
+    4. otherwise the closest known name by character trigram similarity
+       (Dice coefficient) is used if it reaches `similarity_threshold`
+    5. otherwise the name becomes a new canonical name
+
+The index is seeded from historical extractions (JD skill profiles and the
+question bank) on first use and grows with every run. Lookups keyed on
+skills (JD profile cache, question bank, skill matching between agents) use
+`skill_key`, the key of the canonical name.
+
+Configured under `qgen.skill_canonicalisation`.
+"""
+
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.db_ops.database import SessionLocal
+from app.db_ops.models import JDSkillProfile, QuestionBankEntry
+from app.logger import get_logger
+from app.services.qgen.models.schemas import ExtractedSkill, SkillCategory
+from app.services.qgen.utils.settings import get_qgen_settings
+
+logger = get_logger(__name__)
+
+DEFAULT_SIMILARITY_THRESHOLD = 0.85
+DEFAULT_HISTORY_LIMIT = 2000
+# Keys shorter than this are only matched exactly ("Go" must not become "Git")
+MIN_FUZZY_KEY_LENGTH = 5
+
+# Canonical name -> aliases (the canonical name is always an alias of itself)
+BUILTIN_ALIASES: Dict[str, List[str]] = {
+    "PostgreSQL": ["postgres", "postgre", "psql", "postgres sql"],
+    "Kubernetes": ["k8s", "kube"],
+    "JavaScript": ["js", "ecmascript", "es6"],
+    "TypeScript": ["ts"],
+    "Python": ["py", "python3"],
+    "Go": ["golang"],
+    "Node.js": ["node", "nodejs"],
+    "React": ["reactjs", "react.js"],
+    "Vue.js": ["vue", "vuejs"],
+    "Next.js": ["nextjs"],
+    "Express.js": ["express", "expressjs"],
+    "MongoDB": ["mongo"],
+    "Microsoft SQL Server": ["mssql", "sql server", "ms sql"],
+    "Elasticsearch": ["elastic search", "elastic"],
+    "Apache Kafka": ["kafka"],
+    "Apache Spark": ["spark"],
+    "RabbitMQ": ["rabbit mq", "rabbit"],
+    "GraphQL": ["gql"],
+    "REST APIs": ["rest", "restful", "rest api", "restful api", "restful apis", "restful services"],
+    "CI/CD": ["cicd", "ci cd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "AWS": ["amazon web services"],
+    "Google Cloud Platform": ["gcp", "google cloud"],
+    "Azure": ["microsoft azure"],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "Machine Learning": ["ml"],
+    "Deep Learning": ["dl"],
+    "Natural Language Processing": ["nlp"],
+    "Large Language Models": ["llm", "llms"],
+    "C++": ["cpp", "c plus plus"],
+    "C#": ["csharp", "c sharp"],
+    ".NET": ["dotnet", "net core", "dot net", "asp.net core"],
+    "Spring Boot": ["springboot"],
+    "FastAPI": ["fast api"],
+    "Docker": ["docker containers", "containerization with docker"],
+    "Terraform": ["hashicorp terraform"],
+    "Git": ["github", "gitlab", "version control"],
+}
+
+# Trailing words that do not change which skill is meant ("PostgreSQL database")
+GENERIC_SKILL_SUFFIXES = (
+    "db", "database", "databases", "framework", "frameworks", "library", "libraries",
+    "language", "programming", "programming language", "platform", "services"
+)
+
+_PARENTHETICAL = re.compile(r"\s*\([^)]*\)")
+_VERSION = re.compile(r"\s+v?\d+(\.\d+|\.x)*\+?$")
+
+
+def compact_key(name: str, strip_suffixes: bool = False) -> str:
+    """Lookup key of a name: lower-case alphanumerics plus '+' and '#' (C++, C#)."""
+    text = _PARENTHETICAL.sub("", name.lower()).replace("&", " and ").strip()
+    text = _VERSION.sub("", text)
+    if strip_suffixes:
+        for suffix in sorted(GENERIC_SKILL_SUFFIXES, key=len, reverse=True):
+            if text.endswith(" " + suffix):
+                text = text[:-len(suffix)].strip()
+                break
+    key = re.sub(r"[^a-z0-9+#]", "", text)
+    if len(key) > 4 and key.endswith("s") and not key.endswith(("ss", "is", "us", "os")):
+        key = key[:-1]  # "Databases" / "Database"
+    return key or re.sub(r"\s+", "", name.lower())
+
+
+def trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a: Set[str], b: Set[str]) -> float:
+    """Dice coefficient of two trigram sets."""
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+class NameIndex:
+    """
+    In-memory index of canonical names with aliases and fuzzy lookup.
+
+    Candidates for fuzzy matching come from an inverted trigram index, so a
+    lookup only scores names sharing a trigram with the query.
+    """
+
+    def __init__(self, similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+                 strip_suffixes: bool = False):
+        self.similarity_threshold = similarity_threshold
+        self.strip_suffixes = strip_suffixes
+        self._lock = threading.Lock()
+        self._canonical: Dict[str, str] = {}  # any known key -> canonical name
+        self._grams: Dict[str, Set[str]] = {}  # canonical key -> trigrams
+        self._postings: Dict[str, Set[str]] = {}  # trigram -> canonical keys
+
+    def __len__(self) -> int:
+        return len(self._grams)
+
+    def key(self, name: str) -> str:
+        return compact_key(name, self.strip_suffixes)
+
+    def add_alias(self, alias: str, canonical: str) -> None:
+        """Map `alias` (and `canonical` itself) to `canonical`."""
+        with self._lock:
+            self._add_canonical(canonical)
+            self._canonical.setdefault(self.key(alias), canonical)
+
+    def _add_canonical(self, name: str) -> str:
+        key = self.key(name)
+        if key in self._canonical:
+            return self._canonical[key]
+        self._canonical[key] = name
+        grams = trigrams(key)
+        self._grams[key] = grams
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(key)
+        return name
+
+    def _closest(self, key: str) -> Optional[Tuple[str, float]]:
+        if len(key) < MIN_FUZZY_KEY_LENGTH:
+            return None
+        grams = trigrams(key)
+        candidates = set().union(*(self._postings.get(gram, ()) for gram in grams))
+        best = max(
+            ((candidate, similarity(grams, self._grams[candidate])) for candidate in candidates
+             if len(candidate) >= MIN_FUZZY_KEY_LENGTH),
+            key=lambda item: item[1], default=None
+        )
+        return best if best and best[1] >= self.similarity_threshold else None
+
+    def lookup(self, name: str) -> Optional[str]:
+        """Canonical name for `name` by alias, exact key or fuzzy match; None if unknown."""
+        key = self.key(name)
+        with self._lock:
+            if key in self._canonical:
+                return self._canonical[key]
+            closest = self._closest(key)
+            return self._canonical[closest[0]] if closest else None
+
+    def canonicalize(self, name: str) -> str:
+        """Canonical name for `name`, registering it as a new canonical name if unknown."""
+        name = name.strip()
+        if not name:
+            return name
+        key = self.key(name)
+        with self._lock:
+            if key in self._canonical:
+                return self._canonical[key]
+            closest = self._closest(key)
+            if closest:
+                canonical = self._canonical[closest[0]]
+                # Remember the variant so the next lookup is exact
+                self._canonical[key] = canonical
+                return canonical
+            return self._add_canonical(name)
+
+
+class SkillIndex:
+    """Canonicalises skill and category names of extractions."""
+
+    def __init__(self, similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+                 aliases: Optional[Dict[str, Iterable[str]]] = None):
+        self.skills = NameIndex(similarity_threshold, strip_suffixes=True)
+        self.categories = NameIndex(similarity_threshold)
+        for canonical, names in {**BUILTIN_ALIASES, **(aliases or {})}.items():
+            self.skills.add_alias(canonical, canonical)
+            for alias in names:
+                self.skills.add_alias(alias, canonical)
+
+    def load_history(self, session_factory=SessionLocal, limit: int = DEFAULT_HISTORY_LIMIT) -> None:
+        """
+        Seed the index from historical extractions, most frequent spelling first.
+
+        Reads the skills and categories of stored JD profiles and the skills of
+        the question bank; failures are logged and leave the index as it is.
+        """
+        skill_names: Counter = Counter()
+        category_names: Counter = Counter()
+        try:
+            with session_factory() as db:
+                profiles = db.query(JDSkillProfile.skills, JDSkillProfile.categories).order_by(
+                    JDSkillProfile.last_used_at.desc()
+                ).limit(limit)
+                for skills, categories in profiles:
+                    skill_names.update(s.get("skill_name", "") for s in skills or [])
+                    category_names.update(s.get("category", "") for s in skills or [])
+                    category_names.update(c.get("name", "") for c in categories or [])
+                banked = db.query(QuestionBankEntry.skill_name).order_by(
+                    QuestionBankEntry.created_at.desc()
+                ).limit(limit)
+                skill_names.update(name for (name,) in banked)
+        except Exception as e:
+            logger.warning(f"Failed to load skill history for canonicalisation: {e}")
+            return
+
+        for name, _ in skill_names.most_common():
+            if name:
+                self.skills.canonicalize(name)
+        for name, _ in category_names.most_common():
+            if name:
+                self.categories.canonicalize(name)
+        logger.info(f"Skill index seeded with {len(self.skills)} skills and {len(self.categories)} categories")
+
+    def canonical_skill(self, name: str) -> str:
+        return self.skills.canonicalize(name)
+
+    def canonical_category(self, name: str) -> str:
+        return self.categories.canonicalize(name)
+
+    def skill_key(self, name: str) -> str:
+        """Key of the canonical name of a skill, without registering unknown names."""
+        return self.skills.key(self.skills.lookup(name) or name)
+
+    def category_key(self, name: str) -> str:
+        """Key of the canonical name of a category, without registering unknown names."""
+        return self.categories.key(self.categories.lookup(name) or name)
+
+    def canonicalize_extraction(self, skills: List[ExtractedSkill],
+                                categories: List[SkillCategory]) -> Tuple[List[ExtractedSkill], List[SkillCategory]]:
+        """Canonicalise the names of an extraction; duplicates are left for the caller to merge."""
+        canonical_skills = [
+            skill.model_copy(update={
+                "skill_name": self.canonical_skill(skill.skill_name),
+                "category": self.canonical_category(skill.category),
+                "specific_technologies": list(dict.fromkeys(
+                    self.canonical_skill(t) for t in skill.specific_technologies if t.strip()
+                ))
+            })
+            for skill in skills
+        ]
+        canonical_categories = [
+            category.model_copy(update={"name": self.canonical_category(category.name)})
+            for category in categories
+        ]
+        return canonical_skills, canonical_categories
+
+
+# Singleton instance for reuse across agents and Celery tasks
+_index_instance = None
+_index_initialized = False
+_index_lock = threading.Lock()
+
+
+def get_skill_index() -> Optional[SkillIndex]:
+    """
+    Get singleton skill index configured from `qgen.skill_canonicalisation`.
+
+    Returns None when canonicalisation is disabled.
+    """
+    global _index_instance, _index_initialized
+    if _index_initialized:
+        return _index_instance
+
+    with _index_lock:
+        if _index_initialized:
+            return _index_instance
+        settings = get_qgen_settings().get("skill_canonicalisation") or {}
+        if settings.get("enabled", False):
+            index = SkillIndex(
+                similarity_threshold=float(settings.get("similarity_threshold", DEFAULT_SIMILARITY_THRESHOLD)),
+                aliases=settings.get("aliases")
+            )
+            index.load_history(limit=int(settings.get("history_limit", DEFAULT_HISTORY_LIMIT)))
+            _index_instance = index
+        _index_initialized = True
+    return _index_instance
+
+
+def skill_key(name: str) -> str:
+    """Key used to match skills across agents and stores (canonical when canonicalisation is enabled)."""
+    index = get_skill_index()
+    return index.skill_key(name) if index is not None else compact_key(name, strip_suffixes=True)
+
+
+def category_key(name: str) -> str:
+    """Key used to match skill categories (canonical when canonicalisation is enabled)."""
+    index = get_skill_index()
+    return index.category_key(name) if index is not None else compact_key(name)
@@ -32,6 +32,7 @@ class StreamEventType(Enum):
     EVALUATION_RESULT = "evaluation_result"
     RESPONSE_GENERATED = "response_generated"
     SECTION_ASSEMBLED = "section_assembled"
+    CANDIDATE_PROGRESS = "candidate_progress"
     ERROR = "error"
 
 
@@ -219,7 +220,7 @@ class StreamManager:
         self.emit_skill_found_sync(skill)
     
     def emit_question_generated_sync(self, question: Dict[str, Any], 
-                                    question_number: int, total_questions: int) -> None:
+                                    question_number: int, total_questions: Optional[int]) -> None:
         """Emit question generated event synchronously."""
         event = StreamEvent(
             event_type=StreamEventType.QUESTION_GENERATED,
@@ -234,7 +235,7 @@ class StreamManager:
         self.emit_event_sync(event)
     
     async def emit_question_generated(self, question: Dict[str, Any], 
-                                    question_number: int, total_questions: int) -> None:
+                                    question_number: int, total_questions: Optional[int]) -> None:
         """Emit question generated event."""
         self.emit_question_generated_sync(question, question_number, total_questions)
     
@@ -305,6 +306,23 @@ class StreamManager:
         """Emit agent completion event."""
         self.emit_agent_complete_sync(agent_name, summary)
     
+    def emit_candidate_progress_sync(self, candidate: Dict[str, Any], batch: Dict[str, Any]) -> None:
+        """Emit a batch candidate's progress together with the batch totals synchronously."""
+        event = StreamEvent(
+            event_type=StreamEventType.CANDIDATE_PROGRESS,
+            agent_name="BatchQuestionGeneration",
+            data={
+                "candidate": candidate,
+                "batch": batch,
+                "status": candidate.get("status")
+            }
+        )
+        self.emit_event_sync(event)
+    
+    async def emit_candidate_progress(self, candidate: Dict[str, Any], batch: Dict[str, Any]) -> None:
+        """Emit a batch candidate's progress event."""
+        self.emit_candidate_progress_sync(candidate, batch)
+    
     def emit_error_sync(self, agent_name: str, error: str, details: Dict[str, Any] = None) -> None:
         """Emit error event synchronously."""
         event = StreamEvent(
@@ -0,0 +1,43 @@
+"""
+Bounded concurrency helpers for fanning out independent LLM calls
+"""
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, TypeVar
+
+from app.services.qgen.utils.settings import get_qgen_settings
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+def get_max_concurrency(provider: str) -> int:
+    """Return the concurrency cap for a provider from `qgen.concurrency`."""
+    concurrency = get_qgen_settings().get("concurrency") or {}
+    return max(1, int(concurrency.get(provider, concurrency.get("default", DEFAULT_MAX_CONCURRENCY))))
+
+
+def run_bounded(func: Callable[[T], R], items: Iterable[T], max_workers: int) -> List[R]:
+    """
+    Apply `func` to every item with at most `max_workers` running at once.
+
+    Results are returned in the order of `items`. Each call runs in a copy of
+    the caller's context so context variables (stream manager, usage tracking)
+    are visible in the worker threads. Exceptions are re-raised; callers that
+    need per-item fallbacks should handle them inside `func`.
+    """
+    items = list(items)
+    if not items:
+        return []
+    if max_workers <= 1 or len(items) == 1:
+        return [func(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items)), thread_name_prefix="qgen") as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, func, item)
+            for item in items
+        ]
+        return [future.result() for future in futures]
@@ -0,0 +1,105 @@
+"""
+Incremental JSON parsing for streamed structured outputs
+
+Model output arrives as text fragments of one JSON document such as
+`{"questions": [{...}, {...}]}`. `IncrementalArrayParser` scans the
+fragments once, tracking strings, escapes and nesting, and returns each
+object of the target array as soon as its closing brace arrives, so callers
+can act on the first item long before the document is complete.
+
+Text before the first brace or bracket (e.g. a markdown code fence) is ignored.
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class IncrementalArrayParser:
+    """
+    Yields the objects of one array of a streamed JSON document as they close.
+
+    Args:
+        array_key: key of the array in the top-level object; a top-level
+            array is also accepted
+    """
+
+    def __init__(self, array_key: str):
+        self.array_key = array_key
+        self._text = ""
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._string_start: Optional[int] = None
+        self._last_string: Optional[str] = None
+        self._in_array = False
+        self._item_start: Optional[int] = None
+        self.items_parsed = 0
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return self._text
+
+    def feed(self, fragment: str) -> List[Dict[str, Any]]:
+        """Consume a fragment and return the array objects completed by it."""
+        if not fragment:
+            return []
+        offset = len(self._text)
+        self._text += fragment
+
+        completed = []
+        for i, char in enumerate(fragment, offset):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1 and self._item_start is None:
+                        self._last_string = self._text[self._string_start + 1:i]
+                continue
+
+            if char == '"':
+                if self._stack:
+                    self._in_string = True
+                    self._string_start = i
+            elif char in "{[":
+                self._open(char, i)
+            elif char in "}]" and self._stack:
+                self._stack.pop()
+                if char == "}" and self._item_start is not None and len(self._stack) == self._array_depth:
+                    item = self._parse_item(self._text[self._item_start:i + 1])
+                    self._item_start = None
+                    if item is not None:
+                        completed.append(item)
+                elif char == "]" and self._in_array and len(self._stack) < self._array_depth:
+                    self._in_array = False
+        return completed
+
+    @property
+    def _array_depth(self) -> int:
+        return 2 if self._stack[:1] == ["{"] or not self._stack else 1
+
+    def _open(self, char: str, index: int) -> None:
+        if char == "[" and not self._in_array:
+            top_level_array = not self._stack
+            keyed_array = self._stack == ["{"] and self._last_string == self.array_key
+            if top_level_array or keyed_array:
+                self._in_array = True
+        elif char == "{" and self._in_array and self._item_start is None and len(self._stack) == self._array_depth:
+            self._item_start = index
+        self._stack.append(char)
+
+    def _parse_item(self, raw: str) -> Optional[Dict[str, Any]]:
+        try:
+            item = json.loads(raw)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping malformed streamed {self.array_key} item: {e}")
+            return None
+        self.items_parsed += 1
+        return item
@@ -0,0 +1,291 @@
+"""
+Prompt budgeting - token counting, compact context encoding and document trimming
+
+Resumes and job descriptions are compacted (whitespace, repeated lines) and,
+when still over the provider's budget (`qgen.prompt_budget`), low-value
+sections such as references, hobbies or company boilerplate are dropped
+before the remaining sections are trimmed proportionally. Structured context
+is serialised as compact JSON instead of indented JSON.
+
+Token counts use tiktoken when it is installed (exact for OpenAI models, an
+approximation for other providers) and about 4 characters per token otherwise.
+"""
+
+import json
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.logger import get_logger
+from app.services.qgen.utils.settings import get_qgen_settings
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_DOCUMENT_TOKENS = 6000
+CHARS_PER_TOKEN = 4
+
+# Section headings whose content rarely matters for skill extraction
+DEFAULT_LOW_VALUE_SECTIONS = [
+    "references", "referees", "hobbies", "interests", "hobbies and interests", "personal details",
+    "personal information", "personal profile", "declaration", "languages known", "extracurricular activities",
+    "about us", "about the company", "who we are", "our culture", "benefits", "perks", "what we offer",
+    "equal opportunity", "equal employment opportunity", "diversity and inclusion", "how to apply"
+]
+
+_BULLET_PREFIX = re.compile(r"^\s*(?:[-*•▪◦●·]|\d+[.)])\s*")
+
+
+@lru_cache(maxsize=16)
+def _get_encoding(model: Optional[str]):
+    """Return the tiktoken encoding for `model` (cl100k_base for unknown models), or None."""
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model or "")
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # Encodings are downloaded on first use; offline workers fall back to estimates
+        logger.warning(f"tiktoken encoding unavailable, estimating tokens from characters: {e}")
+        return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Count (or estimate) the tokens of `text` for `model`."""
+    if not text:
+        return 0
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def compact_json(data: Any) -> str:
+    """Serialise structured prompt context without indentation, nulls or empty values."""
+    return json.dumps(_drop_empty(data), separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _drop_empty(data: Any) -> Any:
+    if isinstance(data, dict):
+        return {k: _drop_empty(v) for k, v in data.items() if v not in (None, "", [], {})}
+    if isinstance(data, (list, tuple)):
+        return [_drop_empty(v) for v in data]
+    return data
+
+
+def compact_text(text: str) -> str:
+    """Normalise whitespace and drop repeated lines (e.g. bullets copied across roles)."""
+    lines, seen = [], set()
+    for line in text.splitlines():
+        line = re.sub(r"[ \t ]+", " ", line).strip()
+        if not line:
+            if lines and lines[-1]:
+                lines.append("")
+            continue
+        key = _BULLET_PREFIX.sub("", line).lower()
+        if len(key) > 20 and key in seen:
+            continue
+        seen.add(key)
+        lines.append(line)
+    return "\n".join(lines).strip()
+
+
+class PromptBudget:
+    """
+    Fits documents into a per-provider token budget.
+
+    Args:
+        max_document_tokens: default budget for the documents of one prompt
+        provider_limits: per-provider overrides of `max_document_tokens`
+        low_value_sections: headings of sections dropped first when over budget
+        enabled: when False documents are only compacted, never trimmed
+    """
+
+    def __init__(self, max_document_tokens: int = DEFAULT_MAX_DOCUMENT_TOKENS,
+                 provider_limits: Optional[Dict[str, int]] = None,
+                 low_value_sections: Optional[List[str]] = None, enabled: bool = True):
+        self.max_document_tokens = max_document_tokens
+        self.provider_limits = provider_limits or {}
+        self.low_value_sections = {s.lower() for s in (low_value_sections or DEFAULT_LOW_VALUE_SECTIONS)}
+        self.enabled = enabled
+
+    def document_budget(self, provider: str) -> int:
+        return int(self.provider_limits.get(provider, self.max_document_tokens))
+
+    def fit(self, text: str, provider: str, model: Optional[str] = None,
+            max_tokens: Optional[int] = None) -> str:
+        """Return `text` compacted and, if needed, trimmed to the budget."""
+        return self.fit_many({"document": text}, provider, model, max_tokens)["document"]
+
+    def fit_many(self, documents: Dict[str, str], provider: str, model: Optional[str] = None,
+                 max_tokens: Optional[int] = None) -> Dict[str, str]:
+        """
+        Fit several documents of one prompt into a shared budget.
+
+        Documents under their fair share keep their full text; the rest of the
+        budget is split between the longer ones in proportion to their size.
+        """
+        compacted = {name: compact_text(text or "") for name, text in documents.items()}
+        if not self.enabled:
+            return compacted
+
+        budget = max_tokens or self.document_budget(provider)
+        sizes = {name: count_tokens(text, model) for name, text in compacted.items()}
+        if sum(sizes.values()) <= budget:
+            return compacted
+
+        # Over budget: drop low-value sections everywhere, then trim what is still too long
+        fitted = {name: self.drop_low_value(text) for name, text in compacted.items()}
+        sizes_after_drop = {name: count_tokens(text, model) for name, text in fitted.items()}
+        if sum(sizes_after_drop.values()) > budget:
+            shares = self._allocate(sizes_after_drop, budget)
+            for name, text in fitted.items():
+                if sizes_after_drop[name] > shares[name]:
+                    fitted[name] = self._trim(text, shares[name], model)
+
+        for name, text in fitted.items():
+            if text != compacted[name]:
+                logger.info(
+                    f"✂️ Fitted {name} from {sizes[name]} to {count_tokens(text, model)} tokens "
+                    f"(budget {budget}, provider {provider})"
+                )
+        return fitted
+
+    @staticmethod
+    def _allocate(sizes: Dict[str, int], budget: int) -> Dict[str, int]:
+        shares, remaining, pending = {}, budget, dict(sizes)
+        while pending:
+            fair_share = remaining // len(pending)
+            small = {name: size for name, size in pending.items() if size <= fair_share}
+            if not small:
+                total = sum(pending.values())
+                for name, size in pending.items():
+                    shares[name] = max(1, remaining * size // total)
+                break
+            for name, size in small.items():
+                shares[name] = size
+                remaining -= size
+                del pending[name]
+        return shares
+
+    def _split_sections(self, text: str) -> List[Tuple[str, List[str]]]:
+        """Split a document into (heading, lines) sections; the first section may have no heading."""
+        sections: List[Tuple[str, List[str]]] = [("", [])]
+        for line in text.splitlines():
+            if self._is_heading(line):
+                sections.append((line, []))
+            else:
+                sections[-1][1].append(line)
+        return [s for s in sections if s[0] or any(s[1])]
+
+    @staticmethod
+    def _is_heading(line: str) -> bool:
+        stripped = line.strip().rstrip(":")
+        if not stripped or len(stripped) > 40 or _BULLET_PREFIX.match(line):
+            return False
+        return line.strip().endswith(":") or stripped.isupper() or (stripped.istitle() and len(stripped.split()) <= 4)
+
+    def _is_low_value(self, heading: str) -> bool:
+        name = re.sub(r"[^a-z& ]", "", heading.lower()).replace("&", "and").strip()
+        return name in self.low_value_sections
+
+    def drop_low_value(self, text: str) -> str:
+        """Remove sections such as references, hobbies or company boilerplate."""
+        sections = self._split_sections(text)
+        dropped = [heading.strip() for heading, _ in sections if self._is_low_value(heading)]
+        if not dropped:
+            return text
+        logger.info(f"Dropped low-value sections: {', '.join(dropped)}")
+        return self._join([s for s in sections if not self._is_low_value(s[0])])
+
+    def split_chunks(self, text: str, chunk_tokens: int, model: Optional[str] = None) -> List[str]:
+        """
+        Split a document into chunks of at most about `chunk_tokens` on section boundaries.
+
+        Sections are packed greedily in order; a section longer than a chunk is
+        split between lines and its heading repeated on every part.
+        """
+        parts: List[str] = []
+        for heading, lines in self._split_sections(text):
+            section = self._join([(heading, lines)])
+            if count_tokens(section, model) <= chunk_tokens:
+                parts.append(section)
+                continue
+            piece, used = [], count_tokens(heading, model)
+            for line in lines:
+                cost = count_tokens(line, model)
+                if piece and used + cost > chunk_tokens:
+                    parts.append(self._join([(heading, piece)]))
+                    piece, used = [], count_tokens(heading, model)
+                piece.append(line)
+                used += cost
+            if piece:
+                parts.append(self._join([(heading, piece)]))
+
+        chunks, current, used = [], [], 0
+        for part in parts:
+            cost = count_tokens(part, model)
+            if current and used + cost > chunk_tokens:
+                chunks.append("\n\n".join(current))
+                current, used = [], 0
+            current.append(part)
+            used += cost
+        if current:
+            chunks.append("\n\n".join(current))
+        return chunks
+
+    def _trim(self, text: str, budget: int, model: Optional[str]) -> str:
+        """Keep the head of every section in proportion to its size."""
+        sections = self._split_sections(text)
+        sizes = {i: count_tokens(self._join([s]), model) for i, s in enumerate(sections)}
+        shares = self._allocate(sizes, budget)
+        trimmed = []
+        for i, (heading, lines) in enumerate(sections):
+            section_lines, used = [], count_tokens(heading, model)
+            for line in lines:
+                cost = count_tokens(line, model)
+                if used + cost > shares[i]:
+                    break
+                section_lines.append(line)
+                used += cost
+            if section_lines or not lines:
+                trimmed.append((heading, section_lines))
+        return self._join(trimmed)
+
+    @staticmethod
+    def _join(sections: List[Tuple[str, List[str]]]) -> str:
+        parts = []
+        for heading, lines in sections:
+            parts.append("\n".join(([heading] if heading else []) + lines).strip())
+        return "\n\n".join(p for p in parts if p)
+
+
+# Singleton instance for reuse across agents
+_budget_instance = None
+_budget_lock = threading.Lock()
+
+
+def get_prompt_budget() -> PromptBudget:
+    """
+    Get singleton prompt budget configured from `qgen.prompt_budget`.
+    """
+    global _budget_instance
+    if _budget_instance is None:
+        with _budget_lock:
+            if _budget_instance is None:
+                settings = get_qgen_settings().get("prompt_budget") or {}
+                _budget_instance = PromptBudget(
+                    max_document_tokens=settings.get("max_document_tokens", DEFAULT_MAX_DOCUMENT_TOKENS),
+                    provider_limits=settings.get("max_document_tokens_per_provider"),
+                    low_value_sections=settings.get("low_value_sections"),
+                    enabled=settings.get("enabled", True)
+                )
+    return _budget_instance
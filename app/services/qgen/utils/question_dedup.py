@@ -0,0 +1,186 @@
+"""
+Near-duplicate question elimination
+
+Categories are generated independently, so overlapping skills often get
+near-identical questions ("How would you tune PostgreSQL indexes for..." in
+both Databases and Backend). Every duplicate would cost its own evaluation
+and expected response calls, so duplicates are dropped locally between
+generation and evaluation.
+
+Questions are compared by TF-IDF cosine similarity of their words (stop
+words and question boilerplate such as "how would you" ignored, so reworded
+questions still match), computed with NumPy as one matrix product when it is
+installed and with sparse dictionaries otherwise. Of two questions at or above
+`similarity_threshold`, the one already accepted wins, then a question-bank
+question, then the one targeting the skill with the higher extraction
+confidence, then the earlier one. Every merge is recorded.
+
+Configured under `qgen.question_dedup`.
+"""
+
+import math
+import re
+import threading
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.logger import get_logger
+from app.services.qgen.models.schemas import ExtractedSkill, TechnicalQuestion
+from app.services.qgen.stores.question_bank import BANK_ID_PREFIX
+from app.services.qgen.stores.skill_index import skill_key
+from app.services.qgen.utils.settings import get_qgen_settings
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = get_logger(__name__)
+
+DEFAULT_SIMILARITY_THRESHOLD = 0.8
+
+STOP_WORDS = frozenset("""
+    a an and are as at be been being but by can could did do does for from had has have how i if in into is it
+    its of on or our should so such than that the their them then there these they this those to was we were
+    what when where which while who why will with would you your
+    describe discuss explain walk through example give tell me approach
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+
+
+@dataclass
+class DuplicateMerge:
+    """A question dropped as a near-duplicate of a kept one."""
+    kept_question_id: str
+    removed_question_id: str
+    similarity: float
+
+    def to_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+def question_terms(text: str) -> List[str]:
+    """Words of a question, stop words removed."""
+    return [word for word in _TOKEN.findall(text.lower()) if word not in STOP_WORDS]
+
+
+def similarity_matrix(texts: Sequence[str]) -> List[List[float]]:
+    """Pairwise TF-IDF cosine similarity of `texts` (sublinear term frequency, smoothed IDF)."""
+    documents = [question_terms(text) for text in texts]
+    vocabulary: Dict[str, int] = {}
+    for terms in documents:
+        for term in terms:
+            vocabulary.setdefault(term, len(vocabulary))
+    if not vocabulary:
+        return [[0.0] * len(texts) for _ in texts]
+
+    if NUMPY_AVAILABLE:
+        counts = np.zeros((len(documents), len(vocabulary)))
+        for row, terms in enumerate(documents):
+            for term in terms:
+                counts[row, vocabulary[term]] += 1
+        document_frequency = np.count_nonzero(counts, axis=0)
+        idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1
+        weights = np.where(counts > 0, 1 + np.log(np.maximum(counts, 1)), 0) * idf
+        norms = np.linalg.norm(weights, axis=1, keepdims=True)
+        weights = weights / np.where(norms == 0, 1, norms)
+        return (weights @ weights.T).tolist()
+
+    document_frequency: Dict[str, int] = {}
+    for terms in documents:
+        for term in set(terms):
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+    vectors = []
+    for terms in documents:
+        counts: Dict[str, int] = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        vector = {
+            term: (1 + math.log(count)) * (math.log((1 + len(documents)) / (1 + document_frequency[term])) + 1)
+            for term, count in counts.items()
+        }
+        norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+        vectors.append({term: value / norm for term, value in vector.items()})
+    return [
+        [sum(value * other.get(term, 0.0) for term, value in vector.items()) for other in vectors]
+        for vector in vectors
+    ]
+
+
+class QuestionDeduplicator:
+    """Drops near-duplicate questions, keeping the stronger variant of each group."""
+
+    def __init__(self, similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD):
+        self.similarity_threshold = similarity_threshold
+
+    def deduplicate(self, questions: List[TechnicalQuestion], skills: List[ExtractedSkill],
+                    accepted: Sequence[TechnicalQuestion] = ()) -> Tuple[List[TechnicalQuestion], List[DuplicateMerge]]:
+        """
+        Return `questions` without near-duplicates, in their original order, and the merges made.
+
+        Questions in `accepted` (e.g. already sent for evaluation) are never
+        dropped, but new questions duplicating them are.
+        """
+        if not questions or (len(questions) == 1 and not accepted):
+            return list(questions), []
+
+        candidates = list(accepted) + list(questions)
+        similarities = similarity_matrix([q.question_text for q in candidates])
+        confidence = {skill_key(s.skill_name): s.confidence_score for s in skills}
+
+        def rank(index: int):
+            question = candidates[index]
+            return (
+                index < len(accepted),
+                question.question_id.startswith(BANK_ID_PREFIX),
+                confidence.get(skill_key(question.targeted_skill), 0),
+                -index
+            )
+
+        kept: List[int] = []
+        merges: List[DuplicateMerge] = []
+        for index in sorted(range(len(candidates)), key=rank, reverse=True):
+            match = max(kept, key=lambda k: similarities[index][k], default=None)
+            if match is not None and similarities[index][match] >= self.similarity_threshold:
+                merges.append(DuplicateMerge(
+                    kept_question_id=candidates[match].question_id,
+                    removed_question_id=candidates[index].question_id,
+                    similarity=round(similarities[index][match], 3)
+                ))
+                continue
+            kept.append(index)
+
+        kept_ids = {candidates[index].question_id for index in kept}
+        if merges:
+            logger.info(f"🧹 Dropped {len(merges)} near-duplicate questions (threshold {self.similarity_threshold})")
+        return [q for q in questions if q.question_id in kept_ids], merges
+
+
+# Singleton instance for reuse across agents
+_dedup_instance = None
+_dedup_initialized = False
+_dedup_lock = threading.Lock()
+
+
+def get_question_deduplicator() -> Optional[QuestionDeduplicator]:
+    """
+    Get singleton question deduplicator configured from `qgen.question_dedup`.
+
+    Returns None when deduplication is disabled.
+    """
+    global _dedup_instance, _dedup_initialized
+    if _dedup_initialized:
+        return _dedup_instance
+
+    with _dedup_lock:
+        if _dedup_initialized:
+            return _dedup_instance
+        settings = get_qgen_settings().get("question_dedup") or {}
+        if settings.get("enabled", False):
+            _dedup_instance = QuestionDeduplicator(
+                similarity_threshold=float(settings.get("similarity_threshold", DEFAULT_SIMILARITY_THRESHOLD))
+            )
+        _dedup_initialized = True
+    return _dedup_instance
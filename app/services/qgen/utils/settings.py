@@ -0,0 +1,33 @@
+"""
+QGen settings - reads the `qgen` section of the application YAML config
+"""
+
+from typing import Any, Dict
+
+from app.db_ops.db_config import load_app_config
+
+# Map agent class names to their keys under `qgen.agents`
+AGENT_SETTINGS_KEYS = {
+    "SkillExtractionAgent": "skill_extraction",
+    "QuestionGenerationAgent": "question_generation",
+    "QuestionEvaluationAgent": "question_evaluation",
+    "ExpectedResponseAgent": "expected_response",
+    "ReportAssemblyAgent": "report_assembly"
+}
+
+_qgen_settings = None
+
+
+def get_qgen_settings() -> Dict[str, Any]:
+    """Return the cached `qgen` config section (empty dict if missing)."""
+    global _qgen_settings
+    if _qgen_settings is None:
+        _qgen_settings = load_app_config().get("qgen") or {}
+    return _qgen_settings
+
+
+def get_agent_settings(agent_name: str) -> Dict[str, Any]:
+    """Return the `qgen.agents.<key>` settings for an agent class name."""
+    agents = get_qgen_settings().get("agents") or {}
+    key = AGENT_SETTINGS_KEYS.get(agent_name, agent_name)
+    return agents.get(key) or {}
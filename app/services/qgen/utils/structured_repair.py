@@ -0,0 +1,314 @@
+"""
+Local repair of structured LLM outputs
+
+When a structured-output call returns text that does not parse or validate,
+the raw model output is repaired locally instead of being discarded:
+markdown fences and trailing commas are removed, a truncated document is cut
+back to its last complete item and closed, enum and literal values are
+matched case-insensitively and out-of-range integer literals (such as
+`difficulty_level`) are clamped. Each item of the output's lists is then
+validated on its own, so one bad item no longer loses the whole response.
+
+Callers that can re-ask for what is missing (e.g. questions for skills that
+a truncated response never reached) collect the repairs of their calls with
+`collect_repairs`.
+"""
+
+import contextvars
+import json
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, List, Literal, Optional, Tuple, Union, get_args, get_origin
+
+from pydantic import BaseModel, ValidationError
+
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Repairs made in the current context, when a caller collects them
+_current_repairs: contextvars.ContextVar[Optional[List['RepairResult']]] = contextvars.ContextVar(
+    "qgen_structured_repairs", default=None
+)
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+@dataclass
+class RepairResult:
+    """A salvaged structured output and what had to be fixed to get it."""
+    output: BaseModel
+    fixes: List[str] = field(default_factory=list)
+    dropped_items: int = 0
+    truncated: bool = False
+
+    @property
+    def incomplete(self) -> bool:
+        """True if part of the model's answer was lost (truncated or invalid items)."""
+        return self.truncated or self.dropped_items > 0
+
+
+@contextmanager
+def collect_repairs():
+    """Collect the repairs made by LLM calls in this context into the yielded list."""
+    repairs: List[RepairResult] = []
+    token = _current_repairs.set(repairs)
+    try:
+        yield repairs
+    finally:
+        _current_repairs.reset(token)
+
+
+# ---- raw output -------------------------------------------------------------
+
+def extract_raw_output(message: Any) -> Any:
+    """Return the model's raw structured answer: tool-call arguments or message text."""
+    additional = getattr(message, "additional_kwargs", None) or {}
+    for tool_call in additional.get("tool_calls") or []:
+        arguments = (tool_call.get("function") or {}).get("arguments")
+        if arguments:
+            return arguments
+    for tool_call in getattr(message, "invalid_tool_calls", None) or []:
+        if tool_call.get("args"):
+            return tool_call["args"]
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        if tool_call.get("args"):
+            return tool_call["args"]
+    content = getattr(message, "content", message)
+    if isinstance(content, list):
+        content = "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content if isinstance(content, (str, dict)) else None
+
+
+# ---- JSON text --------------------------------------------------------------
+
+def repair_json(text: str) -> Tuple[Any, List[str]]:
+    """
+    Parse JSON with common model faults fixed; returns (data, fixes).
+
+    Raises ValueError if nothing parseable can be recovered.
+    """
+    fixes = []
+    stripped = text.strip()
+    start = min((i for i in (stripped.find("{"), stripped.find("[")) if i >= 0), default=-1)
+    if start < 0:
+        raise ValueError("No JSON object in model output")
+    if start > 0 or stripped.endswith("```"):
+        fixes.append("stripped_wrapper")
+    stripped = stripped[start:].removesuffix("```").rstrip()
+
+    try:
+        return json.loads(stripped), fixes
+    except json.JSONDecodeError:
+        pass
+
+    cleaned, stack, checkpoints, removed_commas = _scan(stripped)
+    if removed_commas:
+        fixes.append("trailing_commas")
+    if not stack:
+        try:
+            return json.loads(cleaned), fixes
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Unrepairable JSON in model output: {e}") from e
+
+    # Truncated: cut back to the last complete value and close what is still open
+    for end, open_stack in reversed(checkpoints):
+        candidate = cleaned[:end].rstrip().rstrip(",") + "".join(_CLOSERS[c] for c in reversed(open_stack))
+        try:
+            return json.loads(candidate), fixes + ["truncated"]
+        except json.JSONDecodeError:
+            continue
+    raise ValueError("Truncated model output has no complete item")
+
+
+def _scan(text: str) -> Tuple[str, List[str], List[Tuple[int, List[str]]], bool]:
+    """
+    Drop trailing commas outside strings and track nesting.
+
+    Returns the cleaned text, the brackets still open at its end and, for
+    every closed object or array, (end offset, brackets open after it).
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    checkpoints: List[Tuple[int, List[str]]] = []
+    in_string = escaped = removed = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            out.append(char)
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append(char)
+        elif char in "}]" and stack:
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+                removed = True
+            stack.pop()
+            out.append(char)
+            if stack:
+                checkpoints.append((len(out), list(stack)))
+            continue
+        out.append(char)
+    return "".join(out), stack, checkpoints, removed
+
+
+# ---- schema-aware coercion --------------------------------------------------
+
+def _normalise_token(value: Any) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", str(value).lower()).strip("_")
+
+
+def _coerce(annotation: Any, value: Any) -> Any:
+    """Best-effort conversion of `value` towards `annotation` (validation happens later)."""
+    origin, args = get_origin(annotation), get_args(annotation)
+    if value is None:
+        return value
+    if origin is Union:
+        options = [arg for arg in args if arg is not type(None)]
+        return _coerce(options[0], value) if len(options) == 1 else value
+    if origin is Literal:
+        return _coerce_literal(args, value)
+    if origin in (list, List) and args and isinstance(value, list):
+        return [_coerce(args[0], item) for item in value]
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        wanted = _normalise_token(value)
+        for member in annotation:
+            if wanted in (_normalise_token(member.value), _normalise_token(member.name)):
+                return member.value
+        return value
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel) and isinstance(value, dict):
+        return normalise_model_data(annotation, value)
+    if annotation is int and isinstance(value, (str, float)):
+        try:
+            return int(round(float(value)))
+        except ValueError:
+            return value
+    return value
+
+
+def _coerce_literal(options: Tuple, value: Any) -> Any:
+    if options and all(isinstance(option, int) for option in options):
+        try:
+            number = int(round(float(value)))
+        except (TypeError, ValueError):
+            return value
+        return min(max(number, min(options)), max(options))
+    wanted = _normalise_token(value)
+    for option in options:
+        if _normalise_token(option) == wanted:
+            return option
+    return value
+
+
+def normalise_model_data(model: type, data: Any) -> Any:
+    """Coerce the fields of `data` towards the annotations of `model`."""
+    if not isinstance(data, dict):
+        return data
+    normalised = dict(data)
+    for name, model_field in model.model_fields.items():
+        if name in normalised:
+            normalised[name] = _coerce(model_field.annotation, normalised[name])
+    return normalised
+
+
+def coerce_to_model(model: type, data: Any) -> Optional[BaseModel]:
+    """Validate `data` as `model` after coercion; None if it is still invalid."""
+    try:
+        return model.model_validate(normalise_model_data(model, data))
+    except ValidationError:
+        return None
+
+
+def _item_model(annotation: Any) -> Optional[type]:
+    """Return the item model of a `List[SomeModel]` annotation."""
+    args = get_args(annotation)
+    if get_origin(annotation) in (list, List) and args and isinstance(args[0], type) and issubclass(args[0], BaseModel):
+        return args[0]
+    return None
+
+
+def salvage(schema: type, data: Any) -> Optional[RepairResult]:
+    """
+    Validate `data` as `schema`, keeping every valid item of its model lists.
+
+    Returns None if nothing useful is left (all item lists empty or other
+    fields invalid).
+    """
+    if isinstance(data, list):
+        list_fields = [name for name, f in schema.model_fields.items() if _item_model(f.annotation)]
+        if len(list_fields) != 1:
+            return None
+        data = {list_fields[0]: data}
+    if not isinstance(data, dict):
+        return None
+
+    values, dropped, any_items = {}, 0, False
+    for name, model_field in schema.model_fields.items():
+        if name not in data:
+            continue
+        item_model = _item_model(model_field.annotation)
+        if item_model is None or not isinstance(data[name], list):
+            values[name] = _coerce(model_field.annotation, data[name])
+            continue
+        items = [coerce_to_model(item_model, item) for item in data[name]]
+        valid = [item for item in items if item is not None]
+        dropped += len(items) - len(valid)
+        any_items = any_items or bool(valid)
+        values[name] = valid
+
+    if not any_items:
+        return None
+    try:
+        output = schema.model_validate(values)
+    except ValidationError:
+        return None
+    return RepairResult(output=output, dropped_items=dropped)
+
+
+def repair_structured_output(raw: Any, schema: type) -> Optional[RepairResult]:
+    """
+    Salvage a structured output from the raw model answer of a failed parse.
+
+    `raw` is a raw LLM message, its text or already-parsed arguments.
+    Returns None if nothing could be salvaged.
+    """
+    raw_output = raw if isinstance(raw, (str, dict, list)) else extract_raw_output(raw)
+    if raw_output is None:
+        return None
+
+    fixes: List[str] = []
+    if isinstance(raw_output, str):
+        try:
+            data, fixes = repair_json(raw_output)
+        except ValueError as e:
+            logger.warning(f"Structured output repair failed for {schema.__name__}: {e}")
+            return None
+    else:
+        data = raw_output
+
+    result = salvage(schema, data)
+    if result is None:
+        logger.warning(f"Structured output repair found no valid {schema.__name__} items")
+        return None
+    result.fixes = fixes + (["dropped_invalid_items"] if result.dropped_items else [])
+    result.truncated = "truncated" in fixes
+
+    logger.info(
+        f"🩹 Repaired {schema.__name__} locally (fixes: {', '.join(result.fixes) or 'coerced values'}, "
+        f"dropped items: {result.dropped_items})"
+    )
+    repairs = _current_repairs.get()
+    if repairs is not None:
+        repairs.append(result)
+    return result
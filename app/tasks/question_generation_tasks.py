@@ -1,7 +1,8 @@
 import time
 from datetime import datetime
-from typing import Dict, Any, Optional
-from celery import current_task
+from typing import Dict, Any, List, Optional
+from celery import chain, chord, current_task, group
+from celery.exceptions import Retry
 from sqlalchemy.orm import Session
 
 from app.celery_app import celery_app
@@ -13,6 +14,7 @@ from app.logger import get_logger
 from app.tasks.progress_tracker import ProgressTracker
 from app.tasks.email_tasks import send_completion_email
 from app.services.qgen.streaming.stream_manager import StreamManager
+from app.services.qgen.utils.settings import get_qgen_settings
 
 logger = get_logger(__name__)
 
@@ -57,6 +59,47 @@ class QuestionGenerationProgressTracker(ProgressTracker):
         else:
             logger.warning(f"DEBUG: Unknown agent_name '{agent_name}' in agent_mapping")
 
+class BatchCandidateProgressTracker(QuestionGenerationProgressTracker):
+    """
+    Progress tracker for one candidate of a batch campaign.
+    
+    Every update also refreshes the batch task's aggregate progress and
+    publishes the candidate's progress on the batch task's stream channel,
+    so one WebSocket connection follows the whole campaign.
+    """
+    
+    def __init__(self, task_id: str, db: Session, batch_id: str):
+        super().__init__(task_id, db)
+        self.batch_id = batch_id
+        self._batch_stream = StreamManager(batch_id, websocket_enabled=True)
+    
+    def update_progress(self, progress: int, current_step: str, step_number: Optional[int] = None):
+        super().update_progress(progress, current_step, step_number)
+        self._report_to_batch()
+    
+    def complete_task(self, result_data: Optional[Dict[str, Any]] = None, rubric_id: Optional[str] = None):
+        super().complete_task(result_data, rubric_id)
+        self._report_to_batch()
+    
+    def fail_task(self, error_message: str):
+        super().fail_task(error_message)
+        self._report_to_batch()
+    
+    def _report_to_batch(self):
+        """Update the batch's aggregate progress and stream this candidate's progress; never raises."""
+        try:
+            summary = _batch_summary(self.db, self.batch_id)
+            if summary is None:
+                return
+            _update_batch_progress(self.db, self.batch_id, summary)
+            candidate = next(c for c in summary["candidates"] if c["task_id"] == self.task_id)
+            self._batch_stream.emit_candidate_progress_sync(
+                candidate, {k: v for k, v in summary.items() if k != "candidates"}
+            )
+        except Exception as e:
+            self.db.rollback()
+            logger.warning(f"Failed to report candidate {self.task_id} progress to batch {self.batch_id}: {e}")
+
 @celery_app.task(bind=True, name="question_generation_tasks.generate_interview_questions_async")
 def generate_interview_questions_async(
     self,
@@ -65,10 +108,13 @@ def generate_interview_questions_async(
     position_title: str = "Technical Position",
     llm_provider: str = "openai",
     user_email: Optional[str] = None,
-    user_id: Optional[str] = None
+    user_id: Optional[str] = None,
+    batch_id: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Async task for generating interview questions using multi-agent system
+    
+    `batch_id` is set when the task generates one candidate of a batch campaign.
     """
     task_id = self.request.id
     logger.info(f"Starting async question generation task {task_id} for position: {position_title}")
@@ -79,7 +125,10 @@ def generate_interview_questions_async(
     try:
         # Get database session and progress tracker
         db = get_db_session()
-        progress_tracker = QuestionGenerationProgressTracker(task_id, db)
+        if batch_id:
+            progress_tracker = BatchCandidateProgressTracker(task_id, db, batch_id)
+        else:
+            progress_tracker = QuestionGenerationProgressTracker(task_id, db)
         
         # Immediately update task status to in_progress (record already exists from API)
         logger.info(f"Updating task {task_id} status to in_progress")
@@ -139,21 +188,24 @@ def generate_interview_questions_async(
         # Import and create multi-agent system
         from app.services.qgen.orchestrator.multi_agent_system import create_technical_interview_system
         from app.services.qgen.models.schemas import LLMProvider
+        from app.llm_client_ops import is_provider_enabled
         
         provider_mapping = {
             "openai": LLMProvider.OPENAI,
             "gemini": LLMProvider.GEMINI,
             "groq": LLMProvider.GROQ,
             "azure_openai": LLMProvider.AZURE_OPENAI,
-            "portkey": LLMProvider.PORTKEY
+            "portkey": LLMProvider.PORTKEY,
+            "fake": LLMProvider.FAKE
         }
         
-        llm_provider_enum = provider_mapping.get(llm_provider, LLMProvider.OPENAI)
+        llm_provider_enum = provider_mapping.get(llm_provider)
+        if llm_provider_enum is None or not is_provider_enabled(llm_provider):
+            raise ValueError(f"Unknown or disabled LLM provider: {llm_provider}")
         
         # Create interview system with progress tracking and streaming
         interview_system = _create_interview_system_with_progress_tracking(
             llm_provider_enum,
-            "gpt-4o-mini" if llm_provider_enum == LLMProvider.OPENAI else "gemini-2.0-flash-001",
             progress_tracker,
             task_id
         )
@@ -167,8 +219,14 @@ def generate_interview_questions_async(
             resume_text=resume_text,
             job_description=jd_text,
             position_title=position_title,
-            thread_id=f"async_{task_id}"
+            thread_id=f"async_{task_id}",
+            # Celery retries keep the task id, so a retry resumes the failed run's thread
+            resume_thread_id=f"async_{task_id}" if self.request.retries else None
         )
+        _store_llm_usage(db, result, "question_generation", task_id, user_id)
+        
+        if not result["success"]:
+            _retry_from_checkpoint(self, result)
         
         # Store result in database if successful
         rubric_id = None
@@ -223,6 +281,8 @@ def generate_interview_questions_async(
         logger.info(f"Async question generation task {task_id} completed successfully")
         return result
         
+    except Retry:
+        raise
     except Exception as e:
         error_msg = f"Error in async question generation: {str(e)}"
         logger.error(f"Task {task_id} failed: {error_msg}")
@@ -302,21 +362,24 @@ def generate_quick_questions_async(
         # Import and create multi-agent system
         from app.services.qgen.orchestrator.multi_agent_system import create_technical_interview_system
         from app.services.qgen.models.schemas import LLMProvider
+        from app.llm_client_ops import is_provider_enabled
         
         provider_mapping = {
             "openai": LLMProvider.OPENAI,
             "gemini": LLMProvider.GEMINI,
             "groq": LLMProvider.GROQ,
             "azure_openai": LLMProvider.AZURE_OPENAI,
-            "portkey": LLMProvider.PORTKEY
+            "portkey": LLMProvider.PORTKEY,
+            "fake": LLMProvider.FAKE
         }
         
-        llm_provider_enum = provider_mapping.get(llm_provider, LLMProvider.GEMINI)
+        llm_provider_enum = provider_mapping.get(llm_provider)
+        if llm_provider_enum is None or not is_provider_enabled(llm_provider):
+            raise ValueError(f"Unknown or disabled LLM provider: {llm_provider}")
         
         # Create interview system with progress tracking and streaming
         interview_system = _create_interview_system_with_progress_tracking(
             llm_provider_enum,
-            "gpt-4o-mini" if llm_provider_enum == LLMProvider.OPENAI else "gemini-2.0-flash-001",
             progress_tracker,
             task_id
         )
@@ -327,8 +390,14 @@ def generate_quick_questions_async(
             resume_text=resume_text or "",
             job_description=job_description or "",
             position_title=position_title,
-            thread_id=f"quick_async_{task_id}"
+            thread_id=f"quick_async_{task_id}",
+            # Celery retries keep the task id, so a retry resumes the failed run's thread
+            resume_thread_id=f"quick_async_{task_id}" if self.request.retries else None
         )
+        _store_llm_usage(db, result, "quick_question_generation", task_id, user_id)
+        
+        if not result["success"]:
+            _retry_from_checkpoint(self, result)
         
         # Store result in database if successful
         rubric_id = None
@@ -385,6 +454,8 @@ def generate_quick_questions_async(
         logger.info(f"Async quick question generation task {task_id} completed successfully")
         return result
         
+    except Retry:
+        raise
     except Exception as e:
         error_msg = f"Error in async quick question generation: {str(e)}"
         logger.error(f"Quick task {task_id} failed: {error_msg}")
@@ -421,19 +492,266 @@ def generate_quick_questions_async(
         if db:
             db.close()
 
-def _create_interview_system_with_progress_tracking(llm_provider, llm_model, progress_tracker, task_id=None):
+@celery_app.task(bind=True, name="question_generation_tasks.generate_batch_interview_questions_async")
+def generate_batch_interview_questions_async(
+    self,
+    jd_document_id: str,
+    candidates: List[Dict[str, str]],
+    position_title: str = "Technical Position",
+    llm_provider: str = "openai",
+    user_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Async task for a batch campaign: one job description against many resumes.
+    
+    The JD skill profile is extracted once and stored in the JD profile cache,
+    then the candidates (each with a pre-created task record) are fanned out
+    across `qgen.batch.max_parallel_candidates` lanes of sequential
+    question generation tasks. A chord callback finalises the batch when
+    every lane is done.
+    """
+    batch_id = self.request.id
+    logger.info(f"Starting batch question generation {batch_id}: {len(candidates)} candidates for {position_title}")
+    
+    db = None
+    progress_tracker = None
+    
+    try:
+        db = get_db_session()
+        progress_tracker = ProgressTracker(batch_id, db, total_steps=2)
+        progress_tracker.update_status_to_in_progress()
+        progress_tracker.update_progress(progress=1, current_step="Analyzing job description...", step_number=1)
+        
+        jd_document = crud.get_document_by_type(
+            db=db,
+            document_id=jd_document_id,
+            document_type=DocumentType.JD.value
+        )
+        if not jd_document or not jd_document.extracted_text:
+            raise ValueError(f"JD document with ID {jd_document_id} not found or has no extracted text")
+        
+        from app.services.qgen.models.schemas import LLMProvider
+        from app.llm_client_ops import is_provider_enabled
+        from app.services.qgen.stores.jd_profile_store import get_jd_profile_store
+        
+        provider_mapping = {
+            "openai": LLMProvider.OPENAI,
+            "gemini": LLMProvider.GEMINI,
+            "groq": LLMProvider.GROQ,
+            "azure_openai": LLMProvider.AZURE_OPENAI,
+            "portkey": LLMProvider.PORTKEY,
+            "fake": LLMProvider.FAKE
+        }
+        
+        llm_provider_enum = provider_mapping.get(llm_provider)
+        if llm_provider_enum is None or not is_provider_enabled(llm_provider):
+            raise ValueError(f"Unknown or disabled LLM provider: {llm_provider}")
+        
+        # Extract the JD profile once so every candidate run reuses it from the cache
+        if get_jd_profile_store() is not None:
+            interview_system = _create_interview_system_with_progress_tracking(llm_provider_enum, None)
+            interview_system.agents.skill_extractor.get_jd_profile(jd_document.extracted_text, position_title)
+        else:
+            logger.warning(f"JD profile cache disabled, batch {batch_id} candidates will each analyze the JD")
+        
+        settings = get_qgen_settings().get("batch") or {}
+        lane_count = max(1, min(int(settings.get("max_parallel_candidates", 8)), len(candidates)))
+        lanes = [
+            chain(*(
+                generate_interview_questions_async.si(
+                    jd_document_id, candidate["resume_document_id"], position_title,
+                    llm_provider, None, user_id, batch_id
+                ).set(task_id=candidate["task_id"])
+                for candidate in candidates[lane::lane_count]
+            ))
+            for lane in range(lane_count)
+        ]
+        progress_tracker.update_progress(
+            progress=2,
+            current_step=f"Generating questions for {len(candidates)} candidates...",
+            step_number=2
+        )
+        chord(group(lanes))(finalize_batch_interview_questions.si(batch_id))
+        logger.info(f"Batch {batch_id} dispatched {len(candidates)} candidates across {lane_count} lanes")
+        return {"success": True, "batch_id": batch_id, "candidates": len(candidates), "lanes": lane_count}
+        
+    except Exception as e:
+        error_msg = f"Error in batch question generation: {str(e)}"
+        logger.error(f"Batch {batch_id} failed: {error_msg}")
+        if progress_tracker:
+            progress_tracker.fail_task(error_msg)
+            _fail_pending_candidates(db, candidates, error_msg)
+        return {
+            "success": False,
+            "error": error_msg,
+            "task_id": batch_id
+        }
+    finally:
+        if db:
+            db.close()
+
+@celery_app.task(bind=True, name="question_generation_tasks.finalize_batch_interview_questions")
+def finalize_batch_interview_questions(self, batch_id: str) -> Dict[str, Any]:
+    """Chord callback: record the batch outcome once every candidate has finished."""
+    db = None
+    try:
+        db = get_db_session()
+        summary = _batch_summary(db, batch_id)
+        if summary is None:
+            logger.error(f"Batch task {batch_id} not found")
+            return {"success": False, "error": f"Batch task {batch_id} not found", "task_id": batch_id}
+        
+        progress_tracker = ProgressTracker(batch_id, db, total_steps=2)
+        if summary["completed"] == 0:
+            progress_tracker.fail_task(f"All {summary['total']} candidates failed")
+        else:
+            progress_tracker.complete_task(result_data=summary)
+        
+        batch = progress_tracker.get_status()
+        if batch and batch.user_email and summary["completed"]:
+            try:
+                send_completion_email.delay(
+                    user_email=batch.user_email,
+                    task_id=batch_id,
+                    position_title=batch.position_title,
+                    result_summary={
+                        "questions_generated": summary["questions_generated"],
+                        "candidates_completed": summary["completed"],
+                        "candidates_failed": summary["failed"]
+                    }
+                )
+            except Exception as e:
+                logger.error(f"Failed to queue completion email for batch {batch_id}: {e}")
+        
+        logger.info(f"Batch {batch_id} finished: {summary['completed']} completed, {summary['failed']} failed")
+        return {"success": summary["completed"] > 0, "task_id": batch_id, **{k: v for k, v in summary.items() if k != "candidates"}}
+    finally:
+        if db:
+            db.close()
+
+def _batch_summary(db: Session, batch_id: str) -> Optional[Dict[str, Any]]:
+    """Aggregate the candidate task records of a batch."""
+    batch = db.query(TaskStatus).filter(TaskStatus.task_id == batch_id).first()
+    if batch is None:
+        return None
+    candidates = (batch.request_data or {}).get("candidates") or []
+    task_ids = [c["task_id"] for c in candidates]
+    rows = {t.task_id: t for t in db.query(TaskStatus).filter(TaskStatus.task_id.in_(task_ids))}
+    
+    items = []
+    for candidate in candidates:
+        row = rows.get(candidate["task_id"])
+        result = (row.result_data or {}) if row else {}
+        items.append({
+            "task_id": candidate["task_id"],
+            "resume_document_id": candidate["resume_document_id"],
+            "status": row.status if row else "pending",
+            "progress": row.progress if row else 0,
+            "current_step": row.current_step if row else None,
+            "rubric_id": row.rubric_id if row else None,
+            "questions_generated": result.get("questions_generated", 0) if row and row.status == "completed" else 0,
+            "error_message": row.error_message if row else None
+        })
+    
+    statuses = [item["status"] for item in items]
+    return {
+        "total": len(items),
+        "completed": statuses.count("completed"),
+        "failed": statuses.count("failed"),
+        "in_progress": statuses.count("in_progress"),
+        "pending": statuses.count("pending"),
+        "progress": sum(item["progress"] for item in items) // max(len(items), 1),
+        "questions_generated": sum(item["questions_generated"] for item in items),
+        "candidates": items
+    }
+
+def _update_batch_progress(db: Session, batch_id: str, summary: Dict[str, Any]) -> None:
+    """Mirror the candidates' aggregate progress on the batch task record."""
+    batch = db.query(TaskStatus).filter(TaskStatus.task_id == batch_id).first()
+    if batch is None or batch.status in ("completed", "failed"):
+        return
+    finished = summary["completed"] + summary["failed"]
+    # 100% is reserved for the chord callback that finalises the batch
+    batch.progress = max(min(summary["progress"], 99), batch.progress or 0)
+    batch.current_step = f"{finished}/{summary['total']} candidates finished"
+    db.commit()
+
+def _fail_pending_candidates(db: Session, candidates: List[Dict[str, str]], error_msg: str) -> None:
+    """Mark the candidate records of a batch that could not be dispatched as failed."""
+    try:
+        db.query(TaskStatus).filter(
+            TaskStatus.task_id.in_([c["task_id"] for c in candidates]),
+            TaskStatus.status == "pending"
+        ).update({
+            "status": "failed",
+            "error_message": error_msg,
+            "completed_at": datetime.utcnow()
+        }, synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to mark batch candidates as failed: {e}")
+
+def _store_llm_usage(db: Session, result: Dict[str, Any], source: str,
+                     task_id: str, user_id: Optional[str]) -> None:
+    """Persist the run's LLM usage records; failures are logged, not raised."""
+    records = (result.get("llm_usage") or {}).get("records")
+    if not records:
+        return
+    try:
+        crud.create_llm_usage_records(db, records, source=source, task_id=task_id, user_id=user_id)
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Failed to store LLM usage for task {task_id}: {e}")
+
+def _retry_from_checkpoint(task, result: Dict[str, Any]) -> None:
     """
-    Create interview system and integrate progress tracking and streaming from the start
+    Retry a failed interview generation after a transient provider error while
+    retries remain.
+
+    The workflow keeps its checkpoints on failure, so the retried task resumes
+    from the last completed agent instead of starting from skill extraction.
+    Deterministic failures (bad output, validation, empty results) would fail
+    the same way again and are not retried. When no retry is made, the reason is
+    recorded in `result["retry_skipped"]` and the function returns without raising.
     """
-    logger.info("DEBUG: Creating interview system with integrated progress tracking and streaming")
+    settings = get_qgen_settings().get("checkpointing") or {}
+    max_retries = int(settings.get("max_resume_retries", 2))
+    failed_at = result.get("failed_agent") or result.get("stage_reached")
+    if not result.get("transient_error"):
+        result["retry_skipped"] = f"non-transient failure at {failed_at}"
+    elif task.request.retries >= max_retries:
+        result["retry_skipped"] = f"resume retries exhausted ({max_retries})"
+    if "retry_skipped" in result:
+        logger.warning(f"Task {task.request.id} failed at {failed_at}, not retrying: {result['retry_skipped']}")
+        return
     
-    from app.services.qgen.orchestrator.multi_agent_system import _create_interview_system_with_progress_patching
+    logger.warning(
+        f"Task {task.request.id} failed at {failed_at} after a transient provider error, "
+        f"retrying from last completed step ({task.request.retries + 1}/{max_retries})"
+    )
+    raise task.retry(
+        countdown=int(settings.get("retry_countdown_seconds", 10)),
+        max_retries=max_retries
+    )
+
+def _create_interview_system_with_progress_tracking(llm_provider, progress_tracker, task_id=None, llm_model=None):
+    """
+    Create interview system with progress tracking and streaming injected per run.
+
+    The compiled workflow and agents are shared across tasks in the worker;
+    only the progress tracker and stream manager are specific to this task.
+    The model defaults to the provider's configured model; per-agent tiers
+    under `qgen.agents.<agent>.llm` are applied by the interview system.
+    """
+    from app.services.qgen.orchestrator.multi_agent_system import MultiAgentTechnicalInterviewSystem
     from app.services.qgen.models.schemas import LLMConfig
+    from app.services.qgen.llm.client_registry import get_default_model
     
     # Create LLM config
     llm_config = LLMConfig(
         provider=llm_provider,
-        model=llm_model,
+        model=llm_model or get_default_model(llm_provider),
         temperature=0.1
     )
     
@@ -444,98 +762,8 @@ def _create_interview_system_with_progress_tracking(llm_provider, llm_model, pro
         progress_tracker.enable_streaming()
         logger.info(f"Created stream manager for task {task_id}")
     
-    # Create the system with progress tracking and streaming integrated during initialization
-    system = _create_interview_system_with_progress_patching(llm_config, progress_tracker, stream_manager)
-    
-    return system
-
-def _patch_agents_with_progress_tracking(interview_system, progress_tracker):
-    """
-    Patch the agents to include progress tracking
-    """
-    logger.info("DEBUG: Patching agents with progress tracking")
-    
-    agents = [
-        (interview_system.skill_extractor, "SkillExtractionAgent"),
-        (interview_system.question_generator, "QuestionGenerationAgent"),
-        (interview_system.question_evaluator, "QuestionEvaluationAgent"),
-        (interview_system.response_generator, "ExpectedResponseAgent"),
-        (interview_system.report_assembler, "ReportAssemblyAgent")
-    ]
-    
-    for agent, agent_name in agents:
-        logger.info(f"DEBUG: Patching {agent_name} execute method")
-        original_execute = agent.execute
-        
-        def create_wrapped_execute(original_method, name):
-            def wrapped_execute(state):
-                logger.info(f"DEBUG: Starting agent: {name}")
-                progress_tracker.update_agent_progress(name, 0)
-                
-                try:
-                    result = original_method(state)
-                    progress_tracker.update_agent_progress(name, 100)
-                    logger.info(f"DEBUG: Completed agent: {name}")
-                    return result
-                except Exception as e:
-                    logger.error(f"Agent {name} failed: {str(e)}")
-                    raise
-            
-            return wrapped_execute
-        
-        # Replace the execute method
-        agent.execute = create_wrapped_execute(original_execute, agent_name)
-        logger.info(f"DEBUG: Successfully patched {agent_name}")
-    
-    logger.info("DEBUG: Finished patching all agents")
-
-def _patch_interview_system_for_progress(interview_system, progress_tracker):
-    """
-    Patch the interview system to report progress via the progress tracker
-    """
-    logger.info("DEBUG: Starting to patch interview system for progress tracking")
-    
-    # Store original execute methods
-    original_execute_methods = {}
-    
-    agents = [
-        interview_system.skill_extractor,
-        interview_system.question_generator,
-        interview_system.question_evaluator,
-        interview_system.response_generator,
-        interview_system.report_assembler
-    ]
-    
-    agent_names = [
-        "SkillExtractionAgent",
-        "QuestionGenerationAgent", 
-        "QuestionEvaluationAgent",
-        "ExpectedResponseAgent",
-        "ReportAssemblyAgent"
-    ]
-    
-    # Wrap each agent's execute method to report progress
-    for agent, agent_name in zip(agents, agent_names):
-        logger.info(f"DEBUG: Patching agent {agent_name}, original execute: {agent.execute}")
-        original_execute = agent.execute
-        
-        def create_wrapped_execute(original_method, name):
-            def wrapped_execute(state):
-                logger.info(f"DEBUG: Starting agent: {name}")
-                progress_tracker.update_agent_progress(name, 0)
-                
-                try:
-                    result = original_method(state)
-                    progress_tracker.update_agent_progress(name, 100)
-                    logger.info(f"DEBUG: Completed agent: {name}")
-                    return result
-                except Exception as e:
-                    logger.error(f"Agent {name} failed: {str(e)}")
-                    raise
-            
-            return wrapped_execute
-        
-        agent.execute = create_wrapped_execute(original_execute, agent_name)
-        logger.info(f"DEBUG: Patched agent {agent_name}, new execute: {agent.execute}")
-    
-    logger.info("DEBUG: Finished patching all agents for progress tracking")
\ No newline at end of file
+    return MultiAgentTechnicalInterviewSystem(
+        llm_config,
+        stream_manager=stream_manager,
+        progress_tracker=progress_tracker
+    )
@@ -41,7 +41,7 @@ interface QuestionEvent {
   targeted_skill: string;
   category: string;
   question_number: number;
-  total_questions: number;
+  total_questions: number | null;  // null while categories are still generating
 }
 
 interface EvaluationEvent {
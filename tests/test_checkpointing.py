@@ -0,0 +1,190 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db_ops.models import WorkflowCheckpoint, WorkflowCheckpointWrite
+from app.fake_llm_client import FakeLLMError
+from app.services.qgen.llm.agent_llm import is_transient_error
+from app.services.qgen.models.schemas import AgentResult, LLMConfig, LLMProvider, ProcessingStage
+from app.services.qgen.orchestrator import checkpointing, multi_agent_system
+from app.services.qgen.orchestrator.checkpointing import SQLAlchemyCheckpointSaver
+from app.services.qgen.orchestrator.multi_agent_system import InterviewAgents, MultiAgentTechnicalInterviewSystem
+from app.tasks import question_generation_tasks
+
+LLM_CONFIG = LLMConfig(provider=LLMProvider.FAKE, model="fake-1")
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Session factory for a throwaway SQLite database with the checkpoint tables"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'checkpoints.db'}")
+    for model in (WorkflowCheckpoint, WorkflowCheckpointWrite):
+        model.__table__.create(bind=engine)
+    return sessionmaker(bind=engine)
+
+@pytest.fixture
+def saver(session_factory):
+    return SQLAlchemyCheckpointSaver(session_factory, max_checkpoints_per_thread=3)
+
+def put(saver, thread_id, parent=None, step=0):
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    if parent:
+        config["configurable"]["checkpoint_id"] = parent["configurable"]["checkpoint_id"]
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {"step": step}
+    return saver.put(config, checkpoint, {"source": "loop", "step": step}, {})
+
+def test_put_get_round_trip(saver):
+    """Test that a stored checkpoint, its metadata, parent and pending writes are read back"""
+    first = put(saver, "t1")
+    second = put(saver, "t1", parent=first, step=1)
+    saver.put_writes(second, [("errors", ["boom"])], task_id="task-1")
+
+    latest = saver.get_tuple({"configurable": {"thread_id": "t1"}})
+    assert latest.config == second
+    assert latest.checkpoint["channel_values"] == {"step": 1}
+    assert latest.metadata["step"] == 1
+    assert latest.parent_config == first
+    assert latest.pending_writes == [("task-1", "errors", ["boom"])]
+
+    assert saver.get_tuple(first).checkpoint["channel_values"] == {"step": 0}
+    assert [t.config for t in saver.list({"configurable": {"thread_id": "t1"}})] == [second, first]
+    assert saver.get_tuple({"configurable": {"thread_id": "unknown"}}) is None
+
+def test_thread_trimmed_to_limit(saver):
+    """Test that only the newest max_checkpoints_per_thread checkpoints are kept"""
+    config = None
+    for step in range(5):
+        config = put(saver, "t1", parent=config, step=step)
+    steps = [t.metadata["step"] for t in saver.list({"configurable": {"thread_id": "t1"}})]
+    assert steps == [4, 3, 2]
+
+def test_delete_thread(saver):
+    """Test that deleting a thread removes its checkpoints and writes only"""
+    config = put(saver, "t1")
+    saver.put_writes(config, [("errors", ["boom"])], task_id="task-1")
+    put(saver, "t2")
+
+    saver.delete_thread("t1")
+    assert saver.get_tuple({"configurable": {"thread_id": "t1"}}) is None
+    assert saver.get_tuple({"configurable": {"thread_id": "t2"}}) is not None
+    with saver.session_factory() as db:
+        assert db.query(WorkflowCheckpointWrite).count() == 0
+
+def test_prune_expired(saver):
+    """Test that threads without a checkpoint inside the retention window are pruned"""
+    put(saver, "old")
+    put(saver, "live")
+    with saver.session_factory() as db:
+        db.query(WorkflowCheckpoint).filter(WorkflowCheckpoint.thread_id == "old").update(
+            {"created_at": datetime.utcnow() - timedelta(days=2)}
+        )
+        db.commit()
+    assert saver.prune_expired() == 1
+    assert saver.get_tuple({"configurable": {"thread_id": "old"}}) is None
+    assert saver.get_tuple({"configurable": {"thread_id": "live"}}) is not None
+
+class StubAgent:
+    """Agent that sets the next processing stage, failing while `failures` remain"""
+
+    def __init__(self, name, stage, failures=0):
+        self.agent_name = name
+        self.stage = stage
+        self.failures = failures
+        self.calls = 0
+
+    def execute(self, state):
+        self.calls += 1
+        success = self.calls > self.failures
+        state["agent_results"].append(AgentResult(
+            agent_name=self.agent_name, execution_time=0.0, success=success,
+            error_message=None if success else f"{self.agent_name} failed"
+        ))
+        if success:
+            state["processing_stage"] = self.stage
+        else:
+            state["errors"].append(f"{self.agent_name} failed")
+            state["processing_stage"] = ProcessingStage.ERROR
+        return state
+
+    def stream_result_sync(self, state, since=0):
+        pass
+
+@pytest.fixture
+def interview_system(monkeypatch, saver):
+    """Staged interview system on the test checkpointer, with stub agents"""
+    agents = InterviewAgents(
+        skill_extractor=StubAgent("SkillExtractionAgent", ProcessingStage.SKILLS_EXTRACTED),
+        question_generator=StubAgent("QuestionGenerationAgent", ProcessingStage.QUESTIONS_GENERATED),
+        question_evaluator=StubAgent("QuestionEvaluationAgent", ProcessingStage.QUESTIONS_EVALUATED, failures=1),
+        response_generator=StubAgent("ExpectedResponseAgent", ProcessingStage.RESPONSES_GENERATED),
+        report_assembler=StubAgent("ReportAssemblyAgent", ProcessingStage.COMPLETED, failures=1)
+    )
+    key = (LLM_CONFIG.provider.value, LLM_CONFIG.model, LLM_CONFIG.temperature, LLM_CONFIG.max_tokens)
+    monkeypatch.setattr(checkpointing, "_checkpointer", saver)
+    monkeypatch.setattr(multi_agent_system, "get_response_cache", lambda: None)
+    monkeypatch.setattr(MultiAgentTechnicalInterviewSystem, "_compiled_graphs", {})
+    monkeypatch.setattr(MultiAgentTechnicalInterviewSystem, "_agent_pool", {key: agents})
+    return MultiAgentTechnicalInterviewSystem(LLM_CONFIG, pipeline_mode="staged")
+
+def test_resume_from_last_completed_agent(interview_system):
+    """Test that a resumed run continues at the failed agent without re-running completed ones"""
+    agents = interview_system.agents
+    first = interview_system.generate_technical_interview(job_description="Python", thread_id="t1")
+    assert not first["success"]
+    assert first["failed_agent"] == "QuestionEvaluationAgent"
+    assert first["thread_id"] == "t1"
+
+    resume_config = interview_system._find_resume_checkpoint("t1")
+    assert interview_system.agent.get_state({"configurable": resume_config}).next == ("evaluate_questions",)
+
+    second = interview_system.generate_technical_interview(resume_thread_id="t1")
+    assert second["failed_agent"] == "ReportAssemblyAgent"
+    assert second["thread_id"] == "t1"
+    assert second["last_successful_agent"] == "ExpectedResponseAgent"
+    assert [agents.skill_extractor.calls, agents.question_generator.calls] == [1, 1]
+    assert [agents.question_evaluator.calls, agents.response_generator.calls] == [2, 1]
+
+def test_fresh_run_without_resumable_thread(interview_system):
+    """Test that an unknown resume thread starts a fresh run"""
+    result = interview_system.generate_technical_interview(job_description="Python", resume_thread_id="missing")
+    assert result["failed_agent"] == "QuestionEvaluationAgent"
+    assert interview_system.agents.skill_extractor.calls == 1
+
+def test_transient_errors():
+    """Test which failures count as transient provider errors"""
+    assert is_transient_error(FakeLLMError("overloaded", status_code=503))
+    assert is_transient_error(FakeLLMError("rate limited", status_code=429))
+    assert is_transient_error(TimeoutError())
+    assert not is_transient_error(ValueError("no skills extracted"))
+    try:
+        try:
+            raise FakeLLMError("overloaded", status_code=500)
+        except FakeLLMError as e:
+            raise RuntimeError("generation failed") from e
+    except RuntimeError as e:
+        assert is_transient_error(e)
+
+class Retry(Exception):
+    pass
+
+def retrying_task(retries):
+    def retry(**kwargs):
+        return Retry(kwargs)
+    return SimpleNamespace(request=SimpleNamespace(id="task-1", retries=retries), retry=retry)
+
+def test_retry_only_transient_failures():
+    """Test that only transient failures are retried and skipped retries record why"""
+    with pytest.raises(Retry):
+        question_generation_tasks._retry_from_checkpoint(retrying_task(0), {"transient_error": True})
+
+    result = {"transient_error": False, "failed_agent": "QuestionEvaluationAgent"}
+    question_generation_tasks._retry_from_checkpoint(retrying_task(0), result)
+    assert result["retry_skipped"] == "non-transient failure at QuestionEvaluationAgent"
+
+    result = {"transient_error": True}
+    question_generation_tasks._retry_from_checkpoint(retrying_task(2), result)
+    assert result["retry_skipped"].startswith("resume retries exhausted")
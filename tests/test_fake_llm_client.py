@@ -0,0 +1,122 @@
+import pytest
+import yaml
+from fastapi import HTTPException
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from app.db_ops import db_config
+from app.fake_llm_client import FakeChatModel, FakeLLMError
+from app.llm_client_ops import LLM_Client_Ops, is_provider_enabled
+from app.services.qgen.models.schemas import (
+    CandidateEvaluation, QuestionEvaluationOutput, QuestionGenerationOutput, SkillExtractionOutput
+)
+
+JOB_DESCRIPTION = "Backend engineer: Python, PostgreSQL, Redis, Kubernetes and Docker in production."
+
+@pytest.fixture
+def fake_enabled(monkeypatch):
+    """Set `llm_providers.fake.enabled` in the active app config"""
+    def set_enabled(enabled):
+        config = {"llm_providers": {"fake": {"enabled": enabled}}}
+        monkeypatch.setattr(db_config, "load_app_config", lambda: config)
+    return set_enabled
+
+def messages(text):
+    return [SystemMessage(content="You are an interviewer."), HumanMessage(content=text)]
+
+def test_same_input_same_output():
+    """Test that responses depend only on the seed and the prompt"""
+    model = FakeChatModel()
+    first = model.invoke(messages("Describe Redis"))
+    assert model.invoke(messages("Describe Redis")).content == first.content
+    assert FakeChatModel().invoke(messages("Describe Redis")).content == first.content
+    assert FakeChatModel(seed=1).invoke(messages("Describe Redis")).content != first.content
+    assert first.usage_metadata["total_tokens"] > 0
+
+def test_structured_output_is_deterministic():
+    """Test that structured outputs are identical for identical prompts"""
+    extractor = FakeChatModel().with_structured_output(SkillExtractionOutput)
+    first = extractor.invoke(messages(JOB_DESCRIPTION))
+    assert extractor.invoke(messages(JOB_DESCRIPTION)) == first
+    assert extractor.invoke(messages(JOB_DESCRIPTION + " Kafka")) != first
+
+def test_skill_extraction_output():
+    """Test that extracted skills are valid and come from the document"""
+    output = FakeChatModel().with_structured_output(SkillExtractionOutput).invoke(messages(JOB_DESCRIPTION))
+    assert isinstance(output, SkillExtractionOutput)
+    assert output.skills
+    assert {s.skill_name for s in output.skills} <= {"Python", "PostgreSQL", "Redis", "Kubernetes", "Docker"}
+    assert {s.category for s in output.skills} <= {c.name for c in output.categories}
+
+def test_question_generation_output():
+    """Test that generated questions target the skills named in the prompt"""
+    prompt = 'Generate questions for the Databases category. Skills: [{"name": "PostgreSQL"}, {"name": "Redis"}]'
+    output = FakeChatModel().with_structured_output(QuestionGenerationOutput).invoke(messages(prompt))
+    assert {q.targeted_skill for q in output.questions} == {"PostgreSQL", "Redis"}
+    assert len({q.question_id for q in output.questions}) == len(output.questions)
+    assert all(q.question_id.startswith("DATABASES_") for q in output.questions)
+
+def test_question_evaluation_output():
+    """Test that evaluations cover the question ids of the prompt"""
+    prompt = 'Evaluate: [{"question_id": "Q_1"}, {"question_id": "Q_2"}]'
+    output = FakeChatModel().with_structured_output(QuestionEvaluationOutput).invoke(messages(prompt))
+    assert [e.question_id for e in output.evaluations] == ["Q_1", "Q_2"]
+    assert all(e.approved == (e.overall_quality >= 3) for e in output.evaluations)
+
+def test_generic_schema_output():
+    """Test that any other Pydantic schema gets a valid instance"""
+    output = FakeChatModel().with_structured_output(CandidateEvaluation).invoke(messages("Summarise"))
+    assert isinstance(output, CandidateEvaluation)
+
+def test_include_raw():
+    """Test the raw message and parsed output of include_raw"""
+    result = FakeChatModel().with_structured_output(SkillExtractionOutput, include_raw=True).invoke(
+        messages(JOB_DESCRIPTION)
+    )
+    assert result["parsing_error"] is None
+    assert SkillExtractionOutput.model_validate_json(result["raw"].content) == result["parsed"]
+
+def test_injected_failures():
+    """Test injected rate limits, provider errors and malformed outputs"""
+    with pytest.raises(FakeLLMError) as error:
+        FakeChatModel(rate_limit_error_rate=1.0).invoke(messages("Describe Redis"))
+    assert error.value.status_code == 429
+    with pytest.raises(FakeLLMError) as error:
+        FakeChatModel(error_rate=1.0).invoke(messages("Describe Redis"))
+    assert error.value.status_code == 500
+    result = FakeChatModel(malformed_output_rate=1.0).with_structured_output(
+        SkillExtractionOutput, include_raw=True
+    ).invoke(messages(JOB_DESCRIPTION))
+    assert result["parsed"] is None
+    assert result["parsing_error"] is not None
+
+def test_fake_provider_gate(fake_enabled):
+    """Test that the fake provider follows llm_providers.fake.enabled of the active config"""
+    fake_enabled(False)
+    assert not is_provider_enabled("fake")
+    assert is_provider_enabled("openai")
+    with pytest.raises(ValueError, match="fake provider is disabled"):
+        LLM_Client_Ops("fake")
+
+    fake_enabled(True)
+    assert is_provider_enabled("fake")
+    assert isinstance(LLM_Client_Ops("fake").llm_client, FakeChatModel)
+
+def test_fake_provider_not_enabled_in_production():
+    """Test that the production config does not enable the fake provider"""
+    with open("app/configs/app.prod.yaml") as f:
+        providers = yaml.safe_load(f)["llm_providers"]
+    assert not (providers.get("fake") or {}).get("enabled", False)
+
+def test_request_provider_check(fake_enabled):
+    """Test that API requests for unknown or disabled providers are rejected with a 400"""
+    from app.api.v1.routes import _check_llm_provider
+
+    fake_enabled(False)
+    for provider in ("fake", "not-a-provider", None):
+        with pytest.raises(HTTPException) as error:
+            _check_llm_provider(provider)
+        assert error.value.status_code == 400
+    _check_llm_provider("openai")
+
+    fake_enabled(True)
+    _check_llm_provider("fake")
@@ -0,0 +1,81 @@
+import json
+import pytest
+
+from app.services.qgen.utils.incremental_json import IncrementalArrayParser
+
+QUESTIONS = [
+    {"question_id": "q1", "question_text": "Why is \"SELECT *\" slow here?", "tags": ["sql", "indexes"]},
+    {"question_id": "q2", "question_text": "Explain {braces} and [brackets] in f-strings", "tags": []},
+    {"question_id": "q3", "question_text": "Nested", "meta": {"limits": [1, 2, {"deep": "]}"}]}}
+]
+
+@pytest.fixture
+def document():
+    return json.dumps({"questions": QUESTIONS})
+
+def feed_all(parser, fragments):
+    items = []
+    for fragment in fragments:
+        items.extend(parser.feed(fragment))
+    return items
+
+def test_whole_document(document):
+    """Test parsing a document fed in one fragment"""
+    parser = IncrementalArrayParser("questions")
+    assert parser.feed(document) == QUESTIONS
+    assert parser.items_parsed == 3
+    assert parser.text == document
+
+def test_character_by_character(document):
+    """Test that items are returned exactly once, as soon as they close"""
+    parser = IncrementalArrayParser("questions")
+    completed_at = []
+    for index, char in enumerate(document):
+        for item in parser.feed(char):
+            completed_at.append((index, item))
+
+    assert [item for _, item in completed_at] == QUESTIONS
+    # The first item is available long before the document ends
+    first_index = completed_at[0][0]
+    assert document[first_index] == "}"
+    assert first_index < len(document) // 2
+
+def test_escaped_quotes_and_backslashes():
+    """Test strings with escaped quotes, backslashes and brackets"""
+    item = {"question_text": "Path C:\\temp\\ and a quote \\\" plus \"}]{[\""}
+    parser = IncrementalArrayParser("questions")
+    items = feed_all(parser, json.dumps({"questions": [item]}))
+    assert items == [item]
+
+def test_nested_objects_are_not_items(document):
+    """Test that only direct elements of the target array are returned"""
+    parser = IncrementalArrayParser("questions")
+    items = feed_all(parser, [document[i:i + 7] for i in range(0, len(document), 7)])
+    assert len(items) == 3
+    assert items[2]["meta"]["limits"][2] == {"deep": "]}"}
+
+def test_other_arrays_ignored():
+    """Test that arrays under other keys are skipped"""
+    document = json.dumps({"notes": [{"a": 1}], "questions": [{"b": 2}], "tail": [{"c": 3}]})
+    parser = IncrementalArrayParser("questions")
+    assert feed_all(parser, document) == [{"b": 2}]
+
+def test_top_level_array_and_code_fence():
+    """Test a top-level array wrapped in a markdown code fence"""
+    parser = IncrementalArrayParser("questions")
+    items = feed_all(parser, ["```json\n[", '{"a": 1},', ' {"a": 2}]', "\n```"])
+    assert items == [{"a": 1}, {"a": 2}]
+
+def test_truncated_input(document):
+    """Test that a truncated stream keeps every item that closed"""
+    cut = document.index('"question_id": "q3"')
+    parser = IncrementalArrayParser("questions")
+    items = feed_all(parser, document[:cut])
+    assert items == QUESTIONS[:2]
+    assert parser.items_parsed == 2
+
+def test_empty_fragments():
+    """Test that empty fragments are ignored"""
+    parser = IncrementalArrayParser("questions")
+    assert parser.feed("") == []
+    assert parser.text == ""
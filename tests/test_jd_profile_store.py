@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db_ops.models import JDSkillProfile
+from app.services.qgen.agents.skill_extraction_agent import SkillExtractionAgent
+from app.services.qgen.models.schemas import ExtractedSkill, SkillCategory
+from app.services.qgen.stores.jd_profile_store import JDProfileStore, content_hash
+
+JD_TEXT = "Backend engineer.\n\nWe use Python,   PostgreSQL and Redis."
+CATEGORIES = [SkillCategory(name="Backend", description="Backend skills", priority=1)]
+
+def skill(name, context="", technologies=()):
+    return ExtractedSkill(
+        skill_name=name, category="Backend", evidence_from_text="", experience_level="Advanced",
+        confidence_score=4, context=context, specific_technologies=list(technologies)
+    )
+
+SKILLS = [skill("Python"), skill("PostgreSQL")]
+
+@pytest.fixture
+def store(tmp_path):
+    """JD profile store on a throwaway SQLite database"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'profiles.db'}")
+    JDSkillProfile.__table__.create(bind=engine)
+    return JDProfileStore(sessionmaker(bind=engine), ttl_days=30)
+
+def test_content_hash_normalises_text():
+    """Test that case and whitespace differences do not change the content hash"""
+    assert content_hash(JD_TEXT) == content_hash("backend engineer. we use python, postgresql and redis.")
+    assert content_hash(JD_TEXT) != content_hash(JD_TEXT + " Kafka")
+
+def test_profile_key():
+    """Test that keys depend on the JD, normalised position title, provider and model"""
+    key = JDProfileStore.profile_key(JD_TEXT, "Backend Engineer", "openai", "gpt-4o")
+    assert key == JDProfileStore.profile_key(JD_TEXT.upper(), "  backend   engineer ", "openai", "gpt-4o")
+    assert key != JDProfileStore.profile_key(JD_TEXT, "Data Engineer", "openai", "gpt-4o")
+    assert key != JDProfileStore.profile_key(JD_TEXT, "Backend Engineer", "gemini", "gpt-4o")
+    assert key != JDProfileStore.profile_key(JD_TEXT, "Backend Engineer", "openai", "gpt-4o-mini")
+
+def test_round_trip(store):
+    """Test that a stored profile is returned for the same JD and title only"""
+    assert store.get(JD_TEXT, "Backend Engineer", "openai", "gpt-4o") is None
+    store.put(JD_TEXT, "Backend Engineer", "openai", "gpt-4o", SKILLS, CATEGORIES)
+
+    profile = store.get(JD_TEXT, "backend engineer", "openai", "gpt-4o")
+    assert profile == {"skills": SKILLS, "categories": CATEGORIES}
+    assert store.get(JD_TEXT, "Data Engineer", "openai", "gpt-4o") is None
+    assert store.stats() == {"hits": 1, "misses": 2, "writes": 1, "errors": 0}
+    with store.session_factory() as db:
+        assert db.query(JDSkillProfile).one().hit_count == 1
+
+def test_put_refreshes_profile(store):
+    """Test that storing a profile again replaces it"""
+    store.put(JD_TEXT, "Backend Engineer", "openai", "gpt-4o", SKILLS, CATEGORIES)
+    store.put(JD_TEXT, "Backend Engineer", "openai", "gpt-4o", SKILLS[:1], CATEGORIES)
+    assert store.get(JD_TEXT, "Backend Engineer", "openai", "gpt-4o")["skills"] == SKILLS[:1]
+
+def test_expired_profiles(store):
+    """Test that profiles older than the TTL are misses and are pruned"""
+    store.put(JD_TEXT, "Backend Engineer", "openai", "gpt-4o", SKILLS, CATEGORIES)
+    store.put(JD_TEXT, "Data Engineer", "openai", "gpt-4o", SKILLS, CATEGORIES)
+    with store.session_factory() as db:
+        db.query(JDSkillProfile).first().created_at = datetime.utcnow() - timedelta(days=31)
+        db.commit()
+    assert store.prune() == 1
+    with store.session_factory() as db:
+        assert db.query(JDSkillProfile).count() == 1
+
+def test_database_errors_are_misses(tmp_path):
+    """Test that a store without its table never fails a run"""
+    store = JDProfileStore(sessionmaker(bind=create_engine(f"sqlite:///{tmp_path / 'empty.db'}")))
+    store.put(JD_TEXT, "Backend Engineer", "openai", "gpt-4o", SKILLS, CATEGORIES)
+    assert store.get(JD_TEXT, "Backend Engineer", "openai", "gpt-4o") is None
+    assert store.stats()["errors"] == 2
+
+def test_merge_resume_with_jd_profile():
+    """Test that JD skills missing from the resume are kept as gaps and matches keep the resume entry"""
+    resume = {
+        "skills": [skill("Python", "5 years", ["FastAPI"]), skill("Go")],
+        "categories": [SkillCategory(name="Languages", description="", priority=2)]
+    }
+    jd_profile = {"skills": [skill("python", technologies=["Django"]), skill("PostgreSQL")], "categories": CATEGORIES}
+    merged = SkillExtractionAgent.merge_resume_with_jd_profile(resume, jd_profile)
+    skills = {s.skill_name: s for s in merged["skills"]}
+    assert set(skills) == {"Python", "PostgreSQL", "Go"}
+    assert skills["Python"].context == "5 years"
+    assert skills["Python"].specific_technologies == ["FastAPI", "Django"]
+    assert skills["PostgreSQL"].context.startswith("GAP")
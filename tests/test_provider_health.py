@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+from langchain_core.exceptions import OutputParserException
+
+from app.services.qgen.llm.agent_llm import is_provider_error
+from app.services.qgen.llm.provider_health import (
+    CLOSED, HALF_OPEN, OPEN, ProviderHealthMonitor, ProviderUnavailableError
+)
+from app.services.qgen.llm.rate_limiter import RateLimitTimeoutError
+
+def monitor(probe=lambda provider: True, **kwargs):
+    settings = {"failure_threshold": 3, "failure_window_seconds": 60, "open_seconds": 30}
+    return ProviderHealthMonitor(probe=probe, **{**settings, **kwargs})
+
+def wait_for_state(health, provider, state):
+    deadline = time.time() + 2
+    while health.get_state(provider)["state"] != state and time.time() < deadline:
+        time.sleep(0.01)
+    return health.get_state(provider)["state"]
+
+def test_opens_after_threshold():
+    """Test that the circuit opens after failure_threshold failures and rejects calls"""
+    health = monitor()
+    for _ in range(2):
+        health.record_failure("openai", RuntimeError("503"))
+    assert health.is_available("openai")
+
+    health.record_failure("openai", RuntimeError("503"))
+    assert health.get_state("openai")["state"] == OPEN
+    assert not health.is_available("openai")
+    with pytest.raises(ProviderUnavailableError, match="503"):
+        health.ensure_available("openai")
+    assert health.is_available("groq")
+
+def test_success_resets_failures():
+    """Test that a success closes the circuit and resets the failure count"""
+    health = monitor()
+    health.record_failure("openai")
+    health.record_failure("openai")
+    health.record_success("openai")
+    health.record_failure("openai")
+    assert health.get_state("openai")["failures"] == 1
+    assert health.is_available("openai")
+
+def test_failures_outside_window_not_counted(monkeypatch):
+    """Test that failures older than the window do not add up"""
+    health = monitor(failure_window_seconds=10)
+    now = time.time()
+    for offset in (0, 20, 40):
+        monkeypatch.setattr(time, "time", lambda: now + offset)
+        health.record_failure("openai")
+    assert health.get_state("openai")["failures"] == 1
+    assert health.get_state("openai")["state"] == CLOSED
+
+def test_probe_closes_circuit():
+    """Test that a healthy probe after the cool-down closes the circuit"""
+    release = threading.Event()
+    def probe(provider):
+        release.wait(2)
+        return True
+
+    health = monitor(probe=probe, failure_threshold=1, open_seconds=0)
+    health.record_failure("openai")
+    assert not health.is_available("openai")
+    assert health.get_state("openai")["state"] == HALF_OPEN
+    assert not health.is_available("openai")
+
+    release.set()
+    assert wait_for_state(health, "openai", CLOSED) == CLOSED
+    assert health.is_available("openai")
+
+def test_failed_probe_reopens_circuit():
+    """Test that a failing probe keeps the circuit open"""
+    probes = []
+    def probe(provider):
+        probes.append(provider)
+        raise RuntimeError("still down")
+
+    health = monitor(probe=probe, failure_threshold=1, open_seconds=0)
+    health.record_failure("openai")
+    health.is_available("openai")
+    assert wait_for_state(health, "openai", OPEN) == OPEN
+    assert health.get_state("openai")["last_error"] == "health probe failed"
+    assert probes == ["openai"]
+
+def test_state_expires():
+    """Test that recorded state expires after state_ttl_seconds"""
+    health = monitor(failure_threshold=1, state_ttl_seconds=0)
+    health.record_failure("openai")
+    assert health.get_state("openai")["state"] == CLOSED
+
+def test_only_provider_errors_count():
+    """Test that output, validation and local rate-limit errors do not count against a provider"""
+    assert is_provider_error(RuntimeError("503 Service Unavailable"))
+    assert not is_provider_error(OutputParserException("bad json"))
+    assert not is_provider_error(RateLimitTimeoutError("gave up waiting"))
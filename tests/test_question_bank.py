@@ -0,0 +1,122 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db_ops.models import QuestionBankEntry
+from app.services.qgen.models.schemas import ExpectedResponse, QuestionEvaluation, ScoringRubric, TechnicalQuestion
+from app.services.qgen.stores import skill_index
+from app.services.qgen.stores.question_bank import QuestionBank, question_hash
+
+@pytest.fixture(autouse=True)
+def no_skill_index(monkeypatch):
+    """Match skills by their compact key, without the database-backed index"""
+    monkeypatch.setattr(skill_index, "get_skill_index", lambda: None)
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Session factory for a throwaway SQLite database with the question bank table"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'bank.db'}")
+    QuestionBankEntry.__table__.create(bind=engine)
+    return sessionmaker(bind=engine)
+
+@pytest.fixture
+def bank(session_factory):
+    return QuestionBank(session_factory, min_quality=4)
+
+def question(question_id, text, skill="PostgreSQL", question_type="implementation_details", difficulty=3):
+    return TechnicalQuestion(
+        question_id=question_id, question_text=text, question_type=question_type,
+        difficulty_level=difficulty, estimated_time_minutes=10, targeted_skill=skill, rationale="test"
+    )
+
+def evaluation(question_id, quality=5, approved=True):
+    return QuestionEvaluation(
+        question_id=question_id, technical_depth_score=4, relevance_score=4, difficulty_appropriateness=4,
+        non_generic_score=4, overall_quality=quality, feedback="", approved=approved
+    )
+
+def response(question_id):
+    return ExpectedResponse(
+        question_id=question_id, key_concepts_required=["indexes"], good_answer_indicators=[], red_flags=[],
+        follow_up_questions=[], scoring_rubric=ScoringRubric(
+            excellent="", good="", average="", below_average="", poor=""
+        )
+    )
+
+def save(bank, questions, qualities=None, provider="openai"):
+    qualities = qualities or [5] * len(questions)
+    return bank.save(
+        questions, [evaluation(q.question_id, quality) for q, quality in zip(questions, qualities)],
+        [response(q.question_id) for q in questions], provider=provider, model="gpt-4o"
+    )
+
+def test_question_hash():
+    """Test that case, punctuation and spacing do not change the question hash"""
+    assert question_hash("How do B-tree indexes work?") == question_hash("how do b tree  indexes work")
+    assert question_hash("How do B-tree indexes work?") != question_hash("How do hash indexes work?")
+
+def test_save_only_approved_quality_questions(bank):
+    """Test that only approved questions meeting min_quality are stored, each text once"""
+    questions = [
+        question("q1", "How do B-tree indexes work?"),
+        question("q2", "When would you partition a table?"),
+        question("q3", "What is MVCC?")
+    ]
+    assert save(bank, questions, qualities=[5, 3, 4]) == 2
+    assert save(bank, [question("q4", "how do b-tree indexes work")]) == 0
+
+    rejected = question("q5", "How does VACUUM work?")
+    assert bank.save([rejected], [evaluation("q5", approved=False)], [response("q5")], provider="openai") == 0
+    assert bank.save([rejected], [evaluation("q5")], [], provider="openai") == 0
+
+def test_banked_questions_not_saved_again(bank):
+    """Test that questions served from the bank are not stored a second time"""
+    save(bank, [question("q1", "How do B-tree indexes work?")])
+    banked = bank.find("PostgreSQL", [3], limit=1)[0]
+    assert save(bank, [question(banked.question_id, "Reworded: how do B-tree indexes work?")]) == 0
+
+def test_excluded_providers(session_factory, bank):
+    """Test that questions of excluded providers are neither stored nor served"""
+    assert save(bank, [question("q1", "How do B-tree indexes work?")], provider="fake") == 0
+
+    unfiltered = QuestionBank(session_factory, excluded_providers=[])
+    save(unfiltered, [question("q1", "How do B-tree indexes work?")], provider="fake")
+    assert len(unfiltered.find("PostgreSQL", [3], limit=5)) == 1
+    assert bank.find("PostgreSQL", [3], limit=5) == []
+
+def test_find_ranking(bank):
+    """Test that find matches skill spellings and difficulty, prefers quality and distinct question types"""
+    save(bank, [
+        question("q1", "How do B-tree indexes work?"),
+        question("q2", "How would you debug a slow query plan?", question_type="edge_cases_debugging"),
+        question("q3", "What is MVCC?"),
+        question("q4", "Design a sharded PostgreSQL cluster.", question_type="system_design", difficulty=5),
+        question("q5", "How does Redis persistence work?", skill="Redis")
+    ], qualities=[4, 4, 5, 5, 5])
+
+    found = bank.find("postgresql", [3], limit=2)
+    assert [f.question.question_text for f in found] == ["What is MVCC?", "How would you debug a slow query plan?"]
+    assert [f.question.question_text for f in bank.find("PostgreSQL", [5], limit=5)] == [
+        "Design a sharded PostgreSQL cluster."
+    ]
+    assert len(bank.find("PostgreSQL", [3], limit=5, min_quality=5)) == 1
+
+def test_find_prefers_least_used(bank):
+    """Test that among equal questions the least used one is served first"""
+    save(bank, [question("q1", "How do B-tree indexes work?"), question("q2", "What is MVCC?")])
+    first = bank.find("PostgreSQL", [3], limit=1)[0]
+    second = bank.find("PostgreSQL", [3], limit=1)[0]
+    assert first.entry_id != second.entry_id
+
+def test_get_banked_question(session_factory, bank):
+    """Test that banked question ids resolve to their stored evaluation and expected response"""
+    save(bank, [question("q1", "How do B-tree indexes work?")])
+    banked = bank.find("PostgreSQL", [3], limit=1)[0]
+    assert banked.question_id.startswith("bank_")
+    assert bank.get(banked.question_id) is banked
+
+    entry = QuestionBank(session_factory).get(banked.question_id)
+    assert entry.evaluation.overall_quality == 5
+    assert entry.expected_response.key_concepts_required == ["indexes"]
+    assert bank.get("q1") is None
+    assert bank.get("bank_missing") is None
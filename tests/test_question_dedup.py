@@ -0,0 +1,129 @@
+import pytest
+
+from app.services.qgen.models.schemas import ExtractedSkill, TechnicalQuestion
+from app.services.qgen.stores import skill_index
+from app.services.qgen.utils import question_dedup
+from app.services.qgen.utils.question_dedup import QuestionDeduplicator, similarity_matrix
+
+INDEX_QUESTION = "How would you design indexes in PostgreSQL to speed up a slow join query on large tables?"
+INDEX_REWORDED = "How would you design PostgreSQL indexes to speed up a slow join query on large tables?"
+EVICTION_QUESTION = "Explain how Redis eviction policies work under memory pressure."
+PERSISTENCE_QUESTION = "Explain how Redis persistence options (RDB vs AOF) trade durability for performance."
+RATE_LIMITER_QUESTION = "Describe how you would implement a rate limiter with Redis sorted sets."
+RATE_LIMITER_VARIANT = "How would you implement a distributed rate limiter using Redis?"
+
+@pytest.fixture(autouse=True)
+def no_skill_index(monkeypatch):
+    """Match skills by their compact key, without the database-backed index"""
+    monkeypatch.setattr(skill_index, "get_skill_index", lambda: None)
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    """Run each test with the NumPy and the pure-Python similarity"""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        monkeypatch.setattr(question_dedup, "NUMPY_AVAILABLE", True)
+    else:
+        monkeypatch.setattr(question_dedup, "NUMPY_AVAILABLE", False)
+    return request.param
+
+def question(question_id, text, skill):
+    return TechnicalQuestion(
+        question_id=question_id, question_text=text, question_type="implementation_details",
+        difficulty_level=3, estimated_time_minutes=10, targeted_skill=skill, rationale="test"
+    )
+
+def skill(name, confidence):
+    return ExtractedSkill(
+        skill_name=name, category="Backend", evidence_from_text="", experience_level="Advanced",
+        confidence_score=confidence, context=""
+    )
+
+SKILLS = [skill("SQL", 3), skill("PostgreSQL", 5), skill("Redis", 4)]
+
+def test_similarity_matrix(backend):
+    """Test that the matrix is symmetric with reworded questions close and distinct ones far apart"""
+    texts = [INDEX_QUESTION, INDEX_REWORDED, EVICTION_QUESTION, PERSISTENCE_QUESTION]
+    matrix = similarity_matrix(texts)
+    for i in range(len(texts)):
+        assert matrix[i][i] == pytest.approx(1.0)
+        for j in range(len(texts)):
+            assert matrix[i][j] == pytest.approx(matrix[j][i])
+    assert matrix[0][1] > 0.95
+    assert matrix[2][3] < 0.2
+    assert matrix[0][2] == pytest.approx(0.0)
+
+def test_similarity_backends_agree(monkeypatch):
+    """Test that the NumPy and pure-Python similarities are identical"""
+    pytest.importorskip("numpy")
+    texts = [INDEX_QUESTION, INDEX_REWORDED, RATE_LIMITER_QUESTION, RATE_LIMITER_VARIANT]
+    monkeypatch.setattr(question_dedup, "NUMPY_AVAILABLE", True)
+    with_numpy = similarity_matrix(texts)
+    monkeypatch.setattr(question_dedup, "NUMPY_AVAILABLE", False)
+    without_numpy = similarity_matrix(texts)
+    for row, other in zip(with_numpy, without_numpy):
+        assert row == pytest.approx(other)
+
+def test_near_duplicate_keeps_higher_confidence(backend):
+    """Test that of two near-duplicates the one targeting the more confident skill survives"""
+    questions = [
+        question("q1", INDEX_QUESTION, "SQL"),
+        question("q2", INDEX_REWORDED, "PostgreSQL"),
+        question("q3", EVICTION_QUESTION, "Redis")
+    ]
+    kept, merges = QuestionDeduplicator(0.8).deduplicate(questions, SKILLS)
+    assert [q.question_id for q in kept] == ["q2", "q3"]
+    assert len(merges) == 1
+    assert merges[0].kept_question_id == "q2"
+    assert merges[0].removed_question_id == "q1"
+    assert merges[0].similarity >= 0.8
+    assert set(merges[0].to_dict()) == {"kept_question_id", "removed_question_id", "similarity"}
+
+def test_tie_keeps_earlier_question(backend):
+    """Test that with equal confidence the earlier question survives"""
+    questions = [question("q1", INDEX_QUESTION, "PostgreSQL"), question("q2", INDEX_REWORDED, "PostgreSQL")]
+    kept, merges = QuestionDeduplicator(0.8).deduplicate(questions, SKILLS)
+    assert [q.question_id for q in kept] == ["q1"]
+    assert merges[0].removed_question_id == "q2"
+
+def test_bank_question_preferred(backend):
+    """Test that a question bank question survives over a more confident generated one"""
+    questions = [question("q1", INDEX_REWORDED, "PostgreSQL"), question("bank_e1", INDEX_QUESTION, "SQL")]
+    kept, merges = QuestionDeduplicator(0.8).deduplicate(questions, SKILLS)
+    assert [q.question_id for q in kept] == ["bank_e1"]
+
+def test_distinct_questions_kept(backend):
+    """Test that different questions on the same skill are not merged"""
+    questions = [
+        question("q1", EVICTION_QUESTION, "Redis"),
+        question("q2", PERSISTENCE_QUESTION, "Redis"),
+        question("q3", RATE_LIMITER_QUESTION, "Redis"),
+        question("q4", RATE_LIMITER_VARIANT, "Redis")
+    ]
+    kept, merges = QuestionDeduplicator(0.8).deduplicate(questions, SKILLS)
+    assert kept == questions
+    assert merges == []
+
+def test_threshold(backend):
+    """Test that the threshold decides what counts as a duplicate"""
+    questions = [question("q1", RATE_LIMITER_QUESTION, "Redis"), question("q2", RATE_LIMITER_VARIANT, "Redis")]
+    similarity = similarity_matrix([q.question_text for q in questions])[0][1]
+    assert QuestionDeduplicator(similarity + 0.01).deduplicate(questions, SKILLS)[1] == []
+    kept, merges = QuestionDeduplicator(similarity - 0.01).deduplicate(questions, SKILLS)
+    assert [q.question_id for q in kept] == ["q1"]
+
+def test_cross_category_accepted_questions_win(backend):
+    """Test that questions already accepted from an earlier category are never dropped"""
+    accepted = [question("q1", INDEX_QUESTION, "SQL")]
+    new_category = [question("q2", INDEX_REWORDED, "PostgreSQL"), question("q3", EVICTION_QUESTION, "Redis")]
+    kept, merges = QuestionDeduplicator(0.8).deduplicate(new_category, SKILLS, accepted=accepted)
+    assert [q.question_id for q in kept] == ["q3"]
+    assert merges[0].kept_question_id == "q1"
+    assert merges[0].removed_question_id == "q2"
+
+def test_single_and_empty_inputs(backend):
+    """Test that trivial inputs are returned unchanged"""
+    deduplicator = QuestionDeduplicator(0.8)
+    assert deduplicator.deduplicate([], SKILLS) == ([], [])
+    single = [question("q1", INDEX_QUESTION, "SQL")]
+    assert deduplicator.deduplicate(single, SKILLS) == (single, [])
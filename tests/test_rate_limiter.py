@@ -0,0 +1,134 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from app.fake_llm_client import FakeLLMError
+from app.services.qgen.llm.agent_llm import AgentLLM
+from app.services.qgen.llm.provider_health import ProviderHealthMonitor
+from app.services.qgen.llm.rate_limiter import (
+    ProviderRateLimiter, RateLimitTimeoutError, estimate_tokens, is_rate_limit_error, retry_after_seconds
+)
+
+class Clock:
+    """Controllable replacement for time.time and time.sleep"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock.time)
+    monkeypatch.setattr(time, "sleep", clock.sleep)
+    return clock
+
+def limiter(**limits):
+    return ProviderRateLimiter({"openai": limits}, max_wait_seconds=30, base_backoff_seconds=2)
+
+def test_requests_per_minute(clock):
+    """Test that requests beyond the per-minute budget wait for the bucket to refill"""
+    rate_limiter = limiter(requests_per_minute=60)
+    for _ in range(60):
+        assert rate_limiter._try_reserve("openai", 0) == 0
+    assert rate_limiter._try_reserve("openai", 0) == pytest.approx(1.0)
+    clock.sleep(1)
+    assert rate_limiter._try_reserve("openai", 0) == 0
+
+def test_tokens_per_minute(clock):
+    """Test that the token bucket limits large requests"""
+    rate_limiter = limiter(tokens_per_minute=6000)
+    assert rate_limiter._try_reserve("openai", 5000) == 0
+    assert rate_limiter._try_reserve("openai", 2000) == pytest.approx(10.0)
+    assert rate_limiter._try_reserve("openai", 1000) == 0
+
+def test_unlimited_provider(clock):
+    """Test that providers without limits are never delayed"""
+    rate_limiter = limiter()
+    for _ in range(1000):
+        assert rate_limiter._try_reserve("groq", 100000) == 0
+
+def test_acquire_waits_then_times_out(clock):
+    """Test that acquire sleeps until capacity is free and gives up past max_wait_seconds"""
+    rate_limiter = limiter(requests_per_minute=1)
+    rate_limiter.acquire("openai")
+    with pytest.raises(RateLimitTimeoutError):
+        rate_limiter.acquire("openai")
+
+    rate_limiter = limiter(requests_per_minute=6)
+    rate_limiter.acquire("openai", 0)
+    for _ in range(6):
+        rate_limiter.acquire("openai", 0)
+    assert clock.now >= 1010.0
+
+def test_penalize_pauses_provider(clock):
+    """Test that a 429 pause blocks the provider until it ends"""
+    rate_limiter = limiter()
+    rate_limiter.penalize("openai", 5)
+    rate_limiter.penalize("openai", 1)
+    assert rate_limiter._try_reserve("openai", 0) == pytest.approx(5.0)
+    assert rate_limiter._try_reserve("groq", 0) == 0
+    clock.sleep(5)
+    assert rate_limiter._try_reserve("openai", 0) == 0
+
+def test_backoff_seconds():
+    """Test exponential backoff, its cap and the provider's Retry-After hint"""
+    rate_limiter = ProviderRateLimiter({}, base_backoff_seconds=2, max_backoff_seconds=10)
+    assert 1.6 <= rate_limiter.backoff_seconds(0) <= 2.4
+    assert 6.4 <= rate_limiter.backoff_seconds(2) <= 9.6
+    assert rate_limiter.backoff_seconds(10) <= 12
+    error = FakeLLMError("rate limited", status_code=429)
+    error.response = SimpleNamespace(headers={"retry-after": "3"}, status_code=429)
+    assert retry_after_seconds(error) == 3.0
+    assert rate_limiter.backoff_seconds(0, error) == 3.0
+
+@pytest.mark.parametrize("error, expected", [
+    (FakeLLMError("rate limited", status_code=429), True),
+    (type("RateLimitError", (Exception,), {})("slow down"), True),
+    (RuntimeError("Resource_Exhausted: quota"), True),
+    (RuntimeError("Too many requests"), True),
+    (RuntimeError("prompt has 14290 tokens"), False),
+    (FakeLLMError("overloaded", status_code=503), False)
+])
+def test_is_rate_limit_error(error, expected):
+    """Test which errors are recognised as rate limits"""
+    assert is_rate_limit_error(error) == expected
+
+def test_estimate_tokens():
+    """Test the four characters per token estimate plus expected output"""
+    assert estimate_tokens([HumanMessage(content="x" * 400)], 100) == 200
+    assert estimate_tokens("x" * 40) == 10
+
+class FlakyModel:
+    """Model that answers with 429s before succeeding"""
+
+    def __init__(self, rate_limits):
+        self.rate_limits = rate_limits
+        self.calls = 0
+
+    def invoke(self, messages, config=None, **kwargs):
+        self.calls += 1
+        if self.calls <= self.rate_limits:
+            raise FakeLLMError("rate limited", status_code=429)
+        return "ok"
+
+def test_agent_llm_retries_rate_limits(clock):
+    """Test that 429s pause the provider and are retried without opening its circuit"""
+    health = ProviderHealthMonitor(failure_threshold=1)
+    rate_limiter = ProviderRateLimiter({}, max_retries=2, base_backoff_seconds=1)
+    model = FlakyModel(rate_limits=2)
+    assert AgentLLM("openai", model, health_monitor=health, rate_limiter=rate_limiter).invoke("hi") == "ok"
+    assert model.calls == 3
+    assert health.is_available("openai")
+
+    model = FlakyModel(rate_limits=3)
+    with pytest.raises(FakeLLMError):
+        AgentLLM("openai", model, health_monitor=health, rate_limiter=rate_limiter).invoke("hi")
+    assert model.calls == 3
@@ -0,0 +1,98 @@
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from app.fake_llm_client import FakeChatModel
+from app.services.qgen.llm.agent_llm import AgentLLM
+from app.services.qgen.llm.provider_health import ProviderHealthMonitor
+from app.services.qgen.llm.rate_limiter import ProviderRateLimiter
+from app.services.qgen.llm.response_cache import (
+    MemoryCacheBackend, ResponseCache, SQLiteCacheBackend, make_cache_key
+)
+from app.services.qgen.models.schemas import SkillCategory, SkillExtractionOutput
+
+MESSAGES = [SystemMessage(content="Extract skills"), HumanMessage(content="Python and Redis")]
+KEY_PARTS = ("fake", "fake-1", 0.1, None, "SkillExtractionOutput")
+OUTPUT = SkillExtractionOutput(skills=[], categories=[SkillCategory(name="Backend", description="", priority=1)])
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    """Run each backend test with the in-process and the SQLite backend"""
+    if request.param == "memory":
+        return MemoryCacheBackend(max_entries=2)
+    return SQLiteCacheBackend(str(tmp_path / "cache" / "llm_responses.db"), max_entries=2)
+
+def test_cache_key():
+    """Test that keys depend on the call configuration and the exact messages"""
+    key = make_cache_key(KEY_PARTS, MESSAGES)
+    assert key == make_cache_key(KEY_PARTS, list(MESSAGES))
+    assert key != make_cache_key(("fake", "fake-1", 0.2, None, "SkillExtractionOutput"), MESSAGES)
+    assert key != make_cache_key(KEY_PARTS, [MESSAGES[0], HumanMessage(content="Python and Kafka")])
+    assert key != make_cache_key(KEY_PARTS, [HumanMessage(content="Extract skills"), MESSAGES[1]])
+
+def test_backend_round_trip(backend):
+    """Test that stored values are returned until they expire"""
+    backend.set("a", "value", ttl_seconds=60)
+    backend.set("expired", "value", ttl_seconds=-1)
+    assert backend.get("a") == "value"
+    assert backend.get("expired") is None
+    assert backend.get("missing") is None
+    backend.clear()
+    assert backend.get("a") is None
+
+def test_backend_evicts_least_recently_used(backend, monkeypatch):
+    """Test that entries beyond max_entries are evicted least recently used first"""
+    now = time.time()
+    for offset, key in enumerate(["a", "b"]):
+        monkeypatch.setattr(time, "time", lambda: now + offset)
+        backend.set(key, key, ttl_seconds=60)
+    monkeypatch.setattr(time, "time", lambda: now + 2)
+    assert backend.get("a") == "a"
+    monkeypatch.setattr(time, "time", lambda: now + 3)
+    backend.set("c", "c", ttl_seconds=60)
+    assert backend.get("b") is None
+    assert backend.get("a") == "a"
+    assert backend.get("c") == "c"
+
+def test_sqlite_shared_between_instances(tmp_path):
+    """Test that the SQLite cache is shared by every cache opened on the same file"""
+    path = str(tmp_path / "llm_responses.db")
+    SQLiteCacheBackend(path).set("a", "value", ttl_seconds=60)
+    assert SQLiteCacheBackend(path).get("a") == "value"
+
+def test_response_cache_stats():
+    """Test hits, misses and writes, and that unreadable entries count as errors and misses"""
+    cache = ResponseCache(MemoryCacheBackend())
+    assert cache.get("a", SkillExtractionOutput) is None
+    cache.set("a", OUTPUT)
+    assert cache.get("a", SkillExtractionOutput) == OUTPUT
+    cache.backend.set("broken", "{not json", ttl_seconds=60)
+    assert cache.get("broken", SkillExtractionOutput) is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "writes": 1, "errors": 1, "hit_rate": 0.333}
+
+class CountingModel:
+    """Structured fake model that counts provider calls"""
+
+    def __init__(self):
+        self.runnable = FakeChatModel().with_structured_output(SkillExtractionOutput)
+        self.calls = 0
+
+    def invoke(self, messages, config=None, **kwargs):
+        self.calls += 1
+        return self.runnable.invoke(messages, config=config, **kwargs)
+
+def test_agent_llm_serves_repeated_calls_from_cache():
+    """Test that a repeated structured call is answered from the cache without calling the provider"""
+    model = CountingModel()
+    llm = AgentLLM(
+        "fake", model, health_monitor=ProviderHealthMonitor(), rate_limiter=ProviderRateLimiter({}),
+        response_cache=ResponseCache(MemoryCacheBackend()), output_schema=SkillExtractionOutput,
+        cache_key_parts=KEY_PARTS
+    )
+    first = llm.invoke(MESSAGES)
+    assert llm.invoke(MESSAGES) == first
+    assert model.calls == 1
+    llm.invoke([MESSAGES[0], HumanMessage(content="Python and Kafka")])
+    assert model.calls == 2
+    assert llm.response_cache.stats()["hits"] == 1
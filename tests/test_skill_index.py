@@ -0,0 +1,126 @@
+import pytest
+
+from app.services.qgen.models.schemas import ExtractedSkill, SkillCategory
+from app.services.qgen.stores import skill_index
+from app.services.qgen.stores.skill_index import NameIndex, SkillIndex, compact_key, similarity, trigrams
+
+@pytest.fixture
+def index():
+    return SkillIndex()
+
+@pytest.mark.parametrize("name, key", [
+    ("PostgreSQL 15", "postgresql"),
+    ("Kubernetes (K8s)", "kubernete"),
+    ("C++", "c++"),
+    ("C#", "c#"),
+    ("Redis", "redis"),
+    ("Databases", "database"),
+    ("CI & CD", "ciandcd")
+])
+def test_compact_key(name, key):
+    """Test that compact keys drop case, punctuation, versions, parentheticals and plurals"""
+    assert compact_key(name) == key
+
+def test_compact_key_generic_suffixes():
+    """Test that generic suffixes are only stripped for skills"""
+    assert compact_key("PostgreSQL database", strip_suffixes=True) == "postgresql"
+    assert compact_key("PostgreSQL database") == "postgresqldatabase"
+
+def test_trigram_similarity():
+    """Test the Dice coefficient of trigram sets"""
+    assert similarity(trigrams("kubernete"), trigrams("kubernete")) == 1.0
+    assert similarity(trigrams("mysql"), trigrams("mssql")) < 0.85
+    assert similarity(set(), trigrams("redis")) == 0.0
+
+@pytest.mark.parametrize("name", ["Postgres", "PostgreSQL", "postgresql db", "PostgreSQL 15", "postgres"])
+def test_postgres_spellings(index, name):
+    """Test that PostgreSQL spellings share one canonical name"""
+    assert index.canonical_skill(name) == "PostgreSQL"
+
+@pytest.mark.parametrize("name, canonical", [
+    ("Golang", "Go"),
+    ("NodeJS", "Node.js"),
+    ("node js", "Node.js"),
+    ("Kubernetes (K8s)", "Kubernetes"),
+    ("k8s", "Kubernetes"),
+    ("Typescript", "TypeScript")
+])
+def test_builtin_aliases(index, name, canonical):
+    """Test that common aliases map to their canonical names"""
+    assert index.canonical_skill(name) == canonical
+
+@pytest.mark.parametrize("first, second", [
+    ("React", "React Native"),
+    ("Java", "JavaScript"),
+    ("Go", "Git"),
+    ("MySQL", "MSSQL"),
+    ("Redis", "Redis Cache"),
+    ("Microservices", "Microservice Architecture"),
+    ("Django", "Django REST Framework")
+])
+def test_near_misses_stay_distinct(index, first, second):
+    """Test that related but different skills are not merged"""
+    assert index.canonical_skill(first) != index.canonical_skill(second)
+    assert index.skill_key(first) != index.skill_key(second)
+
+def test_fuzzy_match_registers_variant():
+    """Test that a truncated spelling maps to a known name and is then matched exactly"""
+    names = NameIndex()
+    assert names.canonicalize("Elasticsearch") == "Elasticsearch"
+    assert names.canonicalize("Elasticsearc") == "Elasticsearch"
+    assert names.lookup("elasticsearc") == "Elasticsearch"
+    assert len(names) == 1
+
+def test_short_names_not_fuzzy_matched():
+    """Test that keys shorter than the fuzzy minimum only match exactly"""
+    names = NameIndex()
+    names.canonicalize("Vue")
+    assert names.canonicalize("Vuex") == "Vuex"
+
+def test_threshold():
+    """Test that the similarity threshold decides fuzzy matches"""
+    strict = NameIndex(similarity_threshold=1.0)
+    strict.canonicalize("Elasticsearch")
+    assert strict.canonicalize("Elasticsearc") == "Elasticsearc"
+
+def test_lookup_does_not_register(index):
+    """Test that skill keys of unknown names do not grow the index"""
+    size = len(index.skills)
+    assert index.skills.lookup("Pulumi") is None
+    assert index.skill_key("Pulumi") == "pulumi"
+    assert len(index.skills) == size
+    index.canonical_skill("Pulumi")
+    assert len(index.skills) == size + 1
+
+def test_configured_aliases():
+    """Test that configured aliases are added to the built-in ones"""
+    index = SkillIndex(aliases={"Apache Kafka": ["Kafka", "kafka streams"]})
+    assert index.canonical_skill("kafka") == "Apache Kafka"
+    assert index.canonical_skill("Kafka Streams") == "Apache Kafka"
+    assert index.canonical_skill("Postgres") == "PostgreSQL"
+
+def test_category_keys(index):
+    """Test that category plurals match without generic suffix stripping"""
+    assert index.canonical_category("Backend Frameworks") == "Backend Frameworks"
+    assert index.canonical_category("Backend Framework") == "Backend Frameworks"
+    assert index.category_key("Databases") == index.category_key("Database")
+    assert index.category_key("Backend") != index.category_key("Backend Frameworks")
+
+def test_canonicalize_extraction(index):
+    """Test that skills, categories and technologies of an extraction are canonicalised"""
+    skills = [ExtractedSkill(
+        skill_name="Postgres", category="Database", evidence_from_text="", experience_level="Advanced",
+        confidence_score=4, context="", specific_technologies=["k8s", "Kubernetes", " "]
+    )]
+    categories = [SkillCategory(name="Databases", description="", priority=1)]
+    canonical_skills, canonical_categories = index.canonicalize_extraction(skills, categories)
+    assert canonical_skills[0].skill_name == "PostgreSQL"
+    assert canonical_skills[0].specific_technologies == ["Kubernetes"]
+    assert canonical_skills[0].category == canonical_categories[0].name == "Database"
+
+def test_skill_key_without_index(monkeypatch):
+    """Test that the module-level keys fall back to compact keys when canonicalisation is disabled"""
+    monkeypatch.setattr(skill_index, "get_skill_index", lambda: None)
+    assert skill_index.skill_key("PostgreSQL database") == "postgresql"
+    assert skill_index.skill_key("Postgres") != skill_index.skill_key("PostgreSQL")
+    assert skill_index.category_key("Databases") == "database"
@@ -0,0 +1,141 @@
+import json
+import pytest
+from langchain_core.messages import AIMessage
+
+from app.services.qgen.models.schemas import QuestionGenerationOutput, QuestionType, TechnicalQuestion
+from app.services.qgen.utils.structured_repair import (
+    coerce_to_model, collect_repairs, repair_json, repair_structured_output, salvage
+)
+
+def question(question_id, **overrides):
+    data = {
+        "question_id": question_id,
+        "question_text": f"Question {question_id}?",
+        "question_type": "implementation_details",
+        "difficulty_level": 3,
+        "estimated_time_minutes": 10,
+        "targeted_skill": "Python",
+        "rationale": "Listed on the resume"
+    }
+    data.update(overrides)
+    return data
+
+# ---- repair_json ---------------------------------------------------------------
+
+def test_repair_json_valid():
+    """Test that valid JSON is returned without fixes"""
+    assert repair_json('{"a": [1, 2]}') == ({"a": [1, 2]}, [])
+
+def test_repair_json_strips_markdown_fence():
+    """Test that a markdown code fence around the JSON is removed"""
+    data, fixes = repair_json('```json\n{"a": 1}\n```')
+    assert data == {"a": 1}
+    assert fixes == ["stripped_wrapper"]
+
+def test_repair_json_leading_prose():
+    """Test that text before the first brace is ignored"""
+    data, fixes = repair_json('Here are the questions: {"a": 1}')
+    assert data == {"a": 1}
+    assert "stripped_wrapper" in fixes
+
+def test_repair_json_trailing_commas():
+    """Test that trailing commas are removed outside strings only"""
+    data, fixes = repair_json('{"a": [1, 2,], "b": "x,]",}')
+    assert data == {"a": [1, 2], "b": "x,]"}
+    assert fixes == ["trailing_commas"]
+
+def test_repair_json_truncated():
+    """Test that a truncated document is cut back to its last complete item"""
+    text = json.dumps({"questions": [question("q1"), question("q2")]})
+    cut = text.index('"q2"') + 10
+    data, fixes = repair_json(text[:cut])
+    assert [q["question_id"] for q in data["questions"]] == ["q1"]
+    assert "truncated" in fixes
+
+def test_repair_json_no_complete_item():
+    """Test that truncation before any complete item raises ValueError"""
+    with pytest.raises(ValueError, match="no complete item"):
+        repair_json('{"questions": [{"question_id": "q1", "question_te')
+
+def test_repair_json_no_json():
+    """Test that text without JSON raises ValueError"""
+    with pytest.raises(ValueError):
+        repair_json("I cannot answer that.")
+
+# ---- coercion ------------------------------------------------------------------
+
+def test_coerce_enum_case_and_separators():
+    """Test that enum values match case-insensitively and by member name"""
+    for value in ("Implementation Details", "IMPLEMENTATION_DETAILS", "implementation-details"):
+        result = coerce_to_model(TechnicalQuestion, question("q1", question_type=value))
+        assert result.question_type == QuestionType.IMPLEMENTATION_DETAILS
+
+@pytest.mark.parametrize("value, expected", [(7, 5), (0, 1), ("4", 4), (2.6, 3)])
+def test_coerce_int_literal_clamped(value, expected):
+    """Test that integer literals are parsed, rounded and clamped into range"""
+    result = coerce_to_model(TechnicalQuestion, question("q1", difficulty_level=value))
+    assert result.difficulty_level == expected
+
+def test_coerce_int_field_from_string():
+    """Test that numeric strings are converted for int fields"""
+    result = coerce_to_model(TechnicalQuestion, question("q1", estimated_time_minutes="15"))
+    assert result.estimated_time_minutes == 15
+
+def test_coerce_invalid_returns_none():
+    """Test that data still invalid after coercion gives None"""
+    assert coerce_to_model(TechnicalQuestion, question("q1", question_type="riddle")) is None
+    assert coerce_to_model(TechnicalQuestion, question("q1", difficulty_level="hard")) is None
+
+# ---- salvage -------------------------------------------------------------------
+
+def test_salvage_drops_invalid_items():
+    """Test that invalid list items are dropped and counted"""
+    data = {"questions": [question("q1"), question("q2", question_type="riddle"), question("q3")]}
+    result = salvage(QuestionGenerationOutput, data)
+    assert [q.question_id for q in result.output.questions] == ["q1", "q3"]
+    assert result.dropped_items == 1
+    assert result.incomplete
+
+def test_salvage_bare_list():
+    """Test that a bare list is taken as the schema's only item list"""
+    result = salvage(QuestionGenerationOutput, [question("q1")])
+    assert [q.question_id for q in result.output.questions] == ["q1"]
+    assert not result.incomplete
+
+def test_salvage_nothing_valid():
+    """Test that None is returned when no item survives"""
+    assert salvage(QuestionGenerationOutput, {"questions": [question("q1", question_type="riddle")]}) is None
+    assert salvage(QuestionGenerationOutput, {"questions": []}) is None
+    assert salvage(QuestionGenerationOutput, "not a dict") is None
+
+# ---- repair_structured_output --------------------------------------------------
+
+def test_repair_structured_output_from_message():
+    """Test repairing a truncated, fenced answer from a raw AI message"""
+    text = "```json\n" + json.dumps({"questions": [question("q1"), question("q2")]})
+    message = AIMessage(content=text[:text.index('"q2"') + 5])
+    result = repair_structured_output(message, QuestionGenerationOutput)
+    assert [q.question_id for q in result.output.questions] == ["q1"]
+    assert result.truncated
+    assert "stripped_wrapper" in result.fixes
+
+def test_repair_structured_output_from_tool_call_arguments():
+    """Test repairing tool-call arguments with a trailing comma"""
+    arguments = '{"questions": [' + json.dumps(question("q1", difficulty_level=9)) + ',]}'
+    message = AIMessage(content="", additional_kwargs={"tool_calls": [{"function": {"arguments": arguments}}]})
+    result = repair_structured_output(message, QuestionGenerationOutput)
+    assert result.output.questions[0].difficulty_level == 5
+    assert result.fixes == ["trailing_commas"]
+
+def test_repair_structured_output_unrepairable():
+    """Test that unrepairable output gives None"""
+    assert repair_structured_output("no json here", QuestionGenerationOutput) is None
+    assert repair_structured_output(AIMessage(content='{"questions": [{"question_id": "q'), QuestionGenerationOutput) is None
+
+def test_collect_repairs():
+    """Test that repairs are collected only inside the context"""
+    with collect_repairs() as repairs:
+        repair_structured_output([question("q1")], QuestionGenerationOutput)
+    repair_structured_output([question("q2")], QuestionGenerationOutput)
+    assert len(repairs) == 1
+    assert repairs[0].output.questions[0].question_id == "q1"